@@ -0,0 +1,158 @@
+import asyncio
+import aiohttp
+from typing import Dict, Any, Optional, Iterable, List
+from config.config import config
+from api.routes import resolve_template
+from utils.logger import log
+from utils.log_policy import log_policy
+
+
+class AsyncRequestHandler:
+    """异步请求封装类，与RequestHandler保持相同的基础URL、请求头、超时和日志行为"""
+
+    def __init__(self, base_url: Optional[str] = None, concurrency: Optional[int] = None):
+        self.base_url = base_url or config['BASE_URL']
+        self.timeout = config['API_TIMEOUT']
+        self.concurrency = concurrency or config['ASYNC_CONCURRENCY']
+        self.headers = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._setup_headers()
+
+    def _setup_headers(self):
+        """设置默认请求头"""
+        self.headers.update({
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+        })
+
+        # 如果有API_KEY，添加到请求头
+        if config.get('API_KEY'):
+            self.headers.update({
+                'Authorization': f'Bearer {config["API_KEY"]}'
+            })
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        获取会话，首次使用时在当前事件循环中创建
+        :return: aiohttp会话
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+            )
+        return self._session
+
+    async def _request(self, method: str, url: str, **kwargs) -> Any:
+        """
+        发送请求并解析JSON响应
+        :param method: 请求方法
+        :param url: 请求URL（相对路径）
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        full_url = f"{self.base_url}{url}"
+        log.info(f"发送{method}请求: {full_url}, params: {kwargs.get('params')}, json: {kwargs.get('json')}")
+
+        try:
+            async with self.session.request(method, full_url, **kwargs) as response:
+                response.raise_for_status()
+                # DELETE请求可能返回空响应
+                text = await response.text()
+                result = await response.json(content_type=None) if text else {}
+            log_policy.log_response(f"{method}请求成功: {full_url}", resolve_template(url), result)
+            return result
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.error(f"{method}请求失败: {full_url}, 错误: {str(e)}")
+            raise
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """
+        发送GET请求
+        :param url: 请求URL（相对路径）
+        :param params: 查询参数
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        return await self._request("GET", url, params=params, **kwargs)
+
+    async def post(self, url: str, json: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """
+        发送POST请求
+        :param url: 请求URL（相对路径）
+        :param json: JSON请求体
+        :param data: 表单数据
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        return await self._request("POST", url, json=json, data=data, **kwargs)
+
+    async def put(self, url: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """
+        发送PUT请求
+        :param url: 请求URL（相对路径）
+        :param json: JSON请求体
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        return await self._request("PUT", url, json=json, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> Any:
+        """
+        发送DELETE请求
+        :param url: 请求URL（相对路径）
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        return await self._request("DELETE", url, **kwargs)
+
+    async def gather(self, urls: Iterable[str], params: Optional[Dict[str, Any]] = None,
+                     return_exceptions: bool = False) -> List[Any]:
+        """
+        并发发送多个GET请求，并发数受concurrency限制
+        :param urls: 请求URL列表（相对路径）
+        :param params: 每个请求共用的查询参数
+        :param return_exceptions: 为True时失败的请求以异常对象返回，而不是中断全部请求
+        :return: 与urls顺序一致的响应结果列表
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _bounded_get(url: str) -> Any:
+            async with semaphore:
+                return await self.get(url, params=params)
+
+        return await asyncio.gather(*(_bounded_get(url) for url in urls), return_exceptions=return_exceptions)
+
+    async def close(self):
+        """
+        关闭会话
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        log.info("关闭异步请求会话")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+def gather_get(urls: Iterable[str], base_url: Optional[str] = None, concurrency: Optional[int] = None,
+               return_exceptions: bool = False) -> List[Any]:
+    """
+    在同步测试中并发发送多个GET请求
+    :param urls: 请求URL列表（相对路径）
+    :param base_url: 基础URL，默认使用配置中的BASE_URL
+    :param concurrency: 最大并发数，默认使用配置中的ASYNC_CONCURRENCY
+    :param return_exceptions: 为True时失败的请求以异常对象返回
+    :return: 与urls顺序一致的响应结果列表
+    """
+    async def _run() -> List[Any]:
+        async with AsyncRequestHandler(base_url=base_url, concurrency=concurrency) as handler:
+            return await handler.gather(urls, return_exceptions=return_exceptions)
+
+    return asyncio.run(_run())
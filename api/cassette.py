@@ -0,0 +1,282 @@
+import io
+import os
+import json
+import mmap
+import struct
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from config.config import config
+from api.metrics import TimedHTTPAdapter
+from utils.logger import log
+
+# 文件结构：MAGIC | 记录... | 索引(JSON) | 索引偏移(8字节) | MAGIC
+# 每条记录：元数据长度(4字节) | 元数据(JSON：状态码、原因、响应头) | 响应体
+MAGIC = b"APICASS1"
+_FOOTER = struct.Struct("<Q8s")
+_META_LEN = struct.Struct("<I")
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """回放模式下请求没有录制过，不会发送到网络"""
+
+
+def request_key(request: requests.PreparedRequest) -> str:
+    """
+    生成请求的录制键：请求方法、完整URL（含查询参数）和请求体摘要
+    multipart请求体每次的分隔符不同，不计入录制键
+    :param request: 准备好的请求
+    :return: 录制键
+    """
+    key = f"{request.method} {request.url}"
+    body = request.body
+    content_type = request.headers.get('Content-Type', '')
+    if body and not content_type.startswith('multipart/'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if isinstance(body, bytes):
+            key = f"{key} {hashlib.sha1(body).hexdigest()}"
+    return key
+
+
+class CassetteWriter:
+    """录制文件写入器：记录顺序追加，关闭时写入索引；先写独立的临时文件，完整关闭后才替换原文件"""
+
+    # 同一进程中按录制文件路径共享的写入器，见shared()
+    _shared: Dict[str, "CassetteWriter"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # 每个写入器使用独立的临时文件，同一进程中的多个写入器不会互相截断
+        self._tmp_path = f"{path}.{os.getpid()}.{id(self):x}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(MAGIC)
+        self.index: Dict[str, Tuple[int, int, int]] = {}
+        self._lock = threading.Lock()
+        self._users = 1
+
+    @classmethod
+    def shared(cls, path: str) -> "CassetteWriter":
+        """
+        获取录制文件路径对应的共享写入器，同一进程中录制到同一文件的多个适配器写入同一个写入器
+        每次获取都要对应一次close()，最后一个使用者关闭时才写入索引并替换原文件
+        :param path: 录制文件路径
+        :return: 写入器
+        """
+        key = os.path.abspath(path)
+        with cls._shared_lock:
+            writer = cls._shared.get(key)
+            if writer is not None:
+                with writer._lock:
+                    if writer._file is not None:
+                        writer._users += 1
+                        return writer
+            writer = cls(path)
+            cls._shared[key] = writer
+            return writer
+
+    def add(self, key: str, status: int, reason: str, headers: Dict[str, str], body: bytes) -> bool:
+        """
+        写入一条记录，相同录制键保留最后一次的响应（如重试后成功的响应，而不是重试前的503）
+        被覆盖的记录仍留在文件中，但不在索引中
+        :return: 是否写入
+        """
+        meta = json.dumps({"status": status, "reason": reason, "headers": headers},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                return False
+            offset = self._file.tell()
+            self._file.write(_META_LEN.pack(len(meta)))
+            self._file.write(meta)
+            self._file.write(body)
+            self.index[key] = (offset, len(meta), len(body))
+            return True
+
+    def close(self):
+        with self._shared_lock, self._lock:
+            if self._file is None:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+            key = os.path.abspath(self.path)
+            if self._shared.get(key) is self:
+                del self._shared[key]
+            index_offset = self._file.tell()
+            self._file.write(json.dumps(self.index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            self._file.write(_FOOTER.pack(index_offset, MAGIC))
+            self._file.close()
+            self._file = None
+        os.replace(self._tmp_path, self.path)
+        log.info(f"录制完成: {self.path}, 记录数: {len(self.index)}")
+
+
+class CassetteReader:
+    """录制文件读取器：内存映射整个文件，按索引直接定位响应"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"录制文件为空: {path}")
+        index_offset, magic = _FOOTER.unpack(self._mm[-_FOOTER.size:])
+        if self._mm[:len(MAGIC)] != MAGIC or magic != MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的录制文件: {path}")
+        self.index: Dict[str, Any] = json.loads(self._mm[index_offset:len(self._mm) - _FOOTER.size])
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """
+        查找录制的响应
+        :param key: 录制键
+        :return: (元数据, 响应体)，没有录制时返回None
+        """
+        location = self.index.get(key)
+        if location is None:
+            return None
+        offset, meta_len, body_len = location
+        start = offset + _META_LEN.size
+        meta = json.loads(self._mm[start:start + meta_len])
+        return meta, self._mm[start + meta_len:start + meta_len + body_len]
+
+    def __len__(self):
+        return len(self.index)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+class RecordingAdapter(TimedHTTPAdapter):
+    """录制模式：正常发送请求，并把每个请求和响应写入录制文件"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = CassetteWriter.shared(path)
+        self._closed = False
+
+    def send(self, request, stream=False, **kwargs):
+        response = super().send(request, stream=stream, **kwargs)
+        # 读取完整响应体用于录制，之后的iter_content会从已读取的内容中分块返回
+        body = response.content
+        self.writer.add(request_key(request), response.status_code, response.reason,
+                        dict(response.headers), body)
+        return response
+
+    def close(self):
+        super().close()
+        # 会话按http和https挂载同一个适配器，关闭会话时会多次调用，共享写入器只释放一次
+        if not self._closed:
+            self._closed = True
+            self.writer.close()
+
+
+class ReplayAdapter(TimedHTTPAdapter):
+    """回放模式：从录制文件返回响应，不访问网络"""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.reader = CassetteReader(path)
+        self.replayed = 0
+
+    def send(self, request, stream=False, **kwargs):
+        key = request_key(request)
+        recorded = self.reader.get(key) if self.reader is not None else None
+        if recorded is None:
+            raise CassetteMissError(f"录制文件中没有该请求: {key}", request=request)
+        meta, body = recorded
+        self.replayed += 1
+
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta["reason"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        # 录制的响应体已经解压，去掉Content-Encoding避免再次解压
+        response.headers.pop("Content-Encoding", None)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        super().close()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+def cassette_path(name: Optional[str] = None, worker_id: Optional[str] = None) -> str:
+    """
+    获取录制文件路径
+    :param name: 录制名称，默认使用配置中的CASSETTE_NAME
+    :param worker_id: 并行运行时的工作进程ID，各工作进程录制到独立的文件，运行结束后由parallel_runner合并
+    :return: 录制文件路径
+    """
+    name = name or config['CASSETTE_NAME']
+    if worker_id is not None:
+        name = f"{name}.worker{worker_id}"
+    return os.path.join(config['CASSETTE_DIR'], f"{name}.cassette")
+
+
+def merge_cassettes(paths: List[str], output: str, remove: bool = True) -> int:
+    """
+    合并多个录制文件，相同录制键以后面的文件为准
+    :param paths: 录制文件路径，不存在的文件跳过
+    :param output: 合并后的录制文件路径
+    :param remove: 合并后是否删除原文件
+    :return: 合并后的记录数
+    """
+    writer = CassetteWriter(output)
+    try:
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            reader = CassetteReader(path)
+            try:
+                for key in reader.index:
+                    meta, body = reader.get(key)
+                    writer.add(key, meta["status"], meta["reason"], meta["headers"], bytes(body))
+            finally:
+                reader.close()
+    finally:
+        writer.close()
+    if remove:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+    return len(writer.index)
+
+
+def create_adapter(mode: Optional[str] = None, path: Optional[str] = None, **kwargs) -> TimedHTTPAdapter:
+    """
+    根据录制模式创建适配器
+    :param mode: off（直接访问网络）、record（录制）、replay（回放），默认使用配置中的CASSETTE_MODE
+    :param path: 录制文件路径，默认使用cassette_path()，并行运行的录制模式下各工作进程使用独立的文件
+    :param kwargs: 连接池参数
+    :return: 适配器
+    """
+    mode = (mode or config['CASSETTE_MODE']).lower()
+    if mode == 'off':
+        return TimedHTTPAdapter(**kwargs)
+    if mode == 'record':
+        path = path or cassette_path(worker_id=os.getenv('PYTEST_WORKER_ID'))
+        log.info(f"录制模式: 请求和响应将写入 {path}")
+        return RecordingAdapter(path, **kwargs)
+    path = path or cassette_path()
+    if mode == 'replay':
+        log.info(f"回放模式: 从 {path} 返回响应，不访问网络")
+        return ReplayAdapter(path, **kwargs)
+    raise ValueError(f"未知的录制模式: {mode}，可选值：off, record, replay")
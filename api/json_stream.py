@@ -0,0 +1,78 @@
+import json
+from typing import Any, Iterable, Iterator
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_TERMINATORS = _WHITESPACE + ",]"
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    增量解析JSON数组，逐个返回数组元素，内存占用只与单个元素和分块大小有关
+    :param chunks: 已解码的文本分块
+    :return: 数组元素迭代器
+    """
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def _fill() -> bool:
+        # 丢弃已解析的部分并读取下一个分块，没有更多数据时返回False
+        nonlocal buffer, pos, eof
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def _skip_whitespace() -> bool:
+        # 跳过空白字符，返回是否还有待解析的数据
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not _fill():
+                return False
+
+    if not _skip_whitespace() or buffer[pos] != "[":
+        raise ValueError("响应不是JSON数组")
+    pos += 1
+    expect_value = True
+
+    while True:
+        if not _skip_whitespace():
+            raise ValueError("JSON数组不完整")
+        char = buffer[pos]
+        if char == "]" and (not started or not expect_value):
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError(f"JSON数组格式错误，位置{pos}处应为','")
+            pos += 1
+            expect_value = True
+            continue
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+            # 数字可能被分块截断（如"-15"后还有"00.0"），必须看到分隔符才能确认已完整
+            incomplete = end == len(buffer) or (
+                isinstance(item, (int, float)) and not isinstance(item, bool)
+                and buffer[end] not in _TERMINATORS
+            )
+            if incomplete and not eof and _fill():
+                continue
+        except json.JSONDecodeError:
+            if _fill():
+                continue
+            raise
+        pos = end
+        started = True
+        expect_value = False
+        yield item
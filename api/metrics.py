@@ -0,0 +1,215 @@
+import math
+import time
+import threading
+from typing import Dict, Any, List, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# 记录当前线程建立连接的耗时，由计时连接类写入，RequestHandler发送请求时读取
+_connect_timer = threading.local()
+
+
+def reset_connect_time():
+    _connect_timer.elapsed = 0.0
+
+
+def pop_connect_time() -> float:
+    elapsed = getattr(_connect_timer, 'elapsed', 0.0)
+    _connect_timer.elapsed = 0.0
+    return elapsed
+
+
+class _TimedConnectMixin:
+    """记录建立连接（DNS解析、TCP连接、TLS握手）的耗时"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_timer.elapsed = getattr(_connect_timer, 'elapsed', 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """使用计时连接类的适配器，其余行为与HTTPAdapter一致"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图，内存占用与样本数无关，分位数相对误差不超过precision"""
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        """
+        记录一个延迟样本
+        :param value_ms: 延迟，单位：毫秒
+        """
+        index = int(math.log(max(value_ms, 0.001) * 1000) / self._log_base)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        """
+        合并另一个直方图
+        :param other: 相同精度的直方图
+        """
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """
+        计算分位数
+        :param pct: 百分位，如 99
+        :return: 延迟，单位：毫秒
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * pct / 100), 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # 取桶的上边界，不超过实际最大值
+                return min(math.exp((index + 1) * self._log_base) / 1000, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": round(self.percentile(50), 3),
+            "p90": round(self.percentile(90), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(self.max, 3),
+        }
+
+
+class RequestTiming:
+    """单次请求的耗时分解，单位：秒"""
+
+    PHASES = ("connect", "ttfb", "download", "decode")
+
+    def __init__(self, method: str, template: str, url: str):
+        self.method = method
+        self.template = template
+        self.url = url
+        self.status: Optional[int] = None
+        self.connect = 0.0  # DNS解析、TCP连接和TLS握手，复用连接时为0
+        self.ttfb = 0.0  # 发送请求到收到响应头（不含建立连接）
+        self.download = 0.0  # 读取响应体
+        self.decode = 0.0  # 解析JSON
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.template}"
+
+    @property
+    def total(self) -> float:
+        return self.connect + self.ttfb + self.download + self.decode
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"endpoint": self.key, "url": self.url, "status": self.status}
+        for phase in self.PHASES + ("total",):
+            result[f"{phase}_ms"] = round(getattr(self, phase) * 1000, 3)
+        return result
+
+
+class MetricsCollector:
+    """按端点模板聚合请求耗时，并缓存当前测试用例的请求明细"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._test_timings: List[RequestTiming] = []
+        # 只在用例执行期间缓存请求明细，压测、常驻运行器等场景不会无限增长
+        self._test_active = False
+
+    def record(self, timing: RequestTiming):
+        """
+        记录一次请求的耗时
+        :param timing: 耗时分解
+        """
+        with self._lock:
+            histograms = self._histograms.get(timing.key)
+            if histograms is None:
+                histograms = {phase: LatencyHistogram() for phase in RequestTiming.PHASES + ("total",)}
+                self._histograms[timing.key] = histograms
+            for phase, histogram in histograms.items():
+                histogram.record(getattr(timing, phase) * 1000)
+            if self._test_active:
+                self._test_timings.append(timing)
+
+    def begin_test(self):
+        """开始缓存当前测试用例的请求明细，丢弃之前未取出的明细"""
+        with self._lock:
+            self._test_timings = []
+            self._test_active = True
+
+    def drain_test(self) -> List[RequestTiming]:
+        """
+        取出自begin_test以来记录的请求明细，用于附加到当前测试用例，并停止缓存
+        :return: 请求耗时列表
+        """
+        with self._lock:
+            timings, self._test_timings = self._test_timings, []
+            self._test_active = False
+        return timings
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按端点模板汇总耗时
+        :return: 端点到各阶段平均耗时和总耗时分位数的映射，单位：毫秒
+        """
+        with self._lock:
+            result = {}
+            for key, histograms in sorted(self._histograms.items()):
+                total = histograms["total"].summary()
+                for phase in RequestTiming.PHASES:
+                    total[f"{phase}_mean"] = histograms[phase].summary()["mean"]
+                result[key] = total
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._test_timings.clear()
+            self._test_active = False
+
+
+# 导出全局耗时收集器供其他模块使用
+request_metrics = MetricsCollector()
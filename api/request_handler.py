@@ -1,8 +1,25 @@
 import os
+import copy
+import json
+import time
+import codecs
+import threading
 import requests
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional, Iterator, List
 from config.config import config
+from api.routes import resolve_template
+from api.json_stream import iter_json_array
+from api.response_cache import ResponseCache, invalidated_urls
+from api.resilience import CircuitBreakerRegistry, RetryPolicy
+from api.single_flight import SingleFlight
+from api.cassette import create_adapter
+from api.metrics import RequestTiming, request_metrics, reset_connect_time, pop_connect_time
 from utils.logger import log
+from utils.log_policy import log_policy
+from utils.lazy import LazySingleton
 
 
 class RequestHandler:
@@ -11,43 +28,317 @@ class RequestHandler:
     def __init__(self):
         self.base_url = config['BASE_URL']
         self.timeout = config['API_TIMEOUT']
-        self.session = requests.Session()
+        self.connect_timeout = config['HTTP_CONNECT_TIMEOUT']
+        self.headers = {}
+        # 所有线程共用一个连接池，每个线程使用独立的Session；录制或回放模式下使用对应的适配器
+        self.adapter = create_adapter(
+            pool_connections=config['HTTP_POOL_CONNECTIONS'],
+            pool_maxsize=config['HTTP_POOL_MAXSIZE'],
+            pool_block=config['HTTP_POOL_BLOCK'],
+        )
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+        # GET响应缓存，默认关闭
+        self.cache = ResponseCache.from_config() if config['HTTP_CACHE_ENABLED'] else None
+        # 按主机和端点熔断，幂等请求有限次重试
+        self.breakers = CircuitBreakerRegistry.from_config() if config['CIRCUIT_BREAKER_ENABLED'] else None
+        self.retry = RetryPolicy.from_config()
+        # 合并并发的相同GET请求
+        self.coalescer = SingleFlight() if config['HTTP_COALESCE_ENABLED'] else None
         self._setup_headers()
     
     def _setup_headers(self):
         """设置默认请求头"""
-        self.session.headers.update({
+        self.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json',
         })
         
         # 如果有API_KEY，添加到请求头
         if config.get('API_KEY'):
-            self.session.headers.update({
+            self.headers.update({
                 'Authorization': f'Bearer {config["API_KEY"]}'
             })
     
-    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+    @property
+    def session(self) -> requests.Session:
         """
-        发送GET请求
+        获取当前线程的会话，首次使用时创建并挂载共享连接池
+        :return: 当前线程的会话
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+    
+    @contextmanager
+    def override_headers(self, headers: Dict[str, Any]):
+        """
+        在当前线程内临时覆盖请求头，不影响其他线程和默认请求头
+        值为None的请求头会在请求中被移除
+        :param headers: 要覆盖的请求头
+        """
+        overrides = getattr(self._local, 'header_overrides', [])
+        self._local.header_overrides = overrides + [headers]
+        try:
+            yield
+        finally:
+            self._local.header_overrides = overrides
+    
+    def _merge_headers(self, headers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        合并默认请求头、当前线程覆盖的请求头和单次请求的请求头
+        :param headers: 单次请求的请求头
+        :return: 合并后的请求头
+        """
+        merged = dict(self.headers)
+        for overrides in getattr(self._local, 'header_overrides', []):
+            merged.update(overrides)
+        if headers:
+            merged.update(headers)
+        return merged
+    
+    def _send(self, method: str, full_url: str, headers: Optional[Dict[str, Any]] = None, stream: bool = False, **kwargs) -> requests.Response:
+        """
+        通过当前线程的会话发送请求，并记录建立连接、首字节和下载的耗时
+        熔断器打开时直接抛出CircuitOpenError；幂等请求遇到连接错误、超时或可重试的状态码时按退避策略重试
+        :param method: 请求方法
+        :param full_url: 完整请求URL
+        :param headers: 单次请求的请求头
+        :param stream: 为True时不预先读取响应体
+        :param kwargs: 其他请求参数
+        :return: 响应对象，timing属性为耗时分解
+        """
+        kwargs.setdefault('timeout', (self.connect_timeout, self.timeout))
+        path = full_url[len(self.base_url):] if full_url.startswith(self.base_url) else full_url
+        timing = RequestTiming(method, resolve_template(path), full_url)
+        parts = urlsplit(full_url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        
+        if method != 'GET':
+            # 写请求之后相同URL的GET请求不再复用写请求之前的结果
+            self._invalidate(full_url)
+        
+        attempt = 0
+        try:
+            while True:
+                if self.breakers is not None:
+                    self.breakers.before_request(host, timing.key)
+                reset_connect_time()
+                start = time.perf_counter()
+                try:
+                    response = self.session.request(method, full_url, headers=self._merge_headers(headers), stream=True, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if self.breakers is not None:
+                        self.breakers.record_failure(host, timing.key)
+                    if not self.retry.should_retry(method, attempt, exc=e):
+                        raise
+                    reason = str(e)
+                except BaseException:
+                    # 其他异常也要结束试探请求，否则半开的熔断器会一直快速失败
+                    if self.breakers is not None:
+                        self.breakers.cancel_trial(host, timing.key)
+                    raise
+                else:
+                    if self.breakers is not None:
+                        self.breakers.record_success(host, timing.key)
+                    if not self.retry.should_retry(method, attempt, status=response.status_code):
+                        break
+                    response.close()
+                    reason = f"状态码{response.status_code}"
+                delay = self.retry.delay(attempt)
+                attempt += 1
+                log.warning(f"{method}请求第{attempt}次重试: {full_url}, 原因: {reason}, 等待{delay:.2f}s")
+                time.sleep(delay)
+        finally:
+            if method != 'GET':
+                # 写请求期间发出的GET请求可能读到旧数据，完成后再清理一次
+                self._invalidate(full_url)
+        headers_received = time.perf_counter()
+        timing.connect = pop_connect_time()
+        timing.ttfb = headers_received - start - timing.connect
+        timing.status = response.status_code
+        response.timing = timing
+        if not stream:
+            # 读取响应体，单独统计下载耗时
+            response.content
+            timing.download = time.perf_counter() - headers_received
+        
+        if not response.ok:
+            self._finish_timing(response)
+        response.raise_for_status()
+        return response
+    
+    def _invalidate(self, full_url: str):
+        """
+        删除URL及其上一级集合URL的缓存条目和进行中的合并请求
+        :param full_url: 完整请求URL
+        """
+        if self.cache is not None:
+            self.cache.invalidate(full_url)
+        if self.coalescer is not None:
+            for url in invalidated_urls(full_url):
+                self.coalescer.forget(url)
+    
+    def _finish_timing(self, response: requests.Response, decode: float = 0.0):
+        """
+        补充解析耗时并记录本次请求的耗时分解
+        :param response: 响应对象
+        :param decode: 解析JSON的耗时，单位：秒
+        """
+        timing = getattr(response, 'timing', None)
+        if timing is not None:
+            timing.decode = decode
+            request_metrics.record(timing)
+    
+    def _decode(self, response: requests.Response, allow_empty: bool = False) -> Any:
+        """
+        解析JSON响应体并记录耗时
+        :param response: 响应对象
+        :param allow_empty: 为True时空响应体返回空字典
+        :return: 解析结果
+        """
+        start = time.perf_counter()
+        try:
+            if allow_empty and not response.text:
+                return {}
+            return response.json()
+        finally:
+            self._finish_timing(response, time.perf_counter() - start)
+    
+    def _flight_key(self, full_url: str, params: Optional[Dict[str, Any]] = None,
+                    headers: Optional[Dict[str, Any]] = None) -> str:
+        """
+        生成请求合并键，请求头不同的请求不会合并
+        :param full_url: 完整请求URL
+        :param params: 查询参数
+        :param headers: 单次请求的请求头
+        :return: 合并键
+        """
+        merged = json.dumps(sorted(self._merge_headers(headers).items()), default=str)
+        return f"{ResponseCache.make_key(full_url, params)} {merged}"
+    
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, cache: bool = True, coalesce: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        发送GET请求，与进行中的相同请求合并为一次网络请求
         :param url: 请求URL（相对路径）
         :param params: 查询参数
+        :param cache: 启用响应缓存时，为False可跳过本次请求的缓存
+        :param coalesce: 为False时本次请求不与其他请求合并，如压测时需要每次都实际发送
         :param kwargs: 其他请求参数
-        :return: 响应结果
+        :return: 响应结果，命中缓存时返回缓存的副本
         """
         full_url = f"{self.base_url}{url}"
         log.info(f"发送GET请求: {full_url}, params: {params}")
         
+        use_cache = cache and self.cache is not None
+        entry = None
+        cache_key = None
         try:
-            response = self.session.get(full_url, params=params, timeout=self.timeout, **kwargs)
-            response.raise_for_status()
-            result = response.json()
-            log.info(f"GET请求成功: {full_url}, 响应: {result}")
+            if use_cache:
+                cache_key = ResponseCache.make_key(full_url, params)
+                entry = self.cache.lookup(cache_key)
+                if entry is not None and self.cache.is_fresh(entry):
+                    log.info(f"GET请求命中缓存: {full_url}")
+                    # 返回副本，调用方修改结果不影响之后命中的缓存
+                    return copy.deepcopy(entry.result)
+                if entry is not None:
+                    # 缓存已过期，携带校验信息发送条件请求
+                    kwargs['headers'] = {**entry.validators(), **(kwargs.get('headers') or {})}
+            
+            # 除请求头外还有其他请求参数（如超时时间）时不合并
+            if not coalesce or self.coalescer is None or set(kwargs) - {'headers'}:
+                return self._fetch(url, full_url, params, entry, cache_key, **kwargs)
+            result, shared = self.coalescer.do(
+                self._flight_key(full_url, params, kwargs.get('headers')),
+                lambda: self._fetch(url, full_url, params, entry, cache_key, **kwargs),
+            )
+            if shared:
+                log.info(f"GET请求与相同请求合并，复用结果: {full_url}")
+                # 共享的结果各调用方（包括发出请求的一方）都返回副本，调用方修改结果不影响其他调用方复制
+                return copy.deepcopy(result)
             return result
         except requests.exceptions.RequestException as e:
             log.error(f"GET请求失败: {full_url}, 错误: {str(e)}")
             raise
     
+    def _fetch(self, url: str, full_url: str, params: Optional[Dict[str, Any]], entry, cache_key: Optional[str], **kwargs) -> Any:
+        """
+        发送GET请求并解析响应，启用缓存时处理304并保存响应
+        :param url: 请求URL（相对路径）
+        :param full_url: 完整请求URL
+        :param params: 查询参数
+        :param entry: 已过期的缓存条目，用于304重验证
+        :param cache_key: 缓存键，不使用缓存时为None
+        :param kwargs: 其他请求参数
+        :return: 响应结果
+        """
+        response = self._send('GET', full_url, params=params, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self._finish_timing(response)
+            log.info(f"GET请求缓存重验证成功(304): {full_url}")
+            return copy.deepcopy(self.cache.revalidated(entry, response.headers))
+        result = self._decode(response)
+        if cache_key is not None:
+            self.cache.store_response(cache_key, result, response.headers)
+        log_policy.log_response(f"GET请求成功: {full_url}", resolve_template(url), result, duration=response.timing.total)
+        return result
+    
+    def prefetch(self, urls: List[str], max_workers: int = 8) -> Dict[str, Any]:
+        """
+        并发预取只读资源，结果只返回给调用方，不影响之后的GET请求
+        :param urls: 请求URL（相对路径）列表
+        :param max_workers: 并发线程数
+        :return: URL到响应结果的映射，预取失败的URL不包含在内
+        """
+        log.info(f"预取只读资源: {urls}")
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {url: pool.submit(self.get, url) for url in urls}
+        results = {}
+        for url, future in futures.items():
+            try:
+                results[url] = future.result()
+            except requests.exceptions.RequestException as e:
+                log.warning(f"预取失败: {url}, 错误: {str(e)}")
+        return results
+    
+    def iter_items(self, url: str, params: Optional[Dict[str, Any]] = None, chunk_size: int = 65536, **kwargs) -> Iterator[Any]:
+        """
+        以流式方式发送GET请求，增量解析JSON数组响应并逐个返回元素
+        :param url: 请求URL（相对路径）
+        :param params: 查询参数
+        :param chunk_size: 每次从连接读取的字节数
+        :param kwargs: 其他请求参数
+        :return: 数组元素迭代器
+        """
+        full_url = f"{self.base_url}{url}"
+        log.info(f"发送GET请求(流式): {full_url}, params: {params}")
+        
+        count = 0
+        try:
+            with self._send('GET', full_url, params=params, stream=True, **kwargs) as response:
+                start = time.perf_counter()
+                try:
+                    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+                    chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size=chunk_size))
+                    for item in iter_json_array(chunks):
+                        count += 1
+                        yield item
+                finally:
+                    # 流式读取与解析交替进行，全部计入下载耗时
+                    response.timing.download = time.perf_counter() - start
+                    self._finish_timing(response)
+            log.info(f"GET请求(流式)成功: {full_url}, 元素数: {count}")
+        except requests.exceptions.RequestException as e:
+            log.error(f"GET请求(流式)失败: {full_url}, 错误: {str(e)}")
+            raise
+    
     def post(self, url: str, json: Optional[Dict[str, Any]] = None, data: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
         """
         发送POST请求
@@ -61,10 +352,9 @@ class RequestHandler:
         log.info(f"发送POST请求: {full_url}, json: {json}, data: {data}")
         
         try:
-            response = self.session.post(full_url, json=json, data=data, timeout=self.timeout, **kwargs)
-            response.raise_for_status()
-            result = response.json()
-            log.info(f"POST请求成功: {full_url}, 响应: {result}")
+            response = self._send('POST', full_url, json=json, data=data, **kwargs)
+            result = self._decode(response)
+            log_policy.log_response(f"POST请求成功: {full_url}", resolve_template(url), result, duration=response.timing.total)
             return result
         except requests.exceptions.RequestException as e:
             log.error(f"POST请求失败: {full_url}, 错误: {str(e)}")
@@ -82,10 +372,9 @@ class RequestHandler:
         log.info(f"发送PUT请求: {full_url}, json: {json}")
         
         try:
-            response = self.session.put(full_url, json=json, timeout=self.timeout, **kwargs)
-            response.raise_for_status()
-            result = response.json()
-            log.info(f"PUT请求成功: {full_url}, 响应: {result}")
+            response = self._send('PUT', full_url, json=json, **kwargs)
+            result = self._decode(response)
+            log_policy.log_response(f"PUT请求成功: {full_url}", resolve_template(url), result, duration=response.timing.total)
             return result
         except requests.exceptions.RequestException as e:
             log.error(f"PUT请求失败: {full_url}, 错误: {str(e)}")
@@ -102,14 +391,10 @@ class RequestHandler:
         log.info(f"发送DELETE请求: {full_url}")
         
         try:
-            response = self.session.delete(full_url, timeout=self.timeout, **kwargs)
-            response.raise_for_status()
+            response = self._send('DELETE', full_url, **kwargs)
             # DELETE请求可能返回空响应
-            if response.text:
-                result = response.json()
-            else:
-                result = {}
-            log.info(f"DELETE请求成功: {full_url}, 响应: {result}")
+            result = self._decode(response, allow_empty=True)
+            log_policy.log_response(f"DELETE请求成功: {full_url}", resolve_template(url), result, duration=response.timing.total)
             return result
         except requests.exceptions.RequestException as e:
             log.error(f"DELETE请求失败: {full_url}, 错误: {str(e)}")
@@ -117,17 +402,49 @@ class RequestHandler:
     
     def update_headers(self, headers: Dict[str, Any]):
         """
-        更新请求头
+        更新默认请求头，对所有线程生效
         :param headers: 要更新的请求头
         """
-        self.session.headers.update(headers)
+        with self._lock:
+            self.headers = {**self.headers, **headers}
         log.info(f"更新请求头: {headers}")
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        获取连接池使用统计
+        :return: 按主机统计的新建连接数、请求数和连接复用数
+        """
+        hosts = {}
+        poolmanager = self.adapter.poolmanager
+        for key in list(poolmanager.pools.keys()):
+            pool = poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            hosts[host] = {
+                "opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+            }
+        return {
+            "opened": sum(h["opened"] for h in hosts.values()),
+            "requests": sum(h["requests"] for h in hosts.values()),
+            "reused": sum(h["reused"] for h in hosts.values()),
+            "hosts": hosts,
+        }
+    
     def close(self):
         """
-        关闭会话
+        关闭所有线程的会话和共享连接池
         """
-        self.session.close()
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self.adapter.close()
+        self._local = threading.local()
+        if self.coalescer is not None:
+            self.coalescer.clear()
         log.info("关闭请求会话")
     
     def upload_file(self, url: str, file_path: str, file_name: str = None, **kwargs) -> Dict[str, Any]:
@@ -152,18 +469,12 @@ class RequestHandler:
             with open(file_path, 'rb') as f:
                 files = {'file': (file_name, f)}
                 
-                # 临时移除Content-Type，让requests自动设置
-                original_content_type = self.session.headers.pop('Content-Type', None)
-                
-                response = self.session.post(full_url, files=files, timeout=self.timeout, **kwargs)
-                
-                # 恢复原Content-Type
-                if original_content_type:
-                    self.session.headers['Content-Type'] = original_content_type
+                # 仅在本次请求中移除Content-Type，让requests自动设置multipart边界
+                headers = {**kwargs.pop('headers', {}), 'Content-Type': None}
+                response = self._send('POST', full_url, files=files, headers=headers, **kwargs)
                 
-                response.raise_for_status()
-                result = response.json()
-                log.info(f"文件上传成功: {full_url}, 响应: {result}")
+                result = self._decode(response)
+                log_policy.log_response(f"文件上传成功: {full_url}", resolve_template(url), result, duration=response.timing.total)
                 return result
         except FileNotFoundError:
             log.error(f"文件不存在: {file_path}")
@@ -176,5 +487,5 @@ class RequestHandler:
             raise
 
 
-# 导出RequestHandler实例供其他模块使用
-request_handler = RequestHandler()
+# 导出RequestHandler实例供其他模块使用，第一次使用时才创建会话和连接池
+request_handler = LazySingleton(RequestHandler)
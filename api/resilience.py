@@ -0,0 +1,204 @@
+import time
+import random
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+import requests
+from config.config import config
+from utils.logger import log
+
+# 可以安全重试的幂等请求方法
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """熔断器处于打开状态，请求未发送直接失败"""
+
+
+class CircuitBreaker:
+    """熔断器：连续连接失败达到阈值后打开，经过恢复时间后放行一次试探请求（半开），成功则关闭"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_transition: Optional[Callable[[str, str, str], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.on_transition = on_transition
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def _transition(self, state: str):
+        old, self.state = self.state, state
+        if self.on_transition is not None:
+            self.on_transition(self.name, old, state)
+
+    def allow(self) -> bool:
+        """
+        判断是否允许发送请求
+        :return: 关闭状态或放行试探请求时返回True
+        """
+        if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            # 半开状态只放行一个试探请求，其余请求在试探结束前继续快速失败
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+        return self.state == self.CLOSED
+
+    def cancel_trial(self):
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_in_flight = False
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = self.clock()
+            self._transition(self.OPEN)
+
+
+class CircuitBreakerRegistry:
+    """按主机和按端点分别维护熔断器，任一熔断器打开时请求快速失败"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float,
+                 clock: Callable[[], float] = time.monotonic, max_transitions: int = 200):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.transitions = deque(maxlen=max_transitions)
+        self.short_circuited = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "CircuitBreakerRegistry":
+        return cls(config['CIRCUIT_BREAKER_THRESHOLD'], config['CIRCUIT_BREAKER_RESET_TIMEOUT'])
+
+    def _log_transition(self, name: str, old: str, new: str):
+        self.transitions.append({"breaker": name, "from": old, "to": new, "time": time.time()})
+        if new == CircuitBreaker.OPEN:
+            log.warning(f"熔断器打开: {name}，{self.reset_timeout}s内的请求将直接失败")
+        else:
+            log.info(f"熔断器状态变化: {name} {old} -> {new}")
+
+    def _get(self, name: str) -> CircuitBreaker:
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, self.failure_threshold, self.reset_timeout,
+                                     self.clock, self._log_transition)
+            self.breakers[name] = breaker
+        return breaker
+
+    def before_request(self, host: str, endpoint: str):
+        """
+        发送请求前检查熔断器
+        :param host: 主机，如 https://example.com:443
+        :param endpoint: 端点，如 GET /users/{user_id}
+        :raises CircuitOpenError: 主机或端点的熔断器打开
+        """
+        with self._lock:
+            allowed = []
+            for name in (host, f"{host} {endpoint}"):
+                breaker = self._get(name)
+                if not breaker.allow():
+                    # 已放行的试探请求不会发送，释放给下一个请求
+                    for granted in allowed:
+                        granted.cancel_trial()
+                    self.short_circuited += 1
+                    raise CircuitOpenError(f"熔断器打开，请求未发送: {name}")
+                allowed.append(breaker)
+
+    def record_success(self, host: str, endpoint: str):
+        with self._lock:
+            for name in (host, f"{host} {endpoint}"):
+                self._get(name).record_success()
+
+    def record_failure(self, host: str, endpoint: str):
+        with self._lock:
+            for name in (host, f"{host} {endpoint}"):
+                self._get(name).record_failure()
+
+    def cancel_trial(self, host: str, endpoint: str):
+        """
+        请求因与主机可用性无关的异常（如URL无效、回放缺失）结束时调用，不计入失败，只释放已放行的试探请求
+        :param host: 主机
+        :param endpoint: 端点
+        """
+        with self._lock:
+            for name in (host, f"{host} {endpoint}"):
+                self._get(name).cancel_trial()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器统计，用于运行汇总
+        :return: 未关闭的熔断器状态、快速失败次数和状态变化记录
+        """
+        with self._lock:
+            return {
+                "open": {name: b.state for name, b in self.breakers.items() if b.state != CircuitBreaker.CLOSED},
+                "short_circuited": self.short_circuited,
+                "transitions": list(self.transitions),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.breakers.clear()
+            self.transitions.clear()
+            self.short_circuited = 0
+
+
+class RetryPolicy:
+    """幂等请求的有限次重试，退避时间指数增长并加入随机抖动"""
+
+    def __init__(self, max_retries: int, backoff: float, max_backoff: float,
+                 statuses: List[int] = (), methods=IDEMPOTENT_METHODS, rnd: random.Random = None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+        self.rnd = rnd or random.Random()
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        return cls(config['HTTP_RETRY_MAX'], config['HTTP_RETRY_BACKOFF'],
+                   config['HTTP_RETRY_MAX_BACKOFF'], config['HTTP_RETRY_STATUSES'])
+
+    def should_retry(self, method: str, attempt: int, exc: Exception = None, status: int = None) -> bool:
+        """
+        判断是否重试
+        :param method: 请求方法
+        :param attempt: 已重试的次数
+        :param exc: 请求异常，只重试连接错误和超时
+        :param status: 响应状态码
+        :return: 是否重试
+        """
+        if attempt >= self.max_retries or method.upper() not in self.methods:
+            return False
+        if exc is not None:
+            return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) \
+                and not isinstance(exc, CircuitOpenError)
+        return status in self.statuses
+
+    def delay(self, attempt: int) -> float:
+        """
+        计算第attempt次重试前的等待时间（全抖动：在0到指数退避上限之间随机取值）
+        :param attempt: 已重试的次数
+        :return: 等待时间，单位：秒
+        """
+        return self.rnd.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
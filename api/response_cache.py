@@ -0,0 +1,291 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, List
+from urllib.parse import urlsplit
+from config.config import config
+
+
+class CacheEntry:
+    """缓存条目：保存解析后的响应体和用于条件请求的校验信息"""
+
+    def __init__(self, key: str, result: Any, etag: Optional[str] = None,
+                 last_modified: Optional[str] = None, expires_at: float = 0.0):
+        self.key = key
+        self.result = result
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """
+        获取条件请求头
+        :return: If-None-Match / If-Modified-Since 请求头
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CacheEntry":
+        return cls(**data)
+
+
+class MemoryCacheStore:
+    """内存缓存存储，超过容量时淘汰最久未使用的条目"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, entry: CacheEntry):
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskCacheStore(MemoryCacheStore):
+    """磁盘缓存存储，每个条目一个JSON文件，可在多次运行之间复用，按文件访问时间淘汰"""
+
+    def __init__(self, max_entries: int, cache_dir: str):
+        super().__init__(max_entries)
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        # 只在内存中保存键的访问顺序，条目内容按需从磁盘读取
+        files = sorted(
+            (name for name in os.listdir(cache_dir) if name.endswith('.json')),
+            key=lambda name: os.path.getmtime(os.path.join(cache_dir, name)),
+        )
+        # 值为缓存键，上次运行留下的条目在需要时（keys()）才从文件中读取
+        for name in files:
+            self._entries[name[:-5]] = None
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{self._digest(key)}.json")
+
+    @staticmethod
+    def _digest(key: str) -> str:
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            digest, _ = self._entries.popitem(last=False)
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{digest}.json"))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        digest = self._digest(key)
+        if digest not in self._entries:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = CacheEntry.from_dict(json.load(f))
+        except (OSError, ValueError):
+            self._entries.pop(digest, None)
+            return None
+        self._entries[digest] = key
+        self._entries.move_to_end(digest)
+        os.utime(self._path(key))
+        return entry
+
+    def set(self, entry: CacheEntry):
+        digest = self._digest(entry.key)
+        tmp_path = f"{self._path(entry.key)}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(entry.key))
+        self._entries[digest] = entry.key
+        self._entries.move_to_end(digest)
+        self._evict()
+
+    def delete(self, key: str):
+        self._entries.pop(self._digest(key), None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self) -> List[str]:
+        for digest, key in list(self._entries.items()):
+            if key is not None:
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, f"{digest}.json"), 'r', encoding='utf-8') as f:
+                    self._entries[digest] = json.load(f)['key']
+            except (OSError, ValueError, KeyError):
+                self._entries.pop(digest, None)
+        return [key for key in self._entries.values() if key is not None]
+
+    def clear(self):
+        for digest in list(self._entries):
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{digest}.json"))
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+
+
+class ResponseCache:
+    """GET响应缓存，支持TTL过期、LRU淘汰和ETag/Last-Modified条件重验证"""
+
+    def __init__(self, store: MemoryCacheStore, ttl: float, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "stores": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "ResponseCache":
+        """
+        根据配置创建缓存
+        :return: 响应缓存实例
+        """
+        if config['HTTP_CACHE_BACKEND'] == 'disk':
+            store = DiskCacheStore(config['HTTP_CACHE_MAX_ENTRIES'], config['HTTP_CACHE_DIR'])
+        else:
+            store = MemoryCacheStore(config['HTTP_CACHE_MAX_ENTRIES'])
+        return cls(store, config['HTTP_CACHE_TTL'])
+
+    @staticmethod
+    def make_key(full_url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        生成缓存键
+        :param full_url: 完整请求URL
+        :param params: 查询参数
+        :return: 缓存键
+        """
+        if not params:
+            return full_url
+        return f"{full_url}?{json.dumps(params, sort_keys=True, default=str)}"
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """
+        查找缓存条目，新鲜的条目计为命中，过期或不存在计为未命中
+        :param key: 缓存键
+        :return: 缓存条目（可能已过期，可用于条件请求），不存在时返回None
+        """
+        with self._lock:
+            entry = self.store.get(key)
+            if entry is not None and entry.is_fresh(self.clock()):
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+            return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.is_fresh(self.clock())
+
+    def _ttl_from_headers(self, headers: Dict[str, str]) -> Optional[float]:
+        # 响应的Cache-Control优先于配置的TTL，no-store的响应不缓存
+        directives = [d.strip().lower() for d in headers.get('Cache-Control', '').split(',') if d.strip()]
+        if 'no-store' in directives:
+            return None
+        for directive in directives:
+            if directive.startswith('max-age='):
+                try:
+                    return min(float(directive[8:]), self.ttl)
+                except ValueError:
+                    break
+        return self.ttl
+
+    def store_response(self, key: str, result: Any, headers: Dict[str, str]):
+        """
+        保存200响应
+        :param key: 缓存键
+        :param result: 解析后的响应体，保存副本，调用方之后修改不影响缓存
+        :param headers: 响应头
+        """
+        ttl = self._ttl_from_headers(headers)
+        if ttl is None:
+            return
+        entry = CacheEntry(key, copy.deepcopy(result), headers.get('ETag'), headers.get('Last-Modified'), self.clock() + ttl)
+        with self._lock:
+            self.store.set(entry)
+            self.stats["stores"] += 1
+
+    def revalidated(self, entry: CacheEntry, headers: Dict[str, str]) -> Any:
+        """
+        服务端返回304时刷新条目的过期时间；304响应要求不缓存（no-store）时删除条目
+        :param entry: 缓存条目
+        :param headers: 304响应头
+        :return: 缓存的响应体
+        """
+        ttl = self._ttl_from_headers(headers)
+        with self._lock:
+            self.stats["revalidations"] += 1
+            if ttl is None:
+                self.store.delete(entry.key)
+                return entry.result
+            # max-age=0时条目立即过期，下次请求仍需重验证
+            entry.expires_at = self.clock() + ttl
+            entry.etag = headers.get('ETag', entry.etag)
+            self.store.set(entry)
+        return entry.result
+
+    def invalidate(self, full_url: str) -> int:
+        """
+        删除URL的缓存条目，对该URL发送写请求后调用
+        失效范围见invalidated_urls()：该URL和上一级集合URL，包括带查询参数的条目
+        :param full_url: 完整请求URL
+        :return: 删除的条目数
+        """
+        urls = invalidated_urls(full_url)
+        with self._lock:
+            keys = [key for key in self.store.keys() if key.split('?', 1)[0] in urls]
+            for key in keys:
+                self.store.delete(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.store.clear()
+
+
+def invalidated_urls(full_url: str) -> List[str]:
+    """
+    获取写请求后需要失效的URL：该URL本身和上一级集合URL（去掉最后一段路径，如/posts/1对应/posts）
+    只按路径推断，以其他路径返回同一资源的URL（如/users/1/posts中的帖子）不会失效
+    :param full_url: 写请求的完整URL，不含查询参数
+    :return: URL列表
+    """
+    url = full_url.split('?', 1)[0].rstrip('/')
+    urls = [url]
+    if '/' in urlsplit(url).path.strip('/'):
+        urls.append(url.rsplit('/', 1)[0])
+    return urls
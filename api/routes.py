@@ -0,0 +1,153 @@
+import re
+from functools import lru_cache
+from collections.abc import Iterable
+from typing import Dict, Iterator, Pattern, Tuple, Any, Union
+from api.endpoints import Endpoints
+
+_PLACEHOLDER = re.compile(r"\{([^{}]*)\}")
+
+
+def _compile_template(template: str) -> Pattern:
+    """
+    将端点模板编译为正则表达式
+    :param template: 端点模板，如 /users/{user_id}
+    :return: 匹配具体路径的正则表达式
+    """
+    pattern = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(template))
+    return re.compile(f"^{pattern}/?$")
+
+
+class Route:
+    """预编译的端点模板：导入时校验参数名并拆分为字面量片段，生成URL时只做字符串拼接"""
+
+    __slots__ = ("name", "template", "params", "pattern", "_literals")
+
+    def __init__(self, name: str, template: str):
+        """
+        :param name: Endpoints中的属性名，如 USER
+        :param template: 端点模板，如 /users/{user_id}
+        """
+        pieces = _PLACEHOLDER.split(template)
+        literals, params = tuple(pieces[::2]), tuple(pieces[1::2])
+        invalid = [p for p in params if not p.isidentifier()]
+        if invalid:
+            raise ValueError(f"端点{name}的参数名无效: {invalid}，模板: {template}")
+        if len(set(params)) != len(params):
+            raise ValueError(f"端点{name}的参数名重复: {template}")
+        if any("{" in literal or "}" in literal for literal in literals):
+            raise ValueError(f"端点{name}的模板括号不匹配: {template}")
+        self.name = name
+        self.template = template
+        self.params = params
+        self.pattern = _compile_template(template)
+        self._literals = literals
+
+    def _check(self, params: Dict[str, Any]):
+        if set(params) != set(self.params):
+            missing = [p for p in self.params if p not in params]
+            unknown = [p for p in params if p not in self.params]
+            raise TypeError(f"端点{self.name}({self.template})的参数不匹配，缺少: {missing}，未知: {unknown}")
+
+    def render(self, values: Tuple) -> str:
+        """
+        按模板参数顺序填充参数值
+        :param values: 参数值，顺序与self.params一致
+        :return: 具体路径
+        """
+        literals = self._literals
+        parts = [literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            parts.append(str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+    def url(self, **params) -> str:
+        """
+        生成单个路径，如 Route.url(user_id=1)
+        :return: 具体路径
+        """
+        self._check(params)
+        return self.render(tuple(params[p] for p in self.params))
+
+    def expand(self, **params) -> Iterator[str]:
+        """
+        按参数取值的笛卡尔积逐个生成路径，不预先生成路径列表
+        参数值可以是单个值或可迭代对象（如range）；第一个参数可以是只能迭代一次的生成器，
+        其余参数会被重复迭代，生成器会先转换为元组
+        参数名在调用时立即校验，而不是在第一次迭代时
+        :return: 路径生成器
+        """
+        self._check(params)
+        pools = []
+        for i, name in enumerate(self.params):
+            value = params[name]
+            if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+                value = (value,)
+            elif i > 0 and iter(value) is value:
+                value = tuple(value)
+            pools.append(value)
+        if len(pools) == 1:
+            prefix, suffix = self._literals
+            return (f"{prefix}{value}{suffix}" for value in pools[0])
+        return (self.render(values) for values in _product(pools))
+
+    def __repr__(self):
+        return f"Route({self.name}, {self.template!r})"
+
+
+def _product(pools, prefix: Tuple = ()) -> Iterator[Tuple]:
+    """与itertools.product相同的顺序，但不预先把每个参数的取值转换为元组"""
+    if not pools:
+        yield prefix
+        return
+    for value in pools[0]:
+        yield from _product(pools[1:], prefix + (value,))
+
+
+# 端点模板到Route的映射，在导入时从Endpoints的类属性构建并校验
+ROUTE_TABLE: Dict[str, Route] = {
+    value: Route(name, value)
+    for name, value in vars(Endpoints).items()
+    if name.isupper() and isinstance(value, str) and value.startswith("/")
+}
+
+# 端点模板到正则表达式的映射
+ROUTES: Dict[str, Pattern] = {template: route.pattern for template, route in ROUTE_TABLE.items()}
+
+
+def get_route(template: Union[str, Route]) -> Route:
+    """
+    获取端点模板对应的Route
+    :param template: 端点模板（如 Endpoints.USER）或Route
+    :return: Route
+    """
+    if isinstance(template, Route):
+        return template
+    try:
+        return ROUTE_TABLE[template]
+    except KeyError:
+        raise ValueError(f"未注册的端点模板: {template}") from None
+
+
+def expand(template: Union[str, Route], **params) -> Iterator[str]:
+    """
+    批量生成路径，如 expand(Endpoints.USER, user_id=range(1, 100000))
+    :param template: 端点模板或Route
+    :param params: 参数取值，详见Route.expand
+    :return: 路径生成器
+    """
+    return get_route(template).expand(**params)
+
+
+@lru_cache(maxsize=4096)
+def resolve_template(path: str) -> str:
+    """
+    根据具体路径查找对应的端点模板
+    :param path: 请求路径（相对路径，可带查询参数），如 /users/3
+    :return: 端点模板，如 /users/{user_id}；未匹配时返回去掉查询参数的原路径
+    """
+    path = path.split("?", 1)[0]
+    for template, pattern in ROUTES.items():
+        if pattern.match(path):
+            return template
+    return path
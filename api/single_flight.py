@@ -0,0 +1,85 @@
+import threading
+from typing import Dict, Any, Callable, Tuple
+
+
+class _Call:
+    """一次进行中的请求，等待者共享其结果或异常"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """请求合并：相同键的并发调用只执行一次，其余调用等待并共享结果，调用完成后不保留结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {"executed": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行调用，相同键已有进行中的调用时等待其结果
+        :param key: 合并键
+        :param fn: 实际执行的调用
+        :return: (结果, 结果是否与其他调用方共享)，共享的结果调用方需要复制后再修改，包括执行调用的一方
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["executed"] += 1
+            else:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # 调用期间键可能已被forget移除，或已有新的调用
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                waiters = call.waiters
+            call.event.set()
+        # 键移除后不会再有新的等待者，等待者数量已确定
+        return call.result, waiters > 0
+
+    def forget(self, url: str) -> int:
+        """
+        移除该URL进行中的调用，之后相同键的调用重新执行，不再等待写请求之前发出的调用
+        :param url: 完整请求URL，键以URL开头（后接查询参数或请求头）
+        :return: 移除的调用数
+        """
+        with self._lock:
+            keys = [key for key in self._calls
+                    if key == url or key.startswith(f"{url} ") or key.startswith(f"{url}?")]
+            for key in keys:
+                del self._calls[key]
+        return len(keys)
+
+    @property
+    def saved(self) -> int:
+        """节省的调用次数"""
+        return self.stats["coalesced"]
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "saved": self.saved}
+
+    def clear(self):
+        with self._lock:
+            self._calls.clear()
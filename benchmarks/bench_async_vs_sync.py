@@ -0,0 +1,61 @@
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.request_handler import RequestHandler
+from api.async_request_handler import gather_get
+from api.endpoints import endpoints
+from utils.mock_server import MockServer
+
+
+def bench_sync(base_url: str, urls: list) -> float:
+    """
+    使用同步RequestHandler逐个发送请求
+    :return: 耗时（秒）
+    """
+    handler = RequestHandler()
+    handler.base_url = base_url
+    start = time.perf_counter()
+    for url in urls:
+        handler.get(url)
+    elapsed = time.perf_counter() - start
+    handler.close()
+    return elapsed
+
+
+def bench_async(base_url: str, urls: list, concurrency: int) -> float:
+    """
+    使用AsyncRequestHandler并发发送请求
+    :return: 耗时（秒）
+    """
+    start = time.perf_counter()
+    gather_get(urls, base_url=base_url, concurrency=concurrency)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比同步与异步请求封装的耗时")
+    parser.add_argument("--requests", type=int, default=200, help="请求总数")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟服务器每个请求的延迟（秒）")
+    parser.add_argument("--concurrency", type=int, default=50, help="异步请求最大并发数")
+    args = parser.parse_args()
+
+    urls = [endpoints.get_user_endpoint(i % 10 + 1) if i % 2 else endpoints.get_post_endpoint(i % 100 + 1)
+            for i in range(args.requests)]
+
+    with MockServer(latency=args.latency) as server:
+        sync_elapsed = bench_sync(server.base_url, urls)
+        async_elapsed = bench_async(server.base_url, urls, args.concurrency)
+
+    print(f"请求数: {args.requests}, 模拟延迟: {args.latency}s, 并发数: {args.concurrency}")
+    print(f"同步RequestHandler: {sync_elapsed:.3f}s ({args.requests / sync_elapsed:.1f} req/s)")
+    print(f"异步AsyncRequestHandler: {async_elapsed:.3f}s ({args.requests / async_elapsed:.1f} req/s)")
+    print(f"加速比: {sync_elapsed / async_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.cassette import cassette_path
+
+
+def run_suite(target: str, mode: str, name: str) -> tuple:
+    """
+    在子进程中运行测试
+    :param target: pytest测试目标
+    :param mode: 录制模式
+    :param name: 录制名称
+    :return: (耗时（秒）, pytest结果摘要行)
+    """
+    env = dict(os.environ, CASSETTE_MODE=mode, CASSETTE_NAME=name)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", target, "-q", "-p", "no:cacheprovider", "-o", "addopts="],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    lines = [line for line in result.stdout.splitlines() if " in " in line and ("passed" in line or "failed" in line)]
+    return elapsed, lines[-1].strip("= ") if lines else f"退出码: {result.returncode}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比测试在直接访问网络和回放录制文件时的耗时")
+    parser.add_argument("--target", default="tests/test_sample_api.py", help="pytest测试目标")
+    parser.add_argument("--runs", type=int, default=3, help="每种模式的运行次数，取最小值")
+    parser.add_argument("--keep", action="store_true", help="保留基准测试生成的录制文件")
+    args = parser.parse_args()
+
+    name = "bench"
+    record_elapsed, record_summary = run_suite(args.target, "record", name)
+    print(f"录制: {record_elapsed:.2f}s ({record_summary})")
+
+    results = {}
+    for mode in ("off", "replay"):
+        runs = [run_suite(args.target, mode, name) for _ in range(args.runs)]
+        results[mode] = min(runs, key=lambda r: r[0])
+        print(f"{'直接访问网络' if mode == 'off' else '回放'}: {results[mode][0]:.2f}s ({results[mode][1]})")
+
+    print(f"回放加速比: {results['off'][0] / results['replay'][0]:.1f}x")
+    if not args.keep:
+        os.remove(cassette_path(name))
+
+
+if __name__ == "__main__":
+    main()
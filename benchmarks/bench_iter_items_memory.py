@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import multiprocessing
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.request_handler import RequestHandler
+from api.endpoints import endpoints
+from utils.mock_server import MockServer, MockDataset
+
+
+def serve(queue, posts_per_user: int):
+    """
+    在独立进程中运行模拟服务器，避免服务端内存计入统计
+    """
+    server = MockServer(dataset=MockDataset(users=10, posts_per_user=posts_per_user)).start()
+    queue.put(server.base_url)
+    while True:
+        time.sleep(1)
+
+
+def measure(func) -> tuple:
+    """
+    测量函数执行的峰值内存和耗时
+    :return: (峰值内存MB, 耗时秒, 元素数)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比get与iter_items遍历大列表的峰值内存")
+    parser.add_argument("--items", type=int, default=50000, help="列表元素总数")
+    args = parser.parse_args()
+
+    queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(queue, max(args.items // 10, 1)), daemon=True)
+    server.start()
+    handler = RequestHandler()
+    handler.base_url = queue.get(timeout=10)
+
+    def full_load():
+        return sum(1 for post in handler.get(endpoints.POSTS) if post["userId"])
+
+    def streaming():
+        return sum(1 for post in handler.iter_items(endpoints.POSTS) if post["userId"])
+
+    # 预热连接，避免建立连接的开销计入统计
+    handler.get(endpoints.get_post_endpoint(1))
+    results = {"get": measure(full_load), "iter_items": measure(streaming)}
+    handler.close()
+    server.terminate()
+
+    for name, (peak, elapsed, count) in results.items():
+        print(f"{name:<10} 元素数: {count}, 峰值内存: {peak:.2f}MB, 耗时: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
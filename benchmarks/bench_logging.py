@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from api.request_handler import RequestHandler
+from api.endpoints import endpoints
+from utils.logger import Logger
+from utils.mock_server import MockServer
+
+
+def measure_calls(count: int) -> tuple:
+    """
+    测量记录日志的线程上每次调用的耗时
+    CPython中后台线程与调用线程竞争GIL，循环调用时的总耗时不能体现队列模式的收益，
+    因此同时统计调用线程自身的CPU时间：请求等待网络时GIL空闲，后台线程的渲染和写入不会增加请求耗时
+    :return: (每次调用的平均耗时, 调用线程的平均CPU时间)，单位：微秒
+    """
+    start, cpu_start = time.perf_counter(), time.thread_time()
+    for i in range(count):
+        logger.info(f"发送GET请求: http://127.0.0.1/users/{i}, params: None")
+    return (time.perf_counter() - start) / count * 1e6, (time.thread_time() - cpu_start) / count * 1e6
+
+
+def measure_requests(base_url: str, count: int) -> float:
+    """
+    测量经过RequestHandler（包含请求和响应日志）的GET请求耗时
+    :return: 每次请求的平均耗时，单位：毫秒
+    """
+    handler = RequestHandler()
+    handler.base_url = base_url
+    try:
+        start = time.perf_counter()
+        for i in range(count):
+            handler.get(endpoints.get_user_endpoint(i % 10 + 1), coalesce=False)
+        return (time.perf_counter() - start) / count * 1000
+    finally:
+        handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比同步日志和队列批量日志在调用线程上的开销")
+    parser.add_argument("--calls", type=int, default=20000, help="每种模式记录的日志条数")
+    parser.add_argument("--requests", type=int, default=500, help="每种模式发送的请求数")
+    parser.add_argument("--stdout", help="控制台日志写入的文件（如/dev/tty），默认丢弃")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    results = {}
+    try:
+        with MockServer() as server, open(args.stdout or os.devnull, "w") as console, contextlib.redirect_stdout(console):
+            for name, queued, json_logs in (("同步", False, False), ("队列", True, False),
+                                            ("队列+JSON Lines", True, True)):
+                instance = Logger(log_dir=os.path.join(tmp_dir, name), queued=queued, json_logs=json_logs)
+                per_call = measure_calls(args.calls)
+                start = time.perf_counter()
+                instance.flush()
+                drain = time.perf_counter() - start
+                per_request = measure_requests(server.base_url, args.requests)
+                instance.close()
+                results[name] = (per_call, drain, per_request)
+    finally:
+        logger.remove()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    for name, ((per_call, per_call_cpu), drain, per_request) in results.items():
+        print(f"{name}: 每条日志 {per_call:.1f}us（调用线程CPU {per_call_cpu:.1f}us），"
+              f"等待队列写完 {drain * 1000:.0f}ms，每个GET请求 {per_request:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from utils.html_report import HtmlReport
+
+
+def write_results(results_dir: str, count: int, features: int):
+    """生成模拟的Allure结果目录：每个用例一个结果文件和一个附件"""
+    os.makedirs(results_dir, exist_ok=True)
+    for i in range(count):
+        name = str(uuid.uuid4())
+        status = "failed" if i % 50 == 0 else "passed"
+        result = {
+            "uuid": name, "name": f"test_case_{i}", "fullName": f"tests.test_bench.TestBench#test_case_{i}",
+            "status": status, "start": 1700000000000 + i * 100, "stop": 1700000000000 + i * 100 + i % 997,
+            "labels": [{"name": "feature", "value": f"功能{i % features}"}, {"name": "story", "value": f"场景{i % 7}"}],
+            "statusDetails": {"message": "AssertionError: 状态码不匹配", "trace": "Traceback ...\n" * 20}
+            if status == "failed" else {},
+            "attachments": [{"name": "stdout", "source": f"{name}-attachment.txt", "type": "text/plain"}],
+        }
+        with open(os.path.join(results_dir, f"{name}-result.json"), "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        with open(os.path.join(results_dir, f"{name}-attachment.txt"), "w", encoding="utf-8") as f:
+            f.write(f"=== 开始测试用例: test_case_{i} ===\n" * 20)
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比Allure命令行和内置增量HTML报告的生成耗时")
+    parser.add_argument("--tests", type=int, default=2000, help="模拟的用例数")
+    parser.add_argument("--features", type=int, default=20, help="模拟的功能数")
+    args = parser.parse_args()
+
+    # 不输出生成报告的日志
+    log.remove()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        results_dir = os.path.join(tmp_dir, "allure")
+        write_results(results_dir, args.tests, args.features)
+
+        allure = shutil.which("allure")
+        if allure:
+            elapsed = timed(lambda: subprocess.run(
+                [allure, "generate", results_dir, "-o", os.path.join(tmp_dir, "allure-report"), "--clean"],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+            print(f"allure generate --clean: {elapsed * 1000:.0f}ms")
+        else:
+            print("allure generate --clean: 未安装Allure命令行，跳过")
+
+        output_dir = os.path.join(tmp_dir, "html-report")
+        print(f"HTML报告首次生成: {timed(HtmlReport(results_dir, output_dir).generate) * 1000:.0f}ms")
+        print(f"HTML报告结果未变化: {timed(HtmlReport(results_dir, output_dir).generate) * 1000:.0f}ms")
+
+        # 修改一个用例的结果，只有它所在的功能页面和汇总页面需要重新渲染
+        name = next(n for n in sorted(os.listdir(results_dir)) if n.endswith("-result.json"))
+        path = os.path.join(results_dir, name)
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        result["status"] = "broken"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        report = HtmlReport(results_dir, output_dir)
+        elapsed = timed(report.generate)
+        print(f"HTML报告一个用例变化: {elapsed * 1000:.0f}ms，重新渲染{len(report.rendered)}个页面")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+from data.data_source import DataFile, SyntheticData, make_params
+from utils.parallel_runner import collect_node_ids
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(runs: int, func) -> float:
+    """
+    多次执行取最短耗时
+    :return: 耗时，单位：秒
+    """
+    elapsed = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed)
+
+
+def python(code: str):
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比延迟创建单例、收集缓存和数据索引缓存前后的启动耗时")
+    parser.add_argument("--runs", type=int, default=3, help="每项的运行次数，取最小值")
+    parser.add_argument("--rows", type=int, default=100000, help="测试数据文件的行数")
+    args = parser.parse_args()
+
+    # 导入conftest：延迟创建 vs 导入时立即创建请求会话和日志输出（原来的行为）
+    lazy = best_of(args.runs, lambda: python("import conftest"))
+    eager = best_of(args.runs, lambda: python(
+        "import conftest; from api.request_handler import request_handler; from utils.logger import log; "
+        "request_handler.pool_stats(); log.bind()"))
+    print(f"导入conftest: 立即创建 {eager * 1000:.0f}ms -> 延迟创建 {lazy * 1000:.0f}ms")
+
+    # 并行运行前的用例收集：启动pytest --collect-only vs 命中收集缓存
+    cold = best_of(args.runs, lambda: collect_node_ids(use_cache=False))
+    collect_node_ids()
+    warm = best_of(args.runs, collect_node_ids)
+    print(f"收集用例: pytest --collect-only {cold * 1000:.0f}ms -> 收集缓存 {warm * 1000:.1f}ms")
+
+    # 大数据文件参数化：扫描文件 vs 加载缓存的偏移索引
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = SyntheticData("new_user", args.rows).write_jsonl(os.path.join(tmp_dir, "users.jsonl"))
+        cache_dir = os.path.join(tmp_dir, "index")
+        scan = best_of(args.runs, lambda: make_params(DataFile(path)))
+        make_params(DataFile(path, cache_dir=cache_dir))
+        cached = best_of(args.runs, lambda: make_params(DataFile(path, cache_dir=cache_dir)))
+        print(f"参数化{args.rows}行数据: 扫描文件 {scan * 1000:.0f}ms -> 索引缓存 {cached * 1000:.0f}ms")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"收集缓存文件: {config['COLLECTION_CACHE_FILE']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,14 +11,107 @@ class Config:
     # 日志配置
     LOG_DIR = os.path.join(BASE_DIR, 'logs')
     LOG_LEVEL = 'INFO'
+    LOG_BODY_MAX_CHARS = 2000  # 响应体日志的最大字符数，0表示不截断
+    LOG_LIST_SAMPLE = 3  # 列表响应在日志中保留的抽样元素数
+    LOG_LIST_THRESHOLD = 20  # 列表长度超过该值时只记录抽样元素
+    LOG_QUEUE_ENABLED = os.getenv('LOG_QUEUE', '0') == '1'  # 日志放入队列，由后台线程批量写入控制台和文件
+    LOG_BATCH_SIZE = 256  # 队列模式下每批最多写入的日志条数
+    LOG_FLUSH_INTERVAL = 0.2  # 队列模式下有积压时的最长刷新间隔，单位：秒
+    LOG_JSON_ENABLED = os.getenv('LOG_JSON', '0') == '1'  # 同时输出JSON Lines结构化日志（api_test_日期.jsonl）
+    LOG_COMPRESS_ROTATED = True  # 压缩前一天及更早的日志文件，按用例区间分段压缩，仍可按索引直接读取
+    LOG_ATTACH_TO_ALLURE = os.getenv('LOG_ATTACH', 'failed')  # 用例日志添加到Allure报告：failed（仅失败）、all、off
+    # 按端点模板覆盖响应体日志的详细程度：full、summary、off
+    LOG_ENDPOINT_VERBOSITY = {
+        '/photos': 'summary',
+        '/comments': 'summary',
+    }
     
     # API配置
     API_TIMEOUT = 30
+    ASYNC_CONCURRENCY = 50  # 异步请求的最大并发数
+    HTTP_POOL_CONNECTIONS = 10  # 缓存的主机连接池数量
+    HTTP_POOL_MAXSIZE = 20  # 每个主机连接池保持的最大连接数
+    HTTP_POOL_BLOCK = False  # 连接池耗尽时是否阻塞等待空闲连接
+    HTTP_CONNECT_TIMEOUT = 5  # 建立连接的超时时间，单位：秒；API_TIMEOUT用于读取响应
+    HTTP_COALESCE_ENABLED = True  # 是否将并发的相同GET请求合并为一次网络请求
+    
+    # 熔断与重试配置
+    CIRCUIT_BREAKER_ENABLED = True  # 是否启用按主机和端点的熔断器
+    CIRCUIT_BREAKER_THRESHOLD = 3  # 连续连接失败次数达到该值时熔断
+    CIRCUIT_BREAKER_RESET_TIMEOUT = 30  # 熔断后经过该时间（秒）放行一次试探请求
+    HTTP_RETRY_MAX = 2  # 幂等请求（GET、PUT、DELETE等）的最大重试次数，0表示不重试
+    HTTP_RETRY_BACKOFF = 0.5  # 首次重试的退避上限，单位：秒，之后每次翻倍
+    HTTP_RETRY_MAX_BACKOFF = 8  # 退避上限的最大值，单位：秒
+    HTTP_RETRY_STATUSES = (502, 503, 504)  # 需要重试的响应状态码
+    
+    # GET响应缓存配置
+    HTTP_CACHE_ENABLED = False  # 是否启用GET响应缓存
+    HTTP_CACHE_BACKEND = 'memory'  # 缓存存储：memory（内存）或disk（磁盘，可跨运行复用）
+    HTTP_CACHE_TTL = 300  # 缓存有效期，单位：秒
+    HTTP_CACHE_MAX_ENTRIES = 256  # 最大缓存条目数，超出后淘汰最久未使用的条目
+    HTTP_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'http')  # 磁盘缓存目录
+    
+    # 录制与回放配置
+    CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')  # off：直接访问网络；record：录制请求和响应；replay：从录制文件回放，不访问网络
+    CASSETTE_NAME = os.getenv('CASSETTE_NAME', os.getenv('TEST_ENV', 'dev'))  # 录制名称，默认与环境名称相同
+    CASSETTE_DIR = os.path.join(BASE_DIR, 'cassettes')  # 录制文件目录，每个录制名称一个文件
+    
+    # 本地模拟服务器配置
+    MOCK_SERVER_ENABLED = os.getenv('MOCK_SERVER', '0') == '1'  # 为True时测试使用本地模拟服务器，等同于--mock-server
+    MOCK_SERVER_USERS = 10  # 模拟数据集的用户数，其他资源按jsonplaceholder的比例生成
+    MOCK_SERVER_SEED = 0  # 模拟数据和错误注入的随机种子
+    MOCK_SERVER_LATENCY = 0.0  # 每个请求注入的延迟，单位：秒
+    MOCK_SERVER_ERROR_RATE = 0.0  # 返回500错误的概率
     
     # 测试报告配置
     REPORT_DIR = os.path.join(BASE_DIR, 'reports')
     ALLURE_RESULTS_DIR = os.path.join(REPORT_DIR, 'allure')  # Allure测试结果数据目录
     ALLURE_REPORT_DIR = os.path.join(REPORT_DIR, 'allure-report')  # 生成的Allure HTML报告目录
+    REPORT_ENGINE = os.getenv('REPORT_ENGINE', 'python')  # 报告生成方式：python（内置增量HTML报告）、allure（Allure命令行）
+    HTML_REPORT_DIR = os.path.join(REPORT_DIR, 'html-report')  # 内置HTML报告目录
+    REPORT_TREND_RUNS = 30  # HTML报告趋势图保留的运行数
+    REPORT_SERVER_HOST = '0.0.0.0'  # 报告服务器监听地址
+    REPORT_SERVER_PORT = int(os.getenv('REPORT_SERVER_PORT', '8080'))  # 报告服务器端口
+    REPORT_SERVER_LOCK_FILE = os.path.join(REPORT_DIR, '.report_server.lock')  # 记录报告服务器PID和端口的锁文件
+    
+    # 钉钉通知配置，机器人每分钟最多接收20条消息
+    DINGTALK_TIMEOUT = 10  # 发送请求的超时时间，单位：秒
+    DINGTALK_RATE_PER_MINUTE = 18  # 每分钟补充的发送次数，与突发次数之和不超过20
+    DINGTALK_BURST = 2  # 允许的突发发送次数
+    DINGTALK_BATCH_MAX = 10  # 积压时每条消息最多合并的通知数
+    DINGTALK_MAX_RETRIES = 3  # 被限流、超时或服务端错误时的最大重试次数
+    DINGTALK_QUEUE_SIZE = 100  # 队列中最多积压的通知数，超过时丢弃最早的通知
+    
+    # 并行运行配置
+    TEST_WORKERS = int(os.getenv('TEST_WORKERS', '1'))  # 工作进程数，大于1时并行运行
+    TEST_DURATIONS_FILE = os.path.join(REPORT_DIR, 'durations.json')  # 历史耗时文件，用于均衡负载
+    REQUEST_METRICS_FILE = os.path.join(REPORT_DIR, 'request_metrics.json')  # 按端点汇总的请求耗时
+    RUN_SUMMARY_FILE = os.path.join(REPORT_DIR, 'run_summary.json')  # 运行汇总文件，由conftest在运行结束时写入
+    ALLURE_INDEX_FILE = os.path.join(REPORT_DIR, 'allure_index.json')  # Allure结果目录的增量索引
+    ALLURE_ARCHIVE_ENABLED = os.getenv('ALLURE_ARCHIVE', '1') == '1'  # 定时任务每轮结束后归档Allure结果目录
+    ALLURE_ARCHIVE_DIR = os.path.join(REPORT_DIR, 'allure-archive')  # 按运行打包、附件按内容去重的结果归档
+    ALLURE_ARCHIVE_KEEP_RUNS = 50  # 保留的归档运行数，0表示不清理
+    
+    # 收集缓存配置
+    CACHE_DIR = os.path.join(BASE_DIR, '.cache')
+    COLLECTION_CACHE_FILE = os.path.join(CACHE_DIR, 'collection.json')  # 按测试文件和数据文件摘要缓存的收集结果
+    DATA_INDEX_CACHE_DIR = os.path.join(CACHE_DIR, 'data_index')  # 测试数据文件的偏移索引缓存
+    
+    # 用例执行顺序配置
+    TEST_HISTORY_FILE = os.path.join(REPORT_DIR, 'test_history.json')  # 按节点ID记录的最近结果和耗时
+    TEST_HISTORY_FAILED_RUNS = 3  # 失败后在多少次运行内优先执行
+    TEST_HISTORY_RETENTION_RUNS = 20  # 超过多少次运行没有执行的用例从历史中删除
+    FAIL_FAST_AFTER = int(os.getenv('FAIL_FAST_AFTER', '0'))  # 连续多少个用例因环境故障失败时停止运行，0表示不启用
+    
+    # 运行历史数据库配置
+    RUN_HISTORY_ENABLED = os.getenv('RUN_HISTORY', '1') == '1'  # 运行结束时记录用例结果、耗时和请求耗时
+    RUN_HISTORY_DB = os.path.join(REPORT_DIR, 'run_history.db')  # 运行历史SQLite数据库
+    RUN_HISTORY_KEEP_RUNS = 500  # 保留的运行数，0表示不限制
+    RUN_HISTORY_MAX_AGE_DAYS = 90  # 保留的天数，0表示不限制
+    
+    # 压测配置
+    LOAD_TEST_DIR = os.path.join(REPORT_DIR, 'load')  # 压测报告目录
+    LOAD_TEST_SCENARIO = ['get_users', 'get_user', 'create_post']  # 默认压测场景
     
     @staticmethod
     def get_config(env: str = 'dev') -> Dict[str, Any]:
@@ -43,10 +136,79 @@ class Config:
             'BASE_DIR': Config.BASE_DIR,
             'LOG_DIR': Config.LOG_DIR,
             'LOG_LEVEL': Config.LOG_LEVEL,
+            'LOG_BODY_MAX_CHARS': Config.LOG_BODY_MAX_CHARS,
+            'LOG_LIST_SAMPLE': Config.LOG_LIST_SAMPLE,
+            'LOG_LIST_THRESHOLD': Config.LOG_LIST_THRESHOLD,
+            'LOG_QUEUE_ENABLED': Config.LOG_QUEUE_ENABLED,
+            'LOG_BATCH_SIZE': Config.LOG_BATCH_SIZE,
+            'LOG_FLUSH_INTERVAL': Config.LOG_FLUSH_INTERVAL,
+            'LOG_JSON_ENABLED': Config.LOG_JSON_ENABLED,
+            'LOG_COMPRESS_ROTATED': Config.LOG_COMPRESS_ROTATED,
+            'LOG_ATTACH_TO_ALLURE': Config.LOG_ATTACH_TO_ALLURE,
+            'LOG_ENDPOINT_VERBOSITY': Config.LOG_ENDPOINT_VERBOSITY,
             'API_TIMEOUT': Config.API_TIMEOUT,
+            'ASYNC_CONCURRENCY': Config.ASYNC_CONCURRENCY,
+            'HTTP_POOL_CONNECTIONS': Config.HTTP_POOL_CONNECTIONS,
+            'HTTP_POOL_MAXSIZE': Config.HTTP_POOL_MAXSIZE,
+            'HTTP_POOL_BLOCK': Config.HTTP_POOL_BLOCK,
+            'HTTP_CONNECT_TIMEOUT': Config.HTTP_CONNECT_TIMEOUT,
+            'HTTP_COALESCE_ENABLED': Config.HTTP_COALESCE_ENABLED,
+            'CIRCUIT_BREAKER_ENABLED': Config.CIRCUIT_BREAKER_ENABLED,
+            'CIRCUIT_BREAKER_THRESHOLD': Config.CIRCUIT_BREAKER_THRESHOLD,
+            'CIRCUIT_BREAKER_RESET_TIMEOUT': Config.CIRCUIT_BREAKER_RESET_TIMEOUT,
+            'HTTP_RETRY_MAX': Config.HTTP_RETRY_MAX,
+            'HTTP_RETRY_BACKOFF': Config.HTTP_RETRY_BACKOFF,
+            'HTTP_RETRY_MAX_BACKOFF': Config.HTTP_RETRY_MAX_BACKOFF,
+            'HTTP_RETRY_STATUSES': Config.HTTP_RETRY_STATUSES,
+            'HTTP_CACHE_ENABLED': Config.HTTP_CACHE_ENABLED,
+            'HTTP_CACHE_BACKEND': Config.HTTP_CACHE_BACKEND,
+            'HTTP_CACHE_TTL': Config.HTTP_CACHE_TTL,
+            'HTTP_CACHE_MAX_ENTRIES': Config.HTTP_CACHE_MAX_ENTRIES,
+            'HTTP_CACHE_DIR': Config.HTTP_CACHE_DIR,
+            'CASSETTE_MODE': Config.CASSETTE_MODE,
+            'CASSETTE_NAME': Config.CASSETTE_NAME,
+            'CASSETTE_DIR': Config.CASSETTE_DIR,
+            'MOCK_SERVER_ENABLED': Config.MOCK_SERVER_ENABLED,
+            'MOCK_SERVER_USERS': Config.MOCK_SERVER_USERS,
+            'MOCK_SERVER_SEED': Config.MOCK_SERVER_SEED,
+            'MOCK_SERVER_LATENCY': Config.MOCK_SERVER_LATENCY,
+            'MOCK_SERVER_ERROR_RATE': Config.MOCK_SERVER_ERROR_RATE,
             'REPORT_DIR': Config.REPORT_DIR,
             'ALLURE_RESULTS_DIR': Config.ALLURE_RESULTS_DIR,
             'ALLURE_REPORT_DIR': Config.ALLURE_REPORT_DIR,
+            'REPORT_ENGINE': Config.REPORT_ENGINE,
+            'HTML_REPORT_DIR': Config.HTML_REPORT_DIR,
+            'REPORT_TREND_RUNS': Config.REPORT_TREND_RUNS,
+            'REPORT_SERVER_HOST': Config.REPORT_SERVER_HOST,
+            'REPORT_SERVER_PORT': Config.REPORT_SERVER_PORT,
+            'REPORT_SERVER_LOCK_FILE': Config.REPORT_SERVER_LOCK_FILE,
+            'DINGTALK_TIMEOUT': Config.DINGTALK_TIMEOUT,
+            'DINGTALK_RATE_PER_MINUTE': Config.DINGTALK_RATE_PER_MINUTE,
+            'DINGTALK_BURST': Config.DINGTALK_BURST,
+            'DINGTALK_BATCH_MAX': Config.DINGTALK_BATCH_MAX,
+            'DINGTALK_MAX_RETRIES': Config.DINGTALK_MAX_RETRIES,
+            'DINGTALK_QUEUE_SIZE': Config.DINGTALK_QUEUE_SIZE,
+            'TEST_WORKERS': Config.TEST_WORKERS,
+            'TEST_DURATIONS_FILE': Config.TEST_DURATIONS_FILE,
+            'REQUEST_METRICS_FILE': Config.REQUEST_METRICS_FILE,
+            'RUN_SUMMARY_FILE': Config.RUN_SUMMARY_FILE,
+            'ALLURE_INDEX_FILE': Config.ALLURE_INDEX_FILE,
+            'ALLURE_ARCHIVE_ENABLED': Config.ALLURE_ARCHIVE_ENABLED,
+            'ALLURE_ARCHIVE_DIR': Config.ALLURE_ARCHIVE_DIR,
+            'ALLURE_ARCHIVE_KEEP_RUNS': Config.ALLURE_ARCHIVE_KEEP_RUNS,
+            'CACHE_DIR': Config.CACHE_DIR,
+            'COLLECTION_CACHE_FILE': Config.COLLECTION_CACHE_FILE,
+            'DATA_INDEX_CACHE_DIR': Config.DATA_INDEX_CACHE_DIR,
+            'TEST_HISTORY_FILE': Config.TEST_HISTORY_FILE,
+            'TEST_HISTORY_FAILED_RUNS': Config.TEST_HISTORY_FAILED_RUNS,
+            'TEST_HISTORY_RETENTION_RUNS': Config.TEST_HISTORY_RETENTION_RUNS,
+            'FAIL_FAST_AFTER': Config.FAIL_FAST_AFTER,
+            'RUN_HISTORY_ENABLED': Config.RUN_HISTORY_ENABLED,
+            'RUN_HISTORY_DB': Config.RUN_HISTORY_DB,
+            'RUN_HISTORY_KEEP_RUNS': Config.RUN_HISTORY_KEEP_RUNS,
+            'RUN_HISTORY_MAX_AGE_DAYS': Config.RUN_HISTORY_MAX_AGE_DAYS,
+            'LOAD_TEST_DIR': Config.LOAD_TEST_DIR,
+            'LOAD_TEST_SCENARIO': Config.LOAD_TEST_SCENARIO,
         }
         
         env_config = configs.get(env, configs['dev'])
@@ -1,6 +1,72 @@
+import os
+import copy
+import json
 import pytest
+import allure
 from api.request_handler import request_handler
-from utils.logger import log
+from api.metrics import request_metrics
+from api.endpoints import endpoints
+from data.test_data import test_data
+from config.config import config
+from utils.logger import log, flush_logs, read_test_log
+from utils.run_summary import run_summary, summary_path
+from utils.outcome_history import OutcomeHistory, OutageDetector
+from utils.run_history import run_recorder
+from utils.mock_server import MockServer, MockDataset
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--mock-server", action="store_true", default=config['MOCK_SERVER_ENABLED'],
+        help="使用本地模拟jsonplaceholder服务器代替BASE_URL运行测试",
+    )
+    parser.addoption(
+        "--no-reorder", action="store_true", default=False,
+        help="按收集顺序运行用例，不按历史结果调整顺序",
+    )
+    parser.addoption(
+        "--fail-fast-after", type=int, default=config['FAIL_FAST_AFTER'], metavar="N",
+        help="连续N个用例因环境故障（连接失败、超时、熔断、5xx）失败时停止运行，0表示不启用",
+    )
+    parser.addoption(
+        "--node-ids-file", default=None, metavar="PATH",
+        help="只运行文件中列出的节点ID（每行一个），用例较多时代替在命令行中逐个传入",
+    )
+
+
+# 环境故障检测器，在pytest_configure中按命令行参数创建
+outage_detector = OutageDetector(0)
+
+
+def pytest_configure(config):
+    global outage_detector
+    outage_detector = OutageDetector(config.getoption("fail_fast_after"))
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """
+    按--node-ids-file筛选用例，再按历史结果调整执行顺序：最近失败的用例在前，其余按历史耗时从长到短
+    :param session: pytest的会话对象
+    :param config: pytest的配置对象
+    :param items: 收集到的用例
+    """
+    node_ids_file = config.getoption("node_ids_file")
+    if node_ids_file:
+        with open(node_ids_file, "r", encoding="utf-8") as f:
+            selected = {line.strip() for line in f if line.strip()}
+        deselected = [item for item in items if item.nodeid not in selected]
+        if deselected:
+            items[:] = [item for item in items if item.nodeid in selected]
+            config.hook.pytest_deselected(items=deselected)
+    if config.getoption("no_reorder"):
+        return
+    history = OutcomeHistory()
+    if not history.tests:
+        return
+    position = {nodeid: i for i, nodeid in enumerate(history.order([item.nodeid for item in items]))}
+    items.sort(key=lambda item: position[item.nodeid])
+    failed = sum(1 for item in items if history.recently_failed(item.nodeid))
+    log.info(f"按历史结果调整用例顺序: 最近失败{failed}个优先执行，其余按耗时从长到短")
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -18,8 +84,107 @@ def setup_teardown():
     
     # 测试结束后的清理工作
     log.info("=== 结束测试会话 ===")
-    # 关闭请求会话
-    request_handler.close()
+    # 本次会话没有使用request_handler时不会创建会话，无需统计和关闭
+    if request_handler.initialized:
+        write_request_handler_summary()
+        # 关闭请求会话
+        request_handler.close()
+    write_request_metrics_summary()
+
+
+@pytest.fixture(scope="session")
+def mock_server():
+    """
+    本地模拟API服务器，用于无网络环境下的请求封装测试
+    :return: 模拟服务器实例
+    """
+    with MockServer() as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def local_api():
+    """
+    在随机端口启动本地模拟jsonplaceholder服务器，并将request_handler指向它
+    :return: 模拟服务器实例
+    """
+    dataset = MockDataset(users=config['MOCK_SERVER_USERS'], seed=config['MOCK_SERVER_SEED'])
+    server = MockServer(latency=config['MOCK_SERVER_LATENCY'], error_rate=config['MOCK_SERVER_ERROR_RATE'],
+                        dataset=dataset, seed=config['MOCK_SERVER_SEED'])
+    with server:
+        base_url = request_handler.base_url
+        request_handler.base_url = server.base_url
+        log.info(f"使用本地模拟服务器: {server.base_url}")
+        yield server
+        request_handler.base_url = base_url
+
+
+@pytest.fixture(scope="session", autouse=True)
+def use_mock_server(request):
+    """
+    指定--mock-server时，所有测试使用本地模拟服务器
+    """
+    if request.config.getoption("--mock-server"):
+        request.getfixturevalue("local_api")
+
+
+@pytest.fixture(scope="session")
+def read_catalogue():
+    """
+    会话级只读资源目录：valid_*fixture使用的有效资源在首次使用时并发预取一次
+    预取的结果只通过valid_*fixture提供，不影响测试中直接发送的GET请求
+    :return: 资源名到响应结果的映射，预取失败的资源不包含在内
+    """
+    urls = {
+        "user": endpoints.get_user_endpoint(test_data.USER_TEST_DATA["valid_user_id"]),
+        "post": endpoints.get_post_endpoint(test_data.POST_TEST_DATA["valid_post_id"]),
+        "album": endpoints.get_album_endpoint(test_data.ALBUM_TEST_DATA["valid_album_id"]),
+    }
+    results = request_handler.prefetch(list(urls.values()))
+    return {name: results[url] for name, url in urls.items() if url in results}
+
+
+def catalogue_resource(catalogue: dict, name: str, url: str):
+    """
+    从只读资源目录中取出资源的副本，测试修改返回值不影响其他测试；预取失败时重新请求
+    :param catalogue: read_catalogue的返回值
+    :param name: 资源名
+    :param url: 资源URL（相对路径）
+    :return: 资源信息
+    """
+    if name in catalogue:
+        return copy.deepcopy(catalogue[name])
+    return request_handler.get(url)
+
+
+@pytest.fixture
+def valid_user(read_catalogue):
+    """
+    有效用户
+    :return: 用户信息
+    """
+    return catalogue_resource(read_catalogue, "user",
+                              endpoints.get_user_endpoint(test_data.USER_TEST_DATA["valid_user_id"]))
+
+
+@pytest.fixture
+def valid_post(read_catalogue):
+    """
+    有效帖子
+    :return: 帖子信息
+    """
+    return catalogue_resource(read_catalogue, "post",
+                              endpoints.get_post_endpoint(test_data.POST_TEST_DATA["valid_post_id"]))
+
+
+@pytest.fixture
+def valid_album(read_catalogue):
+    """
+    有效相册
+    :return: 相册信息
+    """
+    return catalogue_resource(read_catalogue, "album",
+                              endpoints.get_album_endpoint(test_data.ALBUM_TEST_DATA["valid_album_id"]))
 
 
 @pytest.fixture(scope="function", autouse=True)
@@ -30,11 +195,82 @@ def test_case_setup(request):
     :return:
     """
     test_name = request.node.name
-    log.info(f"=== 开始测试用例: {test_name} ===")
-    
-    yield
-    
-    log.info(f"=== 结束测试用例: {test_name} ===")
+    # 用例执行期间的日志都附带用例节点ID
+    with log.contextualize(nodeid=request.node.nodeid):
+        log.info(f"=== 开始测试用例: {test_name} ===")
+        # 只缓存本用例的请求明细
+        request_metrics.begin_test()
+        
+        yield
+        
+        # 将本用例的请求耗时分解添加到Allure报告
+        timings = request_metrics.drain_test()
+        run_recorder.add_requests(request.node.nodeid, timings)
+        if timings:
+            allure.attach(
+                json.dumps([t.to_dict() for t in timings], ensure_ascii=False, indent=2),
+                name="请求耗时",
+                attachment_type=allure.attachment_type.JSON,
+            )
+        attach_test_log(request.node.nodeid)
+        log.info(f"=== 结束测试用例: {test_name} ===")
+
+
+def attach_test_log(nodeid: str):
+    """
+    按配置将用例的日志添加到Allure报告，日志按用例索引直接读取，不扫描日志文件
+    :param nodeid: 用例节点ID
+    """
+    mode = config['LOG_ATTACH_TO_ALLURE']
+    if mode == "off":
+        return
+    test = run_summary.tests.get(nodeid)
+    if mode == "failed" and (test is None or test["status"] not in ("failed", "broken")):
+        return
+    text = read_test_log(nodeid)
+    if text:
+        allure.attach(text, name="用例日志", attachment_type=allure.attachment_type.TEXT)
+
+
+def write_request_handler_summary():
+    """
+    汇总连接池、响应缓存、熔断器和请求合并的统计，写入日志和汇总文件
+    """
+    pool_stats = request_handler.pool_stats()
+    log.info(f"连接池统计: {pool_stats}")
+    run_summary.add_section("pool", pool_stats)
+    if request_handler.cache is not None:
+        log.info(f"响应缓存统计: {request_handler.cache.stats}")
+        run_summary.add_section("cache", request_handler.cache.stats)
+    if request_handler.breakers is not None:
+        breaker_stats = request_handler.breakers.stats()
+        if breaker_stats["transitions"]:
+            log.warning(f"熔断器统计: 快速失败{breaker_stats['short_circuited']}次，未关闭: {breaker_stats['open']}")
+        run_summary.add_section("circuit_breakers", breaker_stats)
+    if request_handler.coalescer is not None:
+        coalesce_stats = request_handler.coalescer.summary()
+        log.info(f"请求合并统计: 节省{coalesce_stats['saved']}次请求, {coalesce_stats}")
+        run_summary.add_section("coalescing", coalesce_stats)
+
+
+def write_request_metrics_summary():
+    """
+    按端点模板汇总本次会话的请求耗时，写入日志和汇总文件
+    """
+    summary = request_metrics.summary()
+    if not summary:
+        return
+    log.info("请求耗时汇总（毫秒）:")
+    for endpoint, stats in summary.items():
+        log.info(
+            f"  {endpoint}: 次数={stats['count']}, p50={stats['p50']}, p90={stats['p90']}, max={stats['max']}, "
+            f"连接={stats['connect_mean']}, 首字节={stats['ttfb_mean']}, "
+            f"下载={stats['download_mean']}, 解析={stats['decode_mean']}"
+        )
+    run_summary.add_section("request_metrics", summary)
+    os.makedirs(os.path.dirname(config['REQUEST_METRICS_FILE']), exist_ok=True)
+    with open(config['REQUEST_METRICS_FILE'], 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
 
 
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -47,8 +283,42 @@ def pytest_runtest_makereport(item, call):
     """
     outcome = yield
     report = outcome.get_result()
+    # 在进程内累计用例结果，避免运行结束后重新扫描Allure结果目录
+    run_summary.record(report, call)
+    reason = outage_detector.observe(report, call)
+    if reason:
+        log.error(f"提前结束运行: {reason}")
+        item.session.shouldstop = reason
     
     # 为Allure报告添加测试用例的额外信息
     if report.when == "call":
         # 可以在这里添加一些自定义的报告信息
         pass
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_sessionfinish(session, exitstatus):
+    """
+    测试会话结束时写入运行汇总文件，在会话级fixture清理之后执行
+    :param session: pytest的会话对象
+    :param exitstatus: 退出码
+    """
+    if session.config.option.collectonly:
+        return
+    worker_id = os.getenv('PYTEST_WORKER_ID')
+    run_summary.write(
+        summary_path(worker_id),
+        alluredir=session.config.getoption('allure_report_dir', None),
+    )
+    # 并行运行时由parallel_runner合并各工作进程的结果后统一更新历史
+    if worker_id is None and run_summary.tests:
+        history = OutcomeHistory()
+        history.update(run_summary.tests)
+        history.save()
+    if config['RUN_HISTORY_ENABLED']:
+        # 并行运行时各工作进程使用相同的TEST_RUN_ID，写入同一次运行
+        try:
+            run_recorder.write(run_summary.tests, started=run_summary.start)
+        except Exception as e:
+            log.error(f"写入运行历史数据库失败: {str(e)}")
+    flush_logs()
@@ -0,0 +1,328 @@
+import io
+import os
+import csv
+import json
+import random
+import hashlib
+from array import array
+from typing import Dict, Any, List, Iterator, Optional, Callable, Tuple, Union
+
+# 文件扩展名到数据格式的映射
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".yaml": "yaml", ".yml": "yaml"}
+
+
+def _load_yaml(raw: bytes) -> Any:
+    # 只有读取YAML文件时才导入yaml，优先使用C实现的解析器
+    import yaml
+    return yaml.load(raw, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+class DataFile:
+    """
+    按行（CSV记录、JSONL行、YAML文档）流式读取的测试数据文件
+    第一次按序号读取时扫描一遍文件，只记录每条数据的偏移和长度，之后按偏移直接读取单条数据
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None, types: Optional[Dict[str, Callable]] = None,
+                 cache_dir: Optional[str] = None):
+        """
+        :param path: 文件路径
+        :param fmt: 数据格式，可选值：csv, jsonl, yaml，默认按扩展名判断
+        :param types: CSV列的类型转换，如 {"user_id": int}，CSV中的值默认都是字符串
+        :param cache_dir: 偏移索引的缓存目录，文件没有变化时直接加载索引，不再扫描文件
+        """
+        self.path = path
+        self.cache_dir = cache_dir
+        self.name = os.path.basename(path)
+        self.format = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.format not in ("csv", "jsonl", "yaml"):
+            raise ValueError(f"不支持的测试数据格式: {path}，可选值：csv, jsonl, yaml")
+        self.types = types or {}
+        self._header: Optional[List[str]] = None
+        self._offsets: Optional[array] = None
+        self._lengths: Optional[array] = None
+
+    def _scan(self, f) -> Iterator[Tuple[int, bytes]]:
+        """逐条返回(偏移, 原始字节)，CSV的第一条是表头"""
+        pos = 0
+        if self.format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield pos, line
+                pos += len(line)
+        elif self.format == "csv":
+            start, quotes, lines = 0, 0, []
+            for line in f:
+                if not lines:
+                    start = pos
+                lines.append(line)
+                pos += len(line)
+                # 引号成对出现时当前记录结束，字段内可以包含换行
+                quotes += line.count(b'"')
+                if quotes % 2 == 0:
+                    record = b"".join(lines)
+                    if record.strip():
+                        yield start, record
+                    quotes, lines = 0, []
+            if lines:
+                yield start, b"".join(lines)
+        else:
+            start, lines, content = 0, [], False
+            for line in f:
+                if line.startswith(b"---") and lines:
+                    if content:
+                        yield start, b"".join(lines)
+                    start, lines, content = pos, [], False
+                lines.append(line)
+                pos += len(line)
+                stripped = line.split(b"#", 1)[0].strip()
+                if stripped and stripped not in (b"---", b"...") and not stripped.startswith(b"%"):
+                    content = True
+            if content:
+                yield start, b"".join(lines)
+
+    def _parse(self, raw: bytes) -> Any:
+        if self.format == "jsonl":
+            return json.loads(raw)
+        if self.format == "yaml":
+            return _load_yaml(raw)
+        values = next(csv.reader(io.StringIO(raw.decode("utf-8"), newline="")))
+        row = dict(zip(self._header, values))
+        for column, convert in self.types.items():
+            if row.get(column) not in (None, ""):
+                row[column] = convert(row[column])
+        return row
+
+    def _read_header(self, f) -> Iterator[Tuple[int, bytes]]:
+        records = self._scan(f)
+        if self.format == "csv":
+            header = next(records, None)
+            if header is None:
+                raise ValueError(f"CSV文件没有表头: {self.path}")
+            text = header[1].decode("utf-8-sig")
+            self._header = next(csv.reader(io.StringIO(text, newline="")))
+        return records
+
+    def __iter__(self) -> Iterator[Any]:
+        """流式读取所有数据，不建立索引"""
+        with open(self.path, "rb") as f:
+            for _, raw in self._read_header(f):
+                yield self._parse(raw)
+
+    def _cache_path(self) -> str:
+        key = hashlib.sha1(f"{os.path.abspath(self.path)}\0{self.format}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.idx")
+
+    def _signature(self) -> List[int]:
+        stat = os.stat(self.path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _load_index(self) -> bool:
+        # 缓存文件结构：元数据(JSON)一行 | 偏移数组 | 长度数组
+        try:
+            with open(self._cache_path(), "rb") as f:
+                meta = json.loads(f.readline())
+                if meta["signature"] != self._signature():
+                    return False
+                offsets, lengths = array("Q"), array("Q")
+                offsets.fromfile(f, meta["count"])
+                lengths.fromfile(f, meta["count"])
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        self._header, self._offsets, self._lengths = meta["header"], offsets, lengths
+        return True
+
+    def _save_index(self, signature: List[int]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._cache_path()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        meta = {"path": os.path.abspath(self.path), "signature": signature,
+                "header": self._header, "count": len(self._offsets)}
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._offsets.tofile(f)
+            self._lengths.tofile(f)
+        os.replace(tmp_path, path)
+
+    def index(self) -> "DataFile":
+        """扫描文件，记录每条数据的偏移和长度，只扫描一次；设置了缓存目录时优先加载缓存的索引"""
+        if self._offsets is not None:
+            return self
+        if self.cache_dir and self._load_index():
+            return self
+        signature = self._signature()
+        offsets, lengths = array("Q"), array("Q")
+        with open(self.path, "rb") as f:
+            for offset, raw in self._read_header(f):
+                offsets.append(offset)
+                lengths.append(len(raw))
+        self._offsets, self._lengths = offsets, lengths
+        if self.cache_dir:
+            try:
+                self._save_index(signature)
+            except OSError:
+                pass
+        return self
+
+    def __len__(self) -> int:
+        return len(self.index()._offsets)
+
+    def read_range(self, start: int, stop: int) -> Iterator[Any]:
+        """
+        按序号读取一段数据，只打开一次文件
+        :param start: 起始序号（包含）
+        :param stop: 结束序号（不包含）
+        :return: 数据生成器
+        """
+        self.index()
+        with open(self.path, "rb") as f:
+            for i in range(start, min(stop, len(self._offsets))):
+                f.seek(self._offsets[i])
+                yield self._parse(f.read(self._lengths[i]))
+
+    def read(self, i: int) -> Any:
+        """
+        按序号读取单条数据
+        :param i: 序号，从0开始
+        :return: 数据
+        """
+        if not 0 <= i < len(self):
+            raise IndexError(f"{self.name}中没有第{i}条数据，共{len(self)}条")
+        return next(self.read_range(i, i + 1))
+
+
+class SyntheticData:
+    """按随机种子生成指定数量的请求体，每条数据只由种子和序号决定，可以单独生成任意一条"""
+
+    def __init__(self, kind: str, count: int, seed: int = 0):
+        """
+        :param kind: 数据类型，可选值见KINDS，与TestData中的new_user、new_post结构一致
+        :param count: 数据条数
+        :param seed: 随机种子
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"不支持的数据类型: {kind}，可选值：{', '.join(self.KINDS)}")
+        self.kind = kind
+        self.count = count
+        self.seed = seed
+        self.name = f"{kind}-seed{seed}"
+
+    @staticmethod
+    def _word(rnd: random.Random, length: int = 6) -> str:
+        return "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length))
+
+    def _new_user(self, rnd: random.Random, i: int) -> Dict[str, Any]:
+        first, last = self._word(rnd).capitalize(), self._word(rnd, 8).capitalize()
+        username = f"{first.lower()}{i}"
+        return {
+            "name": f"{first} {last}",
+            "username": username,
+            "email": f"{username}@example.com",
+            "address": {
+                "street": f"{rnd.randint(1, 9999)} {self._word(rnd).capitalize()} St",
+                "suite": f"Apt {rnd.randint(1, 999)}",
+                "city": self._word(rnd, 7).capitalize(),
+                "zipcode": f"{rnd.randint(0, 99999):05d}",
+                "geo": {"lat": f"{rnd.uniform(-90, 90):.4f}", "lng": f"{rnd.uniform(-180, 180):.4f}"},
+            },
+            "phone": f"{rnd.randint(100, 999)}-{rnd.randint(100, 999)}-{rnd.randint(1000, 9999)}",
+            "website": f"{username}.com",
+            "company": {
+                "name": f"{last} Company",
+                "catchPhrase": " ".join(self._word(rnd) for _ in range(3)),
+                "bs": " ".join(self._word(rnd) for _ in range(2)),
+            },
+        }
+
+    def _new_post(self, rnd: random.Random, i: int) -> Dict[str, Any]:
+        return {
+            "title": " ".join(self._word(rnd) for _ in range(rnd.randint(2, 6))),
+            "body": " ".join(self._word(rnd) for _ in range(rnd.randint(10, 30))),
+            "userId": rnd.randint(1, 10),
+        }
+
+    KINDS = {"new_user": _new_user, "new_post": _new_post}
+
+    def read(self, i: int) -> Dict[str, Any]:
+        """
+        生成第i条数据
+        :param i: 序号，从0开始
+        :return: 请求体
+        """
+        if not 0 <= i < self.count:
+            raise IndexError(f"{self.name}中没有第{i}条数据，共{self.count}条")
+        return self.KINDS[self.kind](self, random.Random(f"{self.seed}:{self.kind}:{i}"), i)
+
+    def read_range(self, start: int, stop: int) -> Iterator[Dict[str, Any]]:
+        return (self.read(i) for i in range(start, min(stop, self.count)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.read_range(0, self.count)
+
+    def write_jsonl(self, path: str) -> str:
+        """
+        把生成的数据流式写入JSONL文件
+        :param path: 文件路径
+        :return: 文件路径
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for item in self:
+                f.write(json.dumps(item, ensure_ascii=False))
+                f.write("\n")
+        return path
+
+
+Source = Union[DataFile, SyntheticData]
+
+
+class CaseRef:
+    """单条测试数据的引用，作为pytest参数时只保存序号，在用例中调用load()时才读取数据"""
+
+    __slots__ = ("source", "index")
+
+    def __init__(self, source: Source, index: int):
+        self.source = source
+        self.index = index
+
+    def load(self) -> Any:
+        return self.source.read(self.index)
+
+    def __repr__(self):
+        return f"{self.source.name}:{self.index + 1}"
+
+
+class CaseChunk:
+    """一组连续测试数据的引用，一个用例处理多条数据，减少收集的用例数量"""
+
+    __slots__ = ("source", "start", "stop")
+
+    def __init__(self, source: Source, start: int, stop: int):
+        self.source = source
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.source.read_range(self.start, self.stop)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __repr__(self):
+        return f"{self.source.name}:{self.start + 1}-{self.stop}"
+
+
+def make_params(source: Source, chunk_size: Optional[int] = None) -> List[Union[CaseRef, CaseChunk]]:
+    """
+    生成pytest参数列表：每条数据一个CaseRef，或每chunk_size条数据一个CaseChunk
+    :param source: 数据来源
+    :param chunk_size: 每个用例处理的数据条数，默认每条数据一个用例
+    :return: 参数列表，配合 ids=str 使用
+    """
+    total = len(source)
+    if not chunk_size:
+        return [CaseRef(source, i) for i in range(total)]
+    return [CaseChunk(source, start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
@@ -1,9 +1,15 @@
-from typing import List, Dict, Any
+import os
+from typing import List, Dict, Any, Iterator, Optional, Callable, Union
+from config.config import config
+from data.data_source import DataFile, SyntheticData, CaseRef, CaseChunk, make_params
 
 
 class TestData:
     """测试数据管理类"""
     
+    # 外部测试数据文件目录，相对路径按此目录解析
+    DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cases")
+    
     # 用户相关测试数据
     USER_TEST_DATA = {
         "valid_user_id": 1,
@@ -123,5 +129,48 @@ class TestData:
         ]
 
 
+    # 外部数据文件与生成数据
+    @classmethod
+    def data_file(cls, path: str, types: Optional[Dict[str, Callable]] = None) -> DataFile:
+        """
+        获取外部测试数据文件
+        :param path: 文件路径，相对路径按DATA_DIR解析
+        :param types: CSV列的类型转换，如 {"user_id": int}
+        :return: 数据文件
+        """
+        return DataFile(os.path.join(cls.DATA_DIR, path), types=types, cache_dir=config['DATA_INDEX_CACHE_DIR'])
+    
+    @classmethod
+    def iter_cases(cls, path: str, types: Optional[Dict[str, Callable]] = None) -> Iterator[Dict[str, Any]]:
+        """流式读取CSV/JSONL/YAML文件中的测试数据"""
+        return iter(cls.data_file(path, types))
+    
+    @classmethod
+    def case_params(cls, path: str, chunk_size: Optional[int] = None,
+                    types: Optional[Dict[str, Callable]] = None) -> List[Union[CaseRef, CaseChunk]]:
+        """
+        获取外部数据文件的参数化数据，收集时只记录每条数据的位置，用例中调用load()或遍历时才读取
+        用法：@pytest.mark.parametrize("case", test_data.case_params("users.csv"), ids=str)
+        :param path: 文件路径，相对路径按DATA_DIR解析
+        :param chunk_size: 每个用例处理的数据条数，默认每条数据一个用例
+        :param types: CSV列的类型转换
+        :return: 参数列表
+        """
+        return make_params(cls.data_file(path, types), chunk_size)
+    
+    @classmethod
+    def synthetic_params(cls, kind: str, count: int, seed: int = 0,
+                         chunk_size: Optional[int] = None) -> List[Union[CaseRef, CaseChunk]]:
+        """
+        获取按随机种子生成的参数化数据，如大量new_user、new_post请求体
+        :param kind: 数据类型，可选值：new_user, new_post
+        :param count: 数据条数
+        :param seed: 随机种子
+        :param chunk_size: 每个用例处理的数据条数，默认每条数据一个用例
+        :return: 参数列表
+        """
+        return make_params(SyntheticData(kind, count, seed), chunk_size)
+
+
 # 导出TestData实例供其他模块使用
 test_data = TestData()
\ No newline at end of file
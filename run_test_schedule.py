@@ -1,6 +1,7 @@
 import os
 import sys
 import time
+import argparse
 import subprocess
 import schedule
 
@@ -9,14 +10,25 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from utils.logger import log
 from config.config import config
+from utils.parallel_runner import run_parallel
 
 
-def run_tests():
+def run_tests(workers: int = config['TEST_WORKERS']):
     """
     运行测试用例
+    :param workers: 工作进程数，大于1时按历史耗时均衡负载并行运行
     """
     log.info("=== 开始运行测试用例 ===")
     
+    if workers > 1:
+        try:
+            success = run_parallel(workers)
+            log.info(f"测试并行运行{'成功' if success else '失败'}")
+            return success
+        except Exception as e:
+            log.error(f"测试并行运行异常: {str(e)}")
+            return False
+    
     try:
         # 运行pytest测试
         result = subprocess.run(
@@ -37,8 +49,18 @@ def run_tests():
 
 def generate_allure_report():
     """
-    生成Allure报告
+    生成测试报告：默认使用内置的HTML报告生成器，只重新渲染有变化的页面；REPORT_ENGINE=allure时使用Allure命令行
     """
+    if config['REPORT_ENGINE'] != 'allure':
+        log.info("=== 开始生成HTML报告 ===")
+        try:
+            from utils.html_report import HtmlReport
+            HtmlReport().generate()
+            return True
+        except Exception as e:
+            log.error(f"HTML报告生成异常: {str(e)}")
+            return False
+    
     log.info("=== 开始生成Allure报告 ===")
     
     try:
@@ -62,45 +84,88 @@ def generate_allure_report():
         return False
 
 
+def log_run_history(last_runs: int = 30):
+    """
+    从运行历史数据库查询最近若干次运行的端点请求耗时p95和本周耗时最长的用例，写入日志
+    :param last_runs: 最近多少次运行
+    """
+    if not config['RUN_HISTORY_ENABLED'] or not os.path.exists(config['RUN_HISTORY_DB']):
+        return False
+    
+    try:
+        from utils.run_history import RunHistory
+        with RunHistory() as history:
+            for endpoint, stats in history.endpoint_latencies(95, last_runs).items():
+                log.info(f"最近{last_runs}次运行 {endpoint}: 次数={stats['count']}, p50={stats['p50']}ms, "
+                         f"p95={stats['p']}ms, max={stats['max']}ms")
+            for test in history.slowest_tests(10, days=7):
+                log.info(f"本周耗时最长的用例: {test['nodeid']}, 平均{test['mean']}s, 最大{test['max']}s")
+        return True
+    except Exception as e:
+        log.error(f"查询运行历史异常: {str(e)}")
+        return False
+
+
 def send_dingtalk_notification():
     """
-    发送钉钉通知
+    发送钉钉通知：消息放入后台通知队列后立即返回，不等待webhook响应；报告服务器在本进程中运行
     """
     log.info("=== 开始发送钉钉通知 ===")
     
     try:
-        # 运行钉钉通知脚本
-        result = subprocess.run(
-            ["python", "utils/dingtalk_notifier.py"],
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        log.info(f"钉钉通知发送成功\n输出: {result.stdout}")
+        from utils.dingtalk_notifier import DingTalkNotifier
+        DingTalkNotifier().notify_report_url()
         return True
-    except subprocess.CalledProcessError as e:
-        log.error(f"钉钉通知发送失败\n错误: {e.stderr}")
-        return False
     except Exception as e:
         log.error(f"钉钉通知发送异常: {str(e)}")
         return False
 
 
+def archive_allure_results():
+    """
+    归档本轮的Allure结果目录：打包为一个压缩归档，相同内容的附件只保存一份，归档后删除结果目录中的文件
+    """
+    if not config['ALLURE_ARCHIVE_ENABLED']:
+        return False
+    log.info("=== 开始归档Allure结果 ===")
+    
+    try:
+        from utils.allure_archive import AllureArchive
+        AllureArchive().compact()
+        return True
+    except Exception as e:
+        log.error(f"Allure结果归档异常: {str(e)}")
+        return False
+
+
 def main():
     """
     主函数
     """
+    parser = argparse.ArgumentParser(description="定时运行测试、生成报告并发送钉钉通知")
+    parser.add_argument("--resident", action="store_true",
+                        help="常驻模式：在同一进程中运行pytest和发送通知，不再每轮启动新的Python解释器")
+    args = parser.parse_args()
+    
+    if args.resident:
+        from utils.resident_runner import ResidentRunner
+        ResidentRunner().serve(interval=60)
+        return
+    
     log.info("=== 启动定时测试任务 ===")
     
     # 立即运行一次
     log.info("立即运行测试任务")
     run_tests()
+    log_run_history()
     generate_allure_report()
     send_dingtalk_notification()
+    archive_allure_results()
     
     # 设置定时任务，每小时运行一次
     schedule.every().hour.do(
-        lambda: [run_tests(), generate_allure_report(), send_dingtalk_notification()]
+        lambda: [run_tests(), log_run_history(), generate_allure_report(), send_dingtalk_notification(),
+                 archive_allure_results()]
     )
     
     # 每天运行一次的配置（注释形式）
@@ -0,0 +1,35 @@
+"""测试共用的辅助对象"""
+from types import SimpleNamespace
+import pytest
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_report(nodeid, when, outcome, longrepr=""):
+    """构造pytest_runtest_makereport中的报告对象"""
+    return SimpleNamespace(nodeid=nodeid, when=when, outcome=outcome, duration=0.5,
+                           passed=outcome == "passed", failed=outcome == "failed", skipped=outcome == "skipped",
+                           longreprtext=longrepr)
+
+
+def make_call(exc=None):
+    """
+    构造pytest_runtest_makereport中的调用信息
+    :param exc: 用例抛出的异常实例或异常类型，为None时表示用例没有抛出异常
+    """
+    if exc is None:
+        return SimpleNamespace(excinfo=None)
+    if isinstance(exc, type):
+        exc = exc("boom")
+    try:
+        raise exc
+    except BaseException:
+        return SimpleNamespace(excinfo=pytest.ExceptionInfo.from_current())
@@ -0,0 +1,60 @@
+import os
+import json
+import allure
+from utils.allure_archive import AllureArchive, EXPANDED_MARKER
+
+
+def write_results(results_dir, statuses):
+    results_dir.mkdir(exist_ok=True)
+    for i, status in enumerate(statuses):
+        result = {"name": f"test_{i}", "status": status, "attachments": [{"source": f"{i}-attachment.txt"}]}
+        (results_dir / f"{i}-result.json").write_text(json.dumps(result), encoding="utf-8")
+        # 每个用例的附件内容相同
+        (results_dir / f"{i}-attachment.txt").write_text("=== 开始测试用例 ===\n" * 50, encoding="utf-8")
+
+
+@allure.feature("Allure结果归档")
+class TestAllureArchive:
+    """Allure结果归档测试"""
+
+    @allure.story("归档")
+    @allure.title("测试相同内容的附件只保存一份，归档后删除结果文件")
+    def test_compact(self, tmp_path):
+        """测试归档去重、汇总统计和按文件名读取单个文件"""
+        results_dir = tmp_path / "allure"
+        write_results(results_dir, ["passed", "failed", "passed"])
+        archive = AllureArchive(str(tmp_path / "archive"), keep_runs=2)
+
+        run = archive.compact(str(results_dir), run_id="run1")
+        assert run["files"] == 6 and run["objects"] == 4, "3个相同的附件应只保存一份"
+        assert run["statistics"]["total"] == 3 and run["statistics"]["failed"] == 1
+        assert run["archive_size"] < run["raw_size"]
+        assert os.listdir(results_dir) == []
+        assert archive.read("run1", "2-attachment.txt").decode("utf-8").startswith("=== 开始测试用例 ===")
+        assert archive.compact(str(results_dir)) is None, "结果目录为空时不归档"
+
+        for run_id in ("run2", "run3"):
+            write_results(results_dir, ["passed"])
+            archive.compact(str(results_dir), run_id=run_id)
+        assert [r["run_id"] for r in archive.runs()] == ["run2", "run3"]
+        assert not os.path.exists(archive.archive_path("run1")), "超过保留数的归档应删除"
+
+    @allure.story("展开")
+    @allure.title("测试展开为结果目录，已展开时不重复展开")
+    def test_expand(self, tmp_path):
+        """测试展开后的文件与原文件一致，相同内容的文件使用硬链接"""
+        results_dir = tmp_path / "allure"
+        write_results(results_dir, ["passed", "broken"])
+        original = {p.name: p.read_bytes() for p in results_dir.iterdir()}
+        archive = AllureArchive(str(tmp_path / "archive"))
+        archive.compact(str(results_dir), run_id="run1")
+
+        target = archive.expand()
+        files = {name: open(os.path.join(target, name), "rb").read()
+                 for name in os.listdir(target) if name != EXPANDED_MARKER}
+        assert files == original
+        assert os.stat(os.path.join(target, "0-attachment.txt")).st_nlink == 2
+
+        marker_mtime = os.stat(os.path.join(target, EXPANDED_MARKER)).st_mtime_ns
+        assert archive.expand("run1") == target
+        assert os.stat(os.path.join(target, EXPANDED_MARKER)).st_mtime_ns == marker_mtime
@@ -0,0 +1,43 @@
+import asyncio
+import allure
+import aiohttp
+from api.async_request_handler import AsyncRequestHandler, gather_get
+from api.endpoints import endpoints
+
+
+@allure.feature("异步请求")
+class TestAsyncRequestHandler:
+    """异步请求封装测试"""
+
+    @allure.story("异步GET请求")
+    @allure.title("测试异步获取单个用户")
+    def test_get_user(self, mock_server):
+        """测试异步获取单个用户"""
+        async def _run():
+            async with AsyncRequestHandler(base_url=mock_server.base_url) as handler:
+                return await handler.get(endpoints.get_user_endpoint(1))
+
+        response = asyncio.run(_run())
+        assert isinstance(response, dict), "响应应该是字典类型"
+        assert response["id"] == 1, "返回的用户ID应该是1"
+
+    @allure.story("并发GET请求")
+    @allure.title("测试并发获取用户和帖子")
+    def test_gather_users_and_posts(self, mock_server):
+        """测试并发获取用户和帖子，结果顺序与请求顺序一致"""
+        urls = [endpoints.get_user_endpoint(i) for i in range(1, 11)]
+        urls += [endpoints.get_post_endpoint(i) for i in range(1, 101)] * 2
+        responses = gather_get(urls, base_url=mock_server.base_url, concurrency=20)
+        assert len(responses) == len(urls), "响应数量应该与请求数量一致"
+        assert [r["id"] for r in responses[:10]] == list(range(1, 11)), "用户响应顺序应该与请求顺序一致"
+        assert all(r["userId"] for r in responses[10:]), "帖子响应应该包含userId"
+
+    @allure.story("并发GET请求")
+    @allure.title("测试并发请求中的失败处理")
+    def test_gather_return_exceptions(self, mock_server):
+        """测试return_exceptions为True时失败请求以异常返回"""
+        urls = [endpoints.get_user_endpoint(1), endpoints.get_user_endpoint(999)]
+        responses = gather_get(urls, base_url=mock_server.base_url, return_exceptions=True)
+        assert responses[0]["id"] == 1, "有效用户应该正常返回"
+        assert isinstance(responses[1], aiohttp.ClientResponseError), "无效用户应该返回异常对象"
+        assert responses[1].status == 404, "无效用户应该返回404"
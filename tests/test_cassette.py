@@ -0,0 +1,122 @@
+import pytest
+import requests
+import allure
+from api.request_handler import RequestHandler
+from api.cassette import create_adapter, CassetteReader, CassetteWriter, CassetteMissError, merge_cassettes
+from api.endpoints import endpoints
+from utils.mock_server import MockServer
+
+
+def make_handler(mode: str, path: str, base_url: str) -> RequestHandler:
+    handler = RequestHandler()
+    handler.adapter = create_adapter(mode, path)
+    handler.base_url = base_url
+    return handler
+
+
+def exercise(handler: RequestHandler):
+    """执行一组覆盖GET、流式GET、POST和错误响应的请求"""
+    results = [
+        handler.get(endpoints.USERS),
+        handler.get(endpoints.get_user_endpoint(2)),
+        list(handler.iter_items(endpoints.POSTS)),
+        handler.post(endpoints.POSTS, json={"title": "cassette"}),
+    ]
+    with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+        handler.get(endpoints.get_user_endpoint(999))
+    results.append(exc_info.value.response.status_code)
+    return results
+
+
+@allure.feature("录制与回放")
+class TestCassette:
+    """录制与回放测试"""
+
+    @allure.story("回放")
+    @allure.title("测试录制的请求在没有网络时回放")
+    def test_record_then_replay(self, tmp_path):
+        """测试服务器关闭后回放的响应与录制时一致，包括错误响应"""
+        path = str(tmp_path / "run.cassette")
+        with MockServer() as server:
+            base_url = server.base_url
+            recorder = make_handler("record", path, base_url)
+            recorded = exercise(recorder)
+            recorder.get(endpoints.get_user_endpoint(2), coalesce=False)
+            recorder.close()
+
+        reader = CassetteReader(path)
+        assert len(reader) == 5, "相同请求只应录制一次"
+        reader.close()
+
+        player = make_handler("replay", path, base_url)
+        try:
+            assert exercise(player) == recorded
+            assert player.adapter.replayed == 5
+            with pytest.raises(CassetteMissError):
+                player.post(endpoints.POSTS, json={"title": "not recorded"})
+        finally:
+            player.close()
+
+    @allure.story("录制文件")
+    @allure.title("测试无效的录制文件")
+    def test_invalid_cassette(self, tmp_path):
+        """测试未完整写入的录制文件不能用于回放"""
+        path = tmp_path / "broken.cassette"
+        path.write_bytes(b"APICASS1" + b"x" * 32)
+        with pytest.raises(ValueError):
+            CassetteReader(str(path))
+        with pytest.raises(ValueError):
+            create_adapter("invalid", str(path))
+
+    @allure.story("录制文件")
+    @allure.title("测试相同请求保留最后一次的响应，并合并各工作进程的录制文件")
+    def test_last_response_and_merge(self, tmp_path):
+        """测试重试前的503被重试后的200覆盖；合并时相同录制键以后面的文件为准"""
+        parts = [str(tmp_path / f"run.worker{i}.cassette") for i in range(2)]
+        writer = CassetteWriter(parts[0])
+        writer.add("GET http://localhost/users", 503, "Service Unavailable", {}, b"")
+        writer.add("GET http://localhost/users", 200, "OK", {}, b"[]")
+        writer.add("GET http://localhost/posts", 200, "OK", {}, b"[1]")
+        writer.close()
+        writer = CassetteWriter(parts[1])
+        writer.add("GET http://localhost/posts", 200, "OK", {}, b"[2]")
+        writer.close()
+
+        output = str(tmp_path / "run.cassette")
+        assert merge_cassettes(parts, output) == 2
+        assert not any(path.endswith(".tmp") for path in map(str, tmp_path.iterdir()))
+        reader = CassetteReader(output)
+        try:
+            meta, body = reader.get("GET http://localhost/users")
+            assert meta["status"] == 200 and bytes(body) == b"[]"
+            assert bytes(reader.get("GET http://localhost/posts")[1]) == b"[2]"
+        finally:
+            reader.close()
+
+
+    @allure.story("录制文件")
+    @allure.title("测试同一进程中两个适配器录制到同一文件")
+    def test_two_recorders_one_path(self, tmp_path):
+        """测试两个录制适配器共享写入器，先关闭的不影响另一个，最后关闭时两者的录制都写入文件"""
+        path = str(tmp_path / "run.cassette")
+        with MockServer() as server:
+            first = make_handler("record", path, server.base_url)
+            second = make_handler("record", path, server.base_url)
+            first.get(endpoints.USERS)
+            second.get(endpoints.get_user_endpoint(2))
+            first.close()
+            assert not (tmp_path / "run.cassette").exists(), "还有适配器在录制时不应替换录制文件"
+            second.get(endpoints.POSTS)
+            second.close()
+
+        reader = CassetteReader(path)
+        try:
+            assert len(reader) == 3
+        finally:
+            reader.close()
+        assert not any(str(p).endswith(".tmp") for p in tmp_path.iterdir())
+
+        writers = [CassetteWriter(path), CassetteWriter(path)]
+        assert writers[0]._tmp_path != writers[1]._tmp_path, "独立的写入器使用不同的临时文件"
+        for writer in writers:
+            writer.close()
@@ -0,0 +1,67 @@
+import json
+import allure
+import pytest
+from data.data_source import DataFile, SyntheticData, CaseRef, CaseChunk, make_params
+from data.test_data import test_data
+
+
+@allure.feature("测试数据")
+class TestDataSource:
+    """外部测试数据文件与生成数据测试"""
+
+    @allure.story("数据文件")
+    @allure.title("测试流式读取与按序号读取CSV/JSONL/YAML")
+    def test_formats(self, tmp_path):
+        """测试三种格式流式读取与按偏移读取的结果一致"""
+        rows = [{"id": 1, "name": "a"}, {"id": 2, "name": "b, \"quoted\"\nline"}, {"id": 3, "name": "c"}]
+        (tmp_path / "cases.jsonl").write_text("\n".join(json.dumps(r) for r in rows) + "\n\n", encoding="utf-8")
+        (tmp_path / "cases.yaml").write_text(
+            "%YAML 1.1\n" + "".join(f"---\n# case {r['id']}\n{json.dumps(r)}\n" for r in rows) + "---\n",
+            encoding="utf-8")
+        (tmp_path / "cases.csv").write_text(
+            '\ufeffid,name\n1,a\n2,"b, ""quoted""\nline"\n\n3,c\n', encoding="utf-8")
+
+        for name, types in (("cases.jsonl", None), ("cases.yaml", None), ("cases.csv", {"id": int})):
+            data = DataFile(str(tmp_path / name), types=types)
+            assert list(data) == rows, name
+            assert len(data) == 3
+            assert [data.read(i) for i in (2, 0, 1)] == [rows[2], rows[0], rows[1]], name
+            with pytest.raises(IndexError):
+                data.read(3)
+        with pytest.raises(ValueError):
+            DataFile(str(tmp_path / "cases.txt"))
+
+    @allure.story("参数化")
+    @allure.title("测试惰性参数和分块参数")
+    def test_params(self):
+        """测试参数只保存位置，分块覆盖全部数据"""
+        refs = test_data.case_params("users.csv", types={"user_id": int})
+        assert [str(ref) for ref in refs] == ["users.csv:1", "users.csv:2", "users.csv:3", "users.csv:4"]
+        assert all(isinstance(ref, CaseRef) for ref in refs)
+        assert refs[2].load()["note"] == "multi\nline"
+
+        source = SyntheticData("new_user", count=10, seed=7)
+        chunks = make_params(source, chunk_size=4)
+        assert [str(chunk) for chunk in chunks] == ["new_user-seed7:1-4", "new_user-seed7:5-8", "new_user-seed7:9-10"]
+        assert all(isinstance(chunk, CaseChunk) for chunk in chunks)
+        assert [user for chunk in chunks for user in chunk] == list(source)
+
+    @allure.story("生成数据")
+    @allure.title("测试按种子生成的请求体")
+    def test_synthetic(self, tmp_path):
+        """测试生成的请求体结构与示例数据一致，且相同种子和序号生成相同数据"""
+        def shape(value):
+            return {k: shape(v) for k, v in value.items()} if isinstance(value, dict) else type(value)
+
+        users = SyntheticData("new_user", count=1000, seed=1)
+        assert shape(users.read(999)) == shape(test_data.USER_TEST_DATA["new_user"])
+        assert users.read(500) == SyntheticData("new_user", count=501, seed=1).read(500)
+        assert users.read(500) != SyntheticData("new_user", count=501, seed=2).read(500)
+        assert len({user["username"] for user in users}) == 1000
+
+        posts = SyntheticData("new_post", count=50, seed=1)
+        assert shape(posts.read(0)) == shape(test_data.POST_TEST_DATA["new_post"])
+        path = posts.write_jsonl(str(tmp_path / "posts.jsonl"))
+        assert list(DataFile(path)) == list(posts)
+        with pytest.raises(ValueError):
+            SyntheticData("new_photo", count=1)
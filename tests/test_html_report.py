@@ -0,0 +1,60 @@
+import json
+import allure
+from utils.html_report import HtmlReport, _slug
+
+
+def write_result(results_dir, name, feature, status, start=1000, stop=1500, message=""):
+    result = {"name": name, "fullName": f"tests.t#{name}", "status": status, "start": start, "stop": stop,
+              "labels": [{"name": "feature", "value": feature}],
+              "statusDetails": {"message": message, "trace": "Traceback ..."} if message else {}}
+    (results_dir / f"{name}-result.json").write_text(json.dumps(result), encoding="utf-8")
+
+
+@allure.feature("HTML报告")
+class TestHtmlReport:
+    """内置HTML报告测试"""
+
+    @allure.story("增量生成")
+    @allure.title("测试只重新渲染输入有变化的页面")
+    def test_incremental(self, tmp_path):
+        """测试结果未变化时不渲染任何页面，某个功能的结果变化时其他功能页面不重新渲染"""
+        results_dir = tmp_path / "allure"
+        results_dir.mkdir()
+        write_result(results_dir, "test_a", "用户管理", "passed")
+        write_result(results_dir, "test_b", "帖子管理", "passed", stop=4000)
+        output_dir = tmp_path / "report"
+
+        info = HtmlReport(str(results_dir), str(output_dir)).generate()
+        assert info["rendered"] == info["pages"] == 7 and info["parsed"] == 2
+
+        report = HtmlReport(str(results_dir), str(output_dir))
+        info = report.generate()
+        assert info["rendered"] == 0 and info["parsed"] == 0
+        assert len(report.state["history"]) == 1, "相同的结果不应增加趋势点"
+
+        write_result(results_dir, "test_a", "用户管理", "failed", message="AssertionError: <script>")
+        report = HtmlReport(str(results_dir), str(output_dir))
+        report.generate()
+        assert f"features/{_slug('帖子管理')}.html" not in report.rendered
+        assert {"index.html", "failures.html", f"features/{_slug('用户管理')}.html"} <= set(report.rendered)
+        assert len(report.state["history"]) == 2
+        failures = (output_dir / "failures.html").read_text(encoding="utf-8")
+        assert "&lt;script&gt;" in failures and "<script>" not in failures
+
+    @allure.story("增量生成")
+    @allure.title("测试删除已不存在的功能页面")
+    def test_removed_feature(self, tmp_path):
+        """测试功能下的用例全部删除后，对应的页面随之删除，耗时排行按耗时从长到短"""
+        results_dir = tmp_path / "allure"
+        results_dir.mkdir()
+        write_result(results_dir, "test_a", "用户管理", "passed")
+        write_result(results_dir, "test_b", "帖子管理", "passed", stop=4000)
+        output_dir = tmp_path / "report"
+        HtmlReport(str(results_dir), str(output_dir)).generate()
+        durations = (output_dir / "durations.html").read_text(encoding="utf-8")
+        assert durations.index("test_b") < durations.index("test_a")
+
+        (results_dir / "test_b-result.json").unlink()
+        HtmlReport(str(results_dir), str(output_dir)).generate()
+        assert not (output_dir / "features" / f"{_slug('帖子管理')}.html").exists()
+        assert (output_dir / "features" / f"{_slug('用户管理')}.html").exists()
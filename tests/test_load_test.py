@@ -0,0 +1,75 @@
+import json
+import random
+import allure
+import pytest
+from api.request_handler import RequestHandler
+from api.response_cache import ResponseCache, MemoryCacheStore
+from api.metrics import LatencyHistogram
+from utils.load_test import LoadTest, create_load_handler, save_report, attach_report
+
+
+@allure.feature("压测")
+class TestLoadTest:
+    """压测模式测试"""
+
+    @allure.story("延迟直方图")
+    @allure.title("测试直方图分位数误差")
+    def test_histogram_percentiles(self):
+        """测试直方图分位数与精确分位数的相对误差不超过精度"""
+        rnd = random.Random(1)
+        samples = [rnd.lognormvariate(3, 1) for _ in range(20000)]
+        histogram = LatencyHistogram(precision=0.01)
+        half = LatencyHistogram(precision=0.01)
+        for i, value in enumerate(samples):
+            (histogram if i % 2 else half).record(value)
+        histogram.merge(half)
+        ordered = sorted(samples)
+        for pct in (50, 90, 99):
+            exact = ordered[int(len(ordered) * pct / 100) - 1]
+            assert abs(histogram.percentile(pct) - exact) / exact < 0.02, f"p{pct}误差过大"
+        assert histogram.count == len(samples)
+        assert histogram.max == max(samples)
+        assert len(histogram.buckets) < 1500, "桶数量不应随样本数增长"
+
+    @allure.story("场景压测")
+    @allure.title("测试并发虚拟用户执行场景")
+    def test_run_scenario(self, mock_server, tmp_path):
+        """测试按迭代次数运行场景并输出每个端点的统计"""
+        handler = create_load_handler(mock_server.base_url)
+        assert handler.breakers is None and handler.retry.max_retries == 0 and handler.cache is None
+        load_test = LoadTest(["get_users", "get_user", "create_post"], users=4, iterations=5, handler=handler)
+        report = load_test.run()
+        handler.close()
+
+        assert report["requests"] == 60 and report["errors"] == 0
+        assert list(report["endpoints"]) == ["GET /users", "GET /users/{user_id}", "POST /posts"]
+        for summary in report["endpoints"].values():
+            assert summary["count"] == 20
+            assert summary["p50"] <= summary["p90"] <= summary["p99"] <= summary["max"]
+
+        path = save_report(report, str(tmp_path))
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == report
+        attach_report(report)
+
+    @allure.story("场景压测")
+    @allure.title("测试压测的GET请求不使用响应缓存")
+    def test_bypass_cache(self, mock_server):
+        """测试传入启用了缓存的实例时，每个GET请求仍实际发送"""
+        handler = RequestHandler()
+        handler.base_url = mock_server.base_url
+        handler.cache = ResponseCache(MemoryCacheStore(16), ttl=60)
+        report = LoadTest(["get_users"], users=2, iterations=3, handler=handler).run()
+        try:
+            assert report["requests"] == 6
+            assert handler.pool_stats()["requests"] == 6
+            assert handler.cache.stats["hits"] == 0
+        finally:
+            handler.close()
+
+    @allure.story("场景压测")
+    @allure.title("测试未知步骤")
+    def test_unknown_step(self):
+        """测试未知的场景步骤抛出异常"""
+        with pytest.raises(ValueError):
+            LoadTest(["get_users", "no_such_step"], iterations=1)
@@ -0,0 +1,55 @@
+import allure
+from api.routes import resolve_template
+from api.endpoints import endpoints
+from utils.log_policy import LogPolicy
+from utils.logger import log
+
+
+@allure.feature("日志策略")
+class TestLogPolicy:
+    """响应日志策略测试"""
+
+    @allure.story("端点模板")
+    @allure.title("测试具体路径解析为端点模板")
+    def test_resolve_template(self):
+        """测试具体路径解析为端点模板"""
+        assert resolve_template(endpoints.get_user_endpoint(3)) == endpoints.USER
+        assert resolve_template(endpoints.get_album_photos_endpoint(1)) == endpoints.ALBUM_PHOTOS
+        assert resolve_template("/photos?albumId=1") == endpoints.PHOTOS
+        assert resolve_template("/unknown/1") == "/unknown/1", "未匹配的路径应该原样返回"
+
+    @allure.story("响应体截断")
+    @allure.title("测试大列表抽样和长度上限")
+    def test_format_body_bounded(self):
+        """测试大列表只格式化抽样元素且受长度上限约束"""
+        policy = LogPolicy(max_chars=100, list_sample=2, list_threshold=10, endpoint_verbosity={})
+        photos = [{"id": i, "title": "x" * 50} for i in range(5000)]
+        text = policy.format_body(endpoints.PHOTOS, photos)
+        assert text.startswith("list[5000] 抽样前2项"), "大列表应该只记录抽样元素"
+        assert "已截断" in text and len(text) < 150, "日志文本应该受长度上限约束"
+
+    @allure.story("端点详细程度")
+    @allure.title("测试按端点覆盖日志详细程度")
+    def test_endpoint_verbosity(self):
+        """测试summary和off详细程度"""
+        policy = LogPolicy(endpoint_verbosity={endpoints.USER: "summary", endpoints.POST: "off"})
+        assert policy.format_body(endpoints.USER, {"id": 1, "name": "a"}) == "dict 字段: ['id', 'name']"
+        assert policy.format_body(endpoints.POST, {"id": 1}) == "<已省略>"
+        assert policy.format_body(endpoints.TODO, {"id": 1}) == "{'id': 1}", "未配置的端点应该记录完整响应体"
+
+    @allure.story("延迟格式化")
+    @allure.title("测试日志被过滤时不格式化响应体")
+    def test_lazy_formatting(self, monkeypatch):
+        """测试日志被过滤时不调用格式化"""
+        policy = LogPolicy()
+        calls = []
+        monkeypatch.setattr(policy, "format_body", lambda template, body: calls.append(body) or "")
+        # 日志位置指向调用方模块，禁用本模块日志即可模拟被过滤
+        log.disable(__name__)
+        try:
+            policy.log_response("GET请求成功: /photos", endpoints.PHOTOS, [1, 2, 3])
+        finally:
+            log.enable(__name__)
+        assert calls == [], "日志被过滤时不应格式化响应体"
+        policy.log_response("GET请求成功: /photos", endpoints.PHOTOS, [1, 2, 3])
+        assert calls == [[1, 2, 3]], "日志输出时应该格式化响应体"
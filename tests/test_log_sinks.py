@@ -0,0 +1,132 @@
+import os
+import json
+import gzip
+import time
+import allure
+from loguru import logger
+from utils.log_sinks import LogWriter, QueuedSink, SyncSink, JsonLinesWriter, DailyFileWriter
+from utils.log_index import LogIndex, compress_log, main as log_index_main
+
+
+class ListWriter(LogWriter):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def format_record(self, record):
+        return f"{record['message']}\n"
+
+    def write(self, text):
+        time.sleep(0.001)
+        self.batches.append(text.splitlines())
+
+
+@allure.feature("日志输出")
+class TestLogSinks:
+    """队列批量写入与结构化日志测试"""
+
+    @allure.story("队列写入")
+    @allure.title("测试后台线程按顺序批量写入")
+    def test_queued_sink(self):
+        """测试积压的日志合并为少量批次写入，flush后全部写入且顺序不变"""
+        writer = ListWriter()
+        sink = QueuedSink([writer], batch_size=100, flush_interval=1)
+        handler_id = logger.add(sink, format="{message}", filter=lambda r: r["extra"].get("sink_test"))
+        try:
+            for i in range(1000):
+                logger.bind(sink_test=True).info(str(i))
+            assert sink.flush()
+        finally:
+            logger.remove(handler_id)
+            sink.close()
+        messages = [m for batch in writer.batches for m in batch]
+        assert messages == [str(i) for i in range(1000)]
+        assert len(writer.batches) < 1000 and max(len(b) for b in writer.batches) <= 100
+
+    @allure.story("结构化日志")
+    @allure.title("测试JSON Lines附加字段与过期文件清理")
+    def test_json_lines(self, tmp_path):
+        """测试附加字段写入JSON，切分日志文件时删除超过保留天数的文件"""
+        expired = tmp_path / "api_test_2000-01-01.jsonl"
+        expired.write_text("{}\n", encoding="utf-8")
+        os.utime(expired, (0, 0))
+        kept = tmp_path / "other.log"
+        kept.write_text("", encoding="utf-8")
+
+        writer = JsonLinesWriter(str(tmp_path), retention_days=7)
+        sink = SyncSink([writer])
+        handler_id = logger.add(sink, format="{message}", filter=lambda r: r["extra"].get("sink_test"))
+        try:
+            with logger.contextualize(nodeid="tests/t.py::test_a"):
+                logger.bind(sink_test=True, endpoint="/users/{user_id}", duration_ms=1.5).info("GET请求成功")
+            logger.bind(sink_test=True).warning("没有附加字段")
+            sink.flush()
+        finally:
+            logger.remove(handler_id)
+            sink.close()
+
+        assert not expired.exists() and kept.exists()
+        path = writer.path
+        with open(path, encoding="utf-8") as f:
+            first, second = [json.loads(line) for line in f]
+        assert first["nodeid"] == "tests/t.py::test_a" and first["endpoint"] == "/users/{user_id}"
+        assert first["duration_ms"] == 1.5 and first["message"] == "GET请求成功"
+        assert second["level"] == "WARNING" and "endpoint" not in second
+        assert os.path.basename(path).startswith("api_test_") and isinstance(writer, DailyFileWriter)
+
+    @allure.story("用例日志索引")
+    @allure.title("测试按节点ID读取用例日志，压缩后仍可直接读取")
+    def test_log_index(self, tmp_path, capsys):
+        """测试索引记录每个用例的日志区间，同一用例的多个区间按顺序拼接，压缩后按gzip成员读取"""
+        writer = DailyFileWriter(str(tmp_path), indexed=True)
+        sink = SyncSink([writer])
+        handler_id = logger.add(sink, format="{message}", filter=lambda r: r["extra"].get("sink_test"))
+        try:
+            bound = logger.bind(sink_test=True)
+            bound.info("会话开始")
+            for nodeid, message in (("t.py::test_a", "a1"), ("t.py::test_b", "b1"), ("t.py::test_a", "a2")):
+                with logger.contextualize(nodeid=nodeid):
+                    bound.info(message)
+                    bound.info(f"{message}-中文")
+            bound.info("会话结束")
+            sink.flush()
+            current = writer.read_test_log("t.py::test_a")
+        finally:
+            logger.remove(handler_id)
+            sink.close()
+
+        lines = current.splitlines()
+        assert [line.rsplit(" - ", 1)[1] for line in lines] == ["a1", "a1-中文", "a2", "a2-中文"]
+        index = LogIndex(str(tmp_path))
+        assert index.read("t.py::test_a") == current
+        assert index.nodeids("t.py::") == ["t.py::test_a", "t.py::test_b"]
+        assert index.read("t.py::missing") == ""
+
+        with open(writer.path, "rb") as f:
+            original = f.read()
+        gz_path = compress_log(writer.path)
+        assert not os.path.exists(writer.path) and not os.path.exists(writer.path + ".idx")
+        with gzip.open(gz_path, "rb") as f:
+            assert f.read() == original, "分段压缩的文件应能整体解压"
+        assert index.read("t.py::test_a") == current
+        assert "b1-中文" in index.read("t.py::test_b")
+
+        assert log_index_main(["t.py::test_b", "--log-dir", str(tmp_path)]) == 0
+        assert "b1" in capsys.readouterr().out
+        assert log_index_main(["t.py::missing", "--log-dir", str(tmp_path)]) == 1
+
+    @allure.story("用例日志索引")
+    @allure.title("测试多个进程同时压缩同一个日志文件")
+    def test_compress_race(self, tmp_path):
+        """测试其他进程持有锁时跳过压缩，日志文件已被压缩时返回None且不留下临时文件"""
+        log_path = tmp_path / "api_test_2024-01-01.log"
+        log_path.write_text("line\n", encoding="utf-8")
+        lock_path = tmp_path / "api_test_2024-01-01.log.lock"
+        lock_path.write_text("")
+        assert compress_log(str(log_path)) is None, "其他进程正在压缩时应跳过"
+        assert log_path.exists()
+        os.remove(lock_path)
+
+        assert compress_log(str(log_path)).endswith(".log.gz")
+        assert compress_log(str(log_path)) is None, "已被其他进程压缩时应返回None"
+        assert sorted(os.listdir(tmp_path)) == ["api_test_2024-01-01.log.gz", "api_test_2024-01-01.log.gz.idx"]
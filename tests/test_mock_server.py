@@ -0,0 +1,102 @@
+import socket
+import requests
+import allure
+import pytest
+from api.endpoints import endpoints
+from utils.mock_server import MockServer, MockDataset
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as s:
+        yield s
+
+
+@allure.feature("本地模拟服务器")
+class TestMockServer:
+    """本地模拟jsonplaceholder服务器测试"""
+
+    @allure.story("只读端点")
+    @allure.title("测试所有GET端点")
+    @pytest.mark.parametrize("path, expected", [
+        (endpoints.USERS, 10),
+        (endpoints.POSTS, 100),
+        (endpoints.COMMENTS, 500),
+        (endpoints.ALBUMS, 100),
+        (endpoints.PHOTOS, 5000),
+        (endpoints.TODOS, 200),
+        (endpoints.get_user_posts_endpoint(2), 10),
+        (endpoints.get_post_comments_endpoint(3), 5),
+        (endpoints.get_user_albums_endpoint(4), 10),
+        (endpoints.get_album_photos_endpoint(5), 50),
+        (endpoints.get_user_todos_endpoint(6), 20),
+        (f"{endpoints.COMMENTS}?postId=7", 5),
+    ])
+    def test_collections(self, session, mock_server, path, expected):
+        """测试集合、嵌套集合和查询参数筛选返回的数量与jsonplaceholder一致"""
+        response = session.get(f"{mock_server.base_url}{path}")
+        assert response.status_code == 200
+        assert len(response.json()) == expected
+
+    @allure.story("只读端点")
+    @allure.title("测试单个资源和无效id")
+    def test_items_and_404(self, session, mock_server):
+        """测试单个资源、嵌套关系和无效id返回404"""
+        base = mock_server.base_url
+        photo = session.get(f"{base}{endpoints.get_photo_endpoint(51)}").json()
+        assert photo["id"] == 51 and photo["albumId"] == 2
+        comments = session.get(f"{base}{endpoints.get_post_comments_endpoint(2)}").json()
+        assert {c["postId"] for c in comments} == {2}
+        for path in (endpoints.get_user_endpoint(999), endpoints.get_todo_endpoint(0),
+                     endpoints.get_user_albums_endpoint(11), "/users/abc", "/unknown"):
+            assert session.get(f"{base}{path}").status_code == 404, path
+
+    @allure.story("写入端点")
+    @allure.title("测试POST/PUT/DELETE回显语义")
+    def test_write_semantics(self, session, mock_server):
+        """测试写入请求返回请求体但不修改数据"""
+        base = mock_server.base_url
+        created = session.post(f"{base}{endpoints.POSTS}", json={"title": "t", "userId": 1})
+        assert created.status_code == 201 and created.json() == {"title": "t", "userId": 1, "id": 101}
+        nested = session.post(f"{base}{endpoints.get_post_comments_endpoint(4)}", json={"body": "b"}).json()
+        assert nested["postId"] == 4
+        updated = session.put(f"{base}{endpoints.get_post_endpoint(1)}", json={"title": "new"}).json()
+        assert updated == {"title": "new", "id": 1}
+        assert session.patch(f"{base}{endpoints.get_post_endpoint(1)}", json={"title": "p"}).json()["userId"] == 1
+        assert session.delete(f"{base}{endpoints.get_post_endpoint(1)}").json() == {}
+        assert session.put(f"{base}{endpoints.get_post_endpoint(101)}", json={}).status_code == 404
+        assert session.delete(f"{base}{endpoints.get_post_endpoint(101)}").status_code == 404
+        assert session.get(f"{base}{endpoints.get_post_endpoint(1)}").json()["title"] != "new", "数据不应被修改"
+
+    @allure.story("协议")
+    @allure.title("测试无效的请求行和Content-Length返回400")
+    @pytest.mark.parametrize("request_bytes", [
+        b"GARBAGE\r\n\r\n",
+        b"POST /posts HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+        b"POST /posts HTTP/1.1\r\nContent-Length: -1\r\n\r\n",
+    ])
+    def test_malformed_request(self, mock_server, request_bytes):
+        """测试无法解析的请求返回400并关闭连接，服务器继续处理其他请求"""
+        with socket.create_connection((mock_server.host, mock_server.port), timeout=5) as sock:
+            sock.sendall(request_bytes)
+            response = b""
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                response += chunk
+        assert response.startswith(b"HTTP/1.1 400 Bad Request")
+        assert response.endswith(b'{"error":"malformed request"}')
+        assert requests.get(f"{mock_server.base_url}{endpoints.get_user_endpoint(1)}").status_code == 200
+
+    @allure.story("故障注入")
+    @allure.title("测试错误率与确定性数据")
+    def test_error_rate_and_seed(self, session):
+        """测试注入的错误率，以及相同种子生成相同数据"""
+        with MockServer(error_rate=0.5, seed=1) as server:
+            statuses = [session.get(f"{server.base_url}{endpoints.get_user_endpoint(1)}").status_code
+                        for _ in range(200)]
+        assert 60 < statuses.count(500) < 140
+        assert set(statuses) == {200, 500}
+        assert MockDataset(seed=3).collection("todos") == MockDataset(seed=3).collection("todos")
+        assert MockDataset(seed=3).collection("posts") != MockDataset(seed=4).collection("posts")
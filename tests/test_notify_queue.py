@@ -0,0 +1,117 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import allure
+import pytest
+from api.resilience import RetryPolicy
+from utils.notify_queue import NotificationQueue, TokenBucket
+from utils.dingtalk_notifier import DingTalkNotifier
+
+
+class FakeWebhook:
+    """本地模拟钉钉webhook：记录收到的消息，按预设依次返回错误码，可注入响应延迟"""
+
+    def __init__(self):
+        self.messages = []
+        self.errcodes = []
+        self.delay = 0.0
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(webhook.delay)
+                errcode = webhook.errcodes.pop(0) if webhook.errcodes else 0
+                if errcode == 0:
+                    webhook.messages.append(body["text"]["content"])
+                payload = json.dumps({"errcode": errcode, "errmsg": "ok" if errcode == 0 else "error"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/robot/send"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    server = FakeWebhook()
+    yield server
+    server.close()
+
+
+def make_queue(webhook, **kwargs):
+    notifier = DingTalkNotifier(webhook_url=webhook.url)
+    notifier.timeout = 0.1
+    kwargs.setdefault("retry_policy", RetryPolicy(2, backoff=0.01, max_backoff=0.02))
+    return NotificationQueue(notifier.post_message, **kwargs)
+
+
+@allure.feature("钉钉通知")
+class TestNotifyQueue:
+    """后台通知队列测试"""
+
+    @allure.story("限流与合并")
+    @allure.title("测试积压的通知合并为一条发送且不阻塞调用方")
+    def test_batching(self, webhook):
+        """测试令牌用完后积压的通知合并发送，put立即返回"""
+        queue = make_queue(webhook, rate_per_minute=300, burst=1)
+        try:
+            queue.put("第0轮运行汇总")
+            assert queue.flush(5)
+            start = time.perf_counter()
+            for i in range(1, 5):
+                assert queue.put(f"第{i}轮运行汇总")
+            assert time.perf_counter() - start < 0.05, "放入通知不应等待发送"
+            assert queue.flush(5)
+        finally:
+            queue.close()
+        assert len(webhook.messages) == 2
+        assert webhook.messages[0] == "自动测试 第0轮运行汇总"
+        assert webhook.messages[1].startswith("自动测试 合并4条通知") and "第4轮运行汇总" in webhook.messages[1]
+        assert queue.stats["sent"] == 5 and queue.stats["batched"] == 4
+
+    @allure.story("重试")
+    @allure.title("测试被限流时重试，不可重试的错误直接放弃")
+    def test_retries(self, webhook):
+        """测试限流错误码和超时有限次重试，关键词不匹配等错误不重试"""
+        queue = make_queue(webhook, rate_per_minute=6000, burst=10)
+        try:
+            webhook.errcodes = [130101, 130101]
+            queue.put("限流后成功")
+            assert queue.flush(5)
+            assert webhook.messages == ["自动测试 限流后成功"] and queue.stats["retries"] == 2
+
+            webhook.errcodes = [310000]
+            queue.put("关键词不匹配")
+            assert queue.flush(5)
+            assert queue.stats["failed"] == 1 and queue.stats["retries"] == 2
+
+            webhook.delay = 0.25
+            queue.put("超时")
+            assert queue.flush(10)
+            assert queue.stats["failed"] == 2 and queue.stats["retries"] == 4
+        finally:
+            queue.close()
+
+    @allure.story("限流与合并")
+    @allure.title("测试令牌桶速率")
+    def test_token_bucket(self):
+        """测试桶空后按速率补充令牌"""
+        now = [0.0]
+        bucket = TokenBucket(rate_per_minute=60, capacity=2, clock=lambda: now[0])
+        assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+        assert bucket.try_acquire() == pytest.approx(1.0)
+        now[0] = 1.0
+        assert bucket.try_acquire() == 0
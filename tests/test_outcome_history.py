@@ -0,0 +1,70 @@
+import allure
+import requests
+from utils.outcome_history import OutcomeHistory, OutageDetector
+from api.resilience import CircuitOpenError
+from tests.helpers import make_report, make_call
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+@allure.feature("用例执行顺序")
+class TestOutcomeHistory:
+    """按历史结果调整用例顺序与环境故障提前结束测试"""
+
+    @allure.story("执行顺序")
+    @allure.title("测试最近失败优先、耗时长的优先")
+    def test_order(self, tmp_path):
+        """测试排序规则、失败过期和历史保存后重新加载"""
+        path = str(tmp_path / "history.json")
+        history = OutcomeHistory(path, failed_runs=2, retention_runs=3)
+        history.update({
+            "t::fast": {"status": "passed", "duration": 0.1},
+            "t::slow": {"status": "passed", "duration": 2.0},
+            "t::flaky": {"status": "failed", "duration": 0.2},
+            "t::medium": {"status": "passed", "duration": 1.0},
+        })
+        history.save()
+
+        history = OutcomeHistory(path, failed_runs=2, retention_runs=3)
+        assert history.order(["t::fast", "t::medium", "t::new", "t::slow", "t::flaky"]) == \
+            ["t::flaky", "t::slow", "t::medium", "t::new", "t::fast"]
+
+        history.update({"t::flaky": {"status": "passed", "duration": 0.2}})
+        assert history.recently_failed("t::flaky"), "失败后的下一次运行仍应优先执行"
+        history.update({"t::slow": {"status": "passed", "duration": 1.0}})
+        assert not history.recently_failed("t::flaky")
+        assert history.tests["t::slow"]["duration"] == 1.5
+        history.update({})
+        assert "t::fast" not in history.tests, "长期未执行的用例应从历史中删除"
+        assert "t::slow" in history.tests
+
+    @allure.story("提前结束")
+    @allure.title("测试连续环境故障时停止运行")
+    def test_outage_detector(self):
+        """测试只有连续的连接失败、熔断和5xx会触发停止，断言失败和4xx会重新计数"""
+        detector = OutageDetector(3)
+        outage = [
+            ("t::a", requests.exceptions.ConnectionError("refused")),
+            ("t::b", CircuitOpenError("open")),
+        ]
+        for nodeid, exc in outage:
+            assert detector.observe(make_report(nodeid, "call", "failed"), make_call(exc)) is None
+        # 同一个用例的teardown失败不重复计数
+        assert detector.observe(make_report("t::b", "teardown", "failed"), make_call(CircuitOpenError("open"))) is None
+        assert detector.observe(make_report("t::c", "call", "failed"), make_call(http_error(404))) is None
+        assert detector.consecutive == 0
+
+        for nodeid in ("t::d", "t::e"):
+            detector.observe(make_report(nodeid, "call", "failed"), make_call(http_error(503)))
+        detector.observe(make_report("t::f", "call", "passed"), make_call())
+        assert detector.consecutive == 0
+        for nodeid in ("t::g", "t::h"):
+            detector.observe(make_report(nodeid, "setup", "failed"), make_call(requests.exceptions.Timeout()))
+        reason = detector.observe(make_report("t::i", "call", "failed"), make_call(http_error(502)))
+        assert reason and "HTTPError" in reason
+        assert OutageDetector(0).observe(make_report("t::j", "call", "failed"),
+                                         make_call(requests.exceptions.ConnectionError())) is None
@@ -0,0 +1,65 @@
+import sys
+import json
+import subprocess
+import allure
+from config.config import config
+from utils.parallel_runner import node_id_to_full_name, group_key, plan_workers, load_durations
+
+
+@allure.feature("并行运行")
+class TestParallelRunner:
+    """并行运行负载均衡测试"""
+
+    @allure.story("节点ID映射")
+    @allure.title("测试节点ID转换为Allure fullName")
+    def test_node_id_mapping(self):
+        """测试节点ID与Allure fullName、分组键的对应关系"""
+        node_id = "tests/test_sample_api.py::TestUserAPI::test_get_user[2]"
+        assert node_id_to_full_name(node_id) == "tests.test_sample_api.TestUserAPI#test_get_user"
+        assert group_key(node_id) == "tests/test_sample_api.py::TestUserAPI"
+        assert group_key("tests/test_misc.py::test_func") == "tests/test_misc.py"
+
+    @allure.story("历史耗时")
+    @allure.title("测试从Allure结果读取历史耗时")
+    def test_load_durations(self, tmp_path):
+        """测试只读取result文件，参数化用例取平均耗时，并覆盖持久化的耗时"""
+        results = tmp_path / "allure"
+        results.mkdir()
+        for i, (start, stop) in enumerate([(0, 1000), (0, 3000)]):
+            (results / f"{i}-result.json").write_text(json.dumps(
+                {"fullName": "tests.a.TestA#test_x", "start": start, "stop": stop}))
+        (results / "c-container.json").write_text(json.dumps({"start": 0, "stop": 99999}))
+        durations_file = tmp_path / "durations.json"
+        durations_file.write_text(json.dumps({"tests.a.TestA#test_x": 9.0, "tests.a.TestA#test_y": 5.0}))
+        durations = load_durations(str(results), str(durations_file))
+        assert durations == {"tests.a.TestA#test_x": 2.0, "tests.a.TestA#test_y": 5.0}
+
+    @allure.story("负载均衡")
+    @allure.title("测试按测试类分组并均衡分配")
+    def test_plan_workers(self):
+        """测试同一测试类分配到同一进程，且各进程负载均衡"""
+        node_ids = [f"tests/t.py::TestSlow::test_{i}" for i in range(2)]
+        node_ids += [f"tests/t.py::TestFast{g}::test_{i}" for g in range(4) for i in range(2)]
+        durations = {"tests.t.TestSlow#test_0": 4.0, "tests.t.TestSlow#test_1": 4.0}
+        durations.update({f"tests.t.TestFast{g}#test_{i}": 1.0 for g in range(4) for i in range(2)})
+        plan = plan_workers(node_ids, durations, 2)
+        assert [load for load, _ in plan] == [8.0, 8.0], "两个进程的预计耗时应该相同"
+        slow_worker = next(assigned for _, assigned in plan if node_ids[0] in assigned)
+        assert node_ids[1] in slow_worker, "同一测试类的用例应该分配到同一进程"
+        assert sorted(sum((assigned for _, assigned in plan), [])) == sorted(node_ids)
+        assert len(plan_workers(node_ids[:2], durations, 4)) == 1, "没有分配用例的进程不应启动"
+
+    @allure.story("节点ID文件")
+    @allure.title("测试按节点ID文件筛选用例")
+    def test_node_ids_file(self, tmp_path):
+        """测试工作进程只运行节点ID文件中列出的用例，不需要在命令行中逐个传入"""
+        node_id = "tests/test_parallel_runner.py::TestParallelRunner::test_plan_workers"
+        node_ids_file = tmp_path / "node_ids.txt"
+        node_ids_file.write_text(node_id + "\n", encoding="utf-8")
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "-p", "no:cacheprovider", "-o", "addopts=", "-o", "log_cli=false",
+             "--collect-only", "-q", f"--node-ids-file={node_ids_file}", "tests/test_parallel_runner.py"],
+            cwd=config['BASE_DIR'], capture_output=True, text=True,
+        )
+        collected = [line for line in result.stdout.splitlines() if "::" in line]
+        assert collected == [node_id], result.stdout
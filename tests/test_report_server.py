@@ -0,0 +1,69 @@
+import os
+import json
+import gzip
+import allure
+import requests
+from utils.report_server import ReportServer, find_running, precompress
+
+
+@allure.feature("报告服务器")
+class TestReportServer:
+    """内置报告服务器测试"""
+
+    @allure.story("静态文件")
+    @allure.title("测试压缩、协商缓存和Range请求")
+    def test_static_files(self, tmp_path):
+        """测试文本文件gzip压缩返回、ETag命中返回304、Range返回部分内容、不能访问根目录之外的文件"""
+        root = tmp_path / "report"
+        (root / "data").mkdir(parents=True)
+        data = json.dumps([{"name": f"test_{i}", "status": "passed"} for i in range(200)]).encode("utf-8")
+        (root / "data" / "suites.json").write_bytes(data)
+        (root / "index.html").write_text("<html>报告</html>", encoding="utf-8")
+        (tmp_path / "secret.txt").write_text("secret", encoding="utf-8")
+
+        with ReportServer(str(root), "127.0.0.1", 0, str(tmp_path / "server.lock")) as server, \
+                requests.Session() as session:
+            response = session.get(f"{server.url}/data/suites.json")
+            assert response.status_code == 200 and response.content == data
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert int(response.headers["Content-Length"]) < len(data)
+
+            etag = response.headers["ETag"]
+            cached = session.get(f"{server.url}/data/suites.json", headers={"If-None-Match": etag})
+            assert cached.status_code == 304 and cached.content == b""
+
+            partial = session.get(f"{server.url}/data/suites.json", headers={"Range": "bytes=10-19"})
+            assert partial.status_code == 206 and partial.content == data[10:20]
+            assert partial.headers["Content-Range"] == f"bytes 10-19/{len(data)}"
+            assert session.get(f"{server.url}/data/suites.json", headers={"Range": "bytes=-5"}).content == data[-5:]
+            assert session.get(f"{server.url}/data/suites.json",
+                               headers={"Range": f"bytes={len(data)}-"}).status_code == 416
+
+            assert session.get(f"{server.url}/").text == "<html>报告</html>"
+            redirect = session.get(f"{server.url}/data", allow_redirects=False)
+            assert redirect.status_code == 301 and redirect.headers["Location"] == "/data/"
+            assert session.get(f"{server.url}/../secret.txt").status_code == 404
+            assert session.get(f"{server.url}/%2e%2e/secret.txt").status_code == 404
+
+            # 预压缩文件比原文件新时直接返回预压缩文件
+            assert precompress(str(root)) == 1
+            with open(root / "data" / "suites.json.gz", "rb") as f:
+                assert gzip.decompress(f.read()) == data
+            response = session.get(f"{server.url}/data/suites.json")
+            assert response.content == data and response.headers["Content-Encoding"] == "gzip"
+
+    @allure.story("锁文件")
+    @allure.title("测试通过锁文件和就绪检查复用服务器")
+    def test_lock_file(self, tmp_path):
+        """测试锁文件记录PID和端口，根目录不同或服务器停止后不再复用"""
+        root = tmp_path / "report"
+        lock_file = str(tmp_path / "server.lock")
+        server = ReportServer(str(root), "127.0.0.1", 0, lock_file).start()
+        try:
+            info = find_running(str(root), lock_file)
+            assert info["pid"] == os.getpid() and info["port"] == server.port
+            assert find_running(str(tmp_path / "other"), lock_file) is None
+        finally:
+            server.stop()
+        assert not os.path.exists(lock_file)
+        assert find_running(str(root), lock_file) is None
@@ -0,0 +1,253 @@
+import json
+import time
+import threading
+import pytest
+import requests
+import allure
+from api.request_handler import RequestHandler
+from api.endpoints import endpoints
+from api.json_stream import iter_json_array
+from api.metrics import MetricsCollector, RequestTiming, request_metrics
+from api.single_flight import SingleFlight
+
+
+@pytest.fixture
+def handler(mock_server):
+    """指向本地模拟服务器的请求封装实例"""
+    handler = RequestHandler()
+    handler.base_url = mock_server.base_url
+    yield handler
+    handler.close()
+
+
+@allure.feature("请求封装")
+class TestConnectionPool:
+    """连接池与线程安全测试"""
+
+    @allure.story("连接复用")
+    @allure.title("测试多线程请求复用连接池")
+    def test_threads_reuse_pool(self, handler):
+        """测试多线程请求共用连接池并复用连接"""
+        errors = []
+
+        def worker():
+            try:
+                for user_id in range(1, 11):
+                    assert handler.get(endpoints.get_user_endpoint(user_id))["id"] == user_id
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = handler.pool_stats()
+        assert not errors, f"多线程请求不应失败: {errors}"
+        # 并发的相同GET请求会被合并，连接池只记录实际发送的请求
+        assert stats["requests"] + handler.coalescer.stats["coalesced"] == 80, "连接池应该记录所有实际发送的请求"
+        assert stats["opened"] <= 8, "新建连接数不应超过线程数"
+        assert stats["reused"] == stats["requests"] - stats["opened"], "其余请求应该复用连接"
+
+    @allure.story("请求头覆盖")
+    @allure.title("测试线程内请求头覆盖不修改默认请求头")
+    def test_override_headers(self, handler, mock_server):
+        """测试线程内请求头覆盖只对当前线程生效"""
+        with handler.override_headers({"Content-Type": "text/plain"}):
+            response = handler.post(endpoints.POSTS, data="raw")
+            assert handler._merge_headers()["Content-Type"] == "text/plain"
+        assert mock_server.last_request["headers"]["content-type"] == "text/plain", "请求应该使用覆盖的Content-Type"
+        assert handler.headers["Content-Type"] == "application/json", "默认请求头不应被修改"
+        assert handler._merge_headers()["Content-Type"] == "application/json", "退出上下文后应恢复默认请求头"
+
+    @allure.story("文件上传")
+    @allure.title("测试文件上传不修改会话请求头")
+    def test_upload_file_keeps_headers(self, handler, mock_server, tmp_path):
+        """测试文件上传使用multipart请求头且不修改默认请求头"""
+        file_path = tmp_path / "photo.png"
+        file_path.write_bytes(b"fake image")
+        response = handler.upload_file(endpoints.PHOTOS, str(file_path))
+        assert set(response) == {"id"}, "与jsonplaceholder一致，非JSON请求体只返回id"
+        assert mock_server.last_request["headers"]["content-type"].startswith("multipart/form-data"), \
+            "上传应该使用multipart请求头"
+        assert handler.headers["Content-Type"] == "application/json", "默认请求头不应被修改"
+
+
+@allure.feature("请求封装")
+class TestStreaming:
+    """流式解析测试"""
+
+    @allure.story("增量解析")
+    @allure.title("测试跨分块边界增量解析JSON数组")
+    @pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+    def test_iter_json_array_chunks(self, chunk_size):
+        """测试任意分块大小下解析结果与json.loads一致"""
+        data = [{"id": 1, "title": "a, ]\"b"}, 12345, -1.5e3, "x", [1, [2]], None, True, {}]
+        text = json.dumps(data, indent=1)
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        assert list(iter_json_array(chunks)) == data
+
+    @allure.story("增量解析")
+    @allure.title("测试非法JSON数组")
+    @pytest.mark.parametrize("text", ['{"id": 1}', "[1, 2", "[1,]", "[1 2]"])
+    def test_iter_json_array_invalid(self, text):
+        """测试非数组或格式错误的响应抛出异常"""
+        with pytest.raises(ValueError):
+            list(iter_json_array([text]))
+
+    @allure.story("流式请求")
+    @allure.title("测试流式获取帖子列表")
+    def test_iter_items(self, handler):
+        """测试流式获取的元素与一次性获取的结果一致"""
+        streamed = list(handler.iter_items(endpoints.POSTS, chunk_size=64))
+        assert streamed == handler.get(endpoints.POSTS), "流式结果应该与一次性获取的结果一致"
+
+
+@allure.feature("请求封装")
+class TestRequestMetrics:
+    """请求耗时分解测试"""
+
+    @allure.story("耗时分解")
+    @allure.title("测试按端点模板记录各阶段耗时")
+    def test_timing_breakdown(self, handler):
+        """测试首次请求记录建立连接耗时，复用连接时连接耗时为0，并按端点模板聚合"""
+        request_metrics.begin_test()
+        handler.get(endpoints.get_user_endpoint(1))
+        handler.get(endpoints.get_user_endpoint(2))
+        with pytest.raises(requests.exceptions.HTTPError):
+            handler.get(endpoints.get_user_endpoint(999))
+        first, second, missing = request_metrics.drain_test()
+
+        assert first.key == second.key == "GET /users/{user_id}", "应该按端点模板而不是具体URL分组"
+        assert first.connect > 0 and second.connect == 0, "复用连接时不应记录建立连接耗时"
+        assert all(t.ttfb > 0 and t.download >= 0 for t in (first, second))
+        assert first.decode > 0 and missing.decode == 0 and missing.status == 404
+        assert request_metrics.summary()["GET /users/{user_id}"]["count"] >= 3
+
+    @allure.story("耗时分解")
+    @allure.title("测试用例之外的请求只聚合，不缓存明细")
+    def test_no_buffer_outside_test(self):
+        """测试没有调用begin_test时（如压测、常驻运行器）请求明细不会累积"""
+        collector = MetricsCollector()
+        timing = RequestTiming("GET", "/users", "http://localhost/users")
+        for _ in range(3):
+            collector.record(timing)
+        assert collector.drain_test() == []
+        collector.begin_test()
+        collector.record(timing)
+        assert collector.drain_test() == [timing]
+        collector.record(timing)
+        assert collector.drain_test() == []
+        assert collector.summary()["GET /users"]["count"] == 5
+
+
+@allure.feature("请求封装")
+class TestCoalescing:
+    """请求合并测试"""
+
+    @allure.story("请求合并")
+    @allure.title("测试并发的相同GET请求只发送一次")
+    def test_concurrent_gets_coalesce(self, handler, mock_server):
+        """测试慢响应期间的相同请求共享同一个结果，不同URL不合并"""
+        mock_server.latency = 0.2
+        try:
+            barrier = threading.Barrier(8)
+            results = []
+
+            def worker(user_id):
+                barrier.wait()
+                results.append(handler.get(endpoints.get_user_endpoint(user_id)))
+
+            threads = [threading.Thread(target=worker, args=(1 if i < 6 else 2,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            mock_server.latency = 0.0
+        assert len(results) == 8
+        assert handler.pool_stats()["requests"] == 2, "相同URL的并发请求应该只发送一次"
+        assert handler.coalescer.stats["coalesced"] == 6
+
+    @allure.story("请求合并")
+    @allure.title("测试预取不影响之后的GET请求")
+    def test_prefetch(self, handler):
+        """测试预取跳过失败的URL，预取之后相同URL的GET请求仍然实际发送"""
+        results = handler.prefetch([endpoints.get_user_endpoint(1), endpoints.get_post_endpoint(1), "/missing/1"])
+        assert set(results) == {endpoints.get_user_endpoint(1), endpoints.get_post_endpoint(1)}, "预取失败的URL应该被跳过"
+        requests_before = handler.pool_stats()["requests"]
+        assert handler.get(endpoints.get_user_endpoint(1)) == results[endpoints.get_user_endpoint(1)]
+        assert handler.pool_stats()["requests"] == requests_before + 1
+
+    @allure.story("请求合并")
+    @allure.title("测试合并的调用方拿到各自的副本")
+    def test_shared_results_copied(self, handler, mock_server, monkeypatch):
+        """测试合并的各调用方（包括发出请求的一方）都拿到副本，修改结果不影响其他调用方复制的原结果"""
+        fetched = []
+        fetch = handler._fetch
+
+        def recording_fetch(*args, **kwargs):
+            fetched.append(fetch(*args, **kwargs))
+            return fetched[-1]
+
+        def get_and_modify():
+            result = handler.get(endpoints.get_post_endpoint(1))
+            result["title"] = "modified"
+            results.append(result)
+
+        monkeypatch.setattr(handler, "_fetch", recording_fetch)
+        mock_server.latency = 0.2
+        results = []
+        try:
+            threads = [threading.Thread(target=get_and_modify) for _ in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            mock_server.latency = 0.0
+        assert handler.coalescer.stats["coalesced"] == 1 and len(fetched) == 1
+        assert all(result is not fetched[0] for result in results), "发出请求的一方也应拿到副本"
+        assert results[0] is not results[1]
+        assert fetched[0]["title"] != "modified", "共享的原结果不应被调用方修改"
+
+    @allure.story("请求合并")
+    @allure.title("测试没有等待者时执行调用的一方直接拿到结果")
+    def test_leader_not_shared_without_waiters(self):
+        """测试只有等待者加入时结果才标记为共享"""
+        flight = SingleFlight()
+        result = {"id": 1}
+        assert flight.do("key", lambda: result) == (result, False)
+        release = threading.Event()
+        outcomes = []
+        thread = threading.Thread(target=lambda: outcomes.append(flight.do("key", lambda: release.wait() and result)))
+        thread.start()
+        while flight.stats["executed"] < 2:
+            time.sleep(0.01)
+        follower = threading.Thread(target=lambda: outcomes.append(flight.do("key", lambda: None)))
+        follower.start()
+        while flight.stats["coalesced"] == 0:
+            time.sleep(0.01)
+        release.set()
+        thread.join()
+        follower.join()
+        assert sorted(shared for _, shared in outcomes) == [True, True]
+
+    @allure.story("请求合并")
+    @allure.title("测试写请求之后不再等待之前发出的GET请求")
+    def test_forget(self):
+        """测试forget移除进行中的调用后，相同键的调用重新执行"""
+        flight = SingleFlight()
+        url = "http://localhost/posts/1"
+        release = threading.Event()
+        thread = threading.Thread(target=flight.do, args=(f"{url} []", lambda: release.wait() and "stale"))
+        thread.start()
+        while flight.stats["executed"] == 0:
+            time.sleep(0.01)
+        assert flight.forget("http://localhost/posts/10") == 0
+        assert flight.forget(url) == 1
+        assert flight.do(f"{url} []", lambda: "fresh") == ("fresh", False)
+        release.set()
+        thread.join()
+        assert flight.summary() == {"executed": 2, "coalesced": 0, "saved": 0}
@@ -0,0 +1,110 @@
+import sys
+import subprocess
+import allure
+from config.config import config
+from utils.resident_runner import ResidentRunner, purge_project_modules
+
+STATE_MODULE = "resident_state_mod"
+
+ISOLATED_TEST = f"""
+import {STATE_MODULE}
+
+
+def test_fresh_module_state():
+    {STATE_MODULE}.runs.append(1)
+    assert len({STATE_MODULE}.runs) == 1
+"""
+
+# 在独立进程中以项目目录为根运行两轮，每轮发送一条通知，输出每轮结束后的通知线程数
+NOTIFY_CYCLES = """
+import sys, threading, requests
+from utils.resident_runner import ResidentRunner
+
+
+class Response:
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {{"errcode": 0}}
+
+
+requests.post = lambda *args, **kwargs: Response()
+runner = ResidentRunner([{test_dir!r}, "-q", "-p", "no:cacheprovider", "-o", "addopts=", "--rootdir", {test_dir!r}],
+                        generate_report=False, notify=False, archive=False)
+runner.cold_start = 0.0
+counts = []
+for _ in range(2):
+    runner.run_cycle()
+    from utils.dingtalk_notifier import DingTalkNotifier
+    notifier = DingTalkNotifier()
+    notifier.send_dingtalk_message("cycle")
+    notifier.flush(10)
+    counts.append(sum(t.name == "dingtalk-notify" for t in threading.enumerate()))
+print(*counts)
+"""
+
+
+@allure.feature("常驻运行器")
+class TestResidentRunner:
+    """常驻运行器测试"""
+
+    @allure.story("模块隔离")
+    @allure.title("测试只移除项目目录下的模块")
+    def test_purge_project_modules(self, tmp_path, monkeypatch):
+        """测试项目模块被移除，保留的模块和第三方模块不受影响"""
+        (tmp_path / f"{STATE_MODULE}.py").write_text("runs = []\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        __import__(STATE_MODULE)
+        purged = purge_project_modules(str(tmp_path))
+        assert purged == [STATE_MODULE]
+        assert STATE_MODULE not in sys.modules
+        assert "pytest" in sys.modules
+
+    @allure.story("模块隔离")
+    @allure.title("测试不移除项目目录下虚拟环境中的第三方库")
+    def test_keep_project_venv(self, tmp_path, monkeypatch):
+        """测试解释器安装在项目目录下（如.venv）时，第三方库不会被当作项目模块移除"""
+        venv = tmp_path / ".venv"
+        site_packages = venv / "lib" / "site-packages"
+        site_packages.mkdir(parents=True)
+        (site_packages / "venv_lib_mod.py").write_text("")
+        (tmp_path / f"{STATE_MODULE}.py").write_text("runs = []\n")
+        monkeypatch.syspath_prepend(str(site_packages))
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setattr(sys, "prefix", str(venv))
+        __import__("venv_lib_mod")
+        __import__(STATE_MODULE)
+        try:
+            assert purge_project_modules(str(tmp_path)) == [STATE_MODULE]
+            assert "venv_lib_mod" in sys.modules
+        finally:
+            sys.modules.pop("venv_lib_mod", None)
+
+    @allure.story("进程内运行")
+    @allure.title("测试多轮运行之间的模块状态相互隔离")
+    def test_cycles_are_isolated(self, tmp_path, monkeypatch):
+        """测试在同一进程中连续运行两轮，每轮重新导入项目模块"""
+        (tmp_path / f"{STATE_MODULE}.py").write_text("runs = []\n")
+        (tmp_path / "test_isolated.py").write_text(ISOLATED_TEST)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        runner = ResidentRunner(
+            [str(tmp_path), "-q", "-p", "no:cacheprovider", "-o", "addopts=", "--rootdir", str(tmp_path)],
+            base_dir=str(tmp_path), generate_report=False, notify=False, archive=False,
+        )
+        runner.cold_start = 0.5
+        results = [runner.run_cycle() for _ in range(2)]
+        assert [r["exit_code"] for r in results] == [0, 0], "第二轮应该使用重新导入的模块状态"
+        assert results[1]["cycle"] == 2
+        assert results[1]["startup_saved_estimate"] == 1.0
+        purge_project_modules(str(tmp_path))
+
+    @allure.story("进程内运行")
+    @allure.title("测试多轮运行共用一个钉钉通知队列")
+    def test_notify_queue_resident(self, tmp_path):
+        """测试每轮移除项目模块后通知队列仍是同一个，后台线程数不随轮数增长"""
+        (tmp_path / "test_noop.py").write_text("def test_noop():\n    pass\n")
+        code = NOTIFY_CYCLES.format(test_dir=str(tmp_path))
+        result = subprocess.run([sys.executable, "-c", code], cwd=config['BASE_DIR'],
+                                capture_output=True, text=True, timeout=120)
+        assert result.stdout.split()[-2:] == ["1", "1"], result.stderr[-2000:]
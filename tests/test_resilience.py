@@ -0,0 +1,115 @@
+import time
+import socket
+import random
+import pytest
+import requests
+import allure
+from api.request_handler import RequestHandler
+from api.resilience import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, RetryPolicy
+from api.endpoints import endpoints
+from tests.helpers import FakeClock
+
+
+def unused_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def dead_handler():
+    """指向没有服务监听的端口的请求封装实例，重试不等待"""
+    handler = RequestHandler()
+    handler.base_url = f"http://127.0.0.1:{unused_port()}"
+    handler.breakers = CircuitBreakerRegistry(failure_threshold=3, reset_timeout=30)
+    handler.retry = RetryPolicy(max_retries=2, backoff=0, max_backoff=0)
+    yield handler
+    handler.close()
+
+
+@allure.feature("熔断与重试")
+class TestResilience:
+    """熔断器与重试策略测试"""
+
+    @allure.story("熔断器")
+    @allure.title("测试熔断器状态变化")
+    def test_breaker_transitions(self):
+        """测试连续失败后打开，恢复时间后只放行一个试探请求，试探结果决定关闭或重新打开"""
+        clock = FakeClock()
+        transitions = []
+        breaker = CircuitBreaker("host", 2, 10, clock, lambda name, old, new: transitions.append(new))
+        breaker.record_failure()
+        assert breaker.allow(), "未达到阈值时不应熔断"
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock.now += 10
+        assert breaker.allow(), "恢复时间后应放行试探请求"
+        assert not breaker.allow(), "试探请求结束前其他请求应快速失败"
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock.now += 10
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.allow()
+        assert transitions == ["open", "half_open", "open", "half_open", "closed"]
+
+    @allure.story("重试策略")
+    @allure.title("测试只重试幂等请求")
+    def test_retry_policy(self):
+        """测试重试的方法、异常、状态码和退避时间范围"""
+        policy = RetryPolicy(2, 0.5, 1.5, statuses=[503], rnd=random.Random(0))
+        connection_error = requests.exceptions.ConnectionError()
+        assert policy.should_retry("GET", 0, exc=connection_error)
+        assert policy.should_retry("put", 1, exc=requests.exceptions.ReadTimeout())
+        assert not policy.should_retry("GET", 2, exc=connection_error), "超过最大重试次数不应重试"
+        assert not policy.should_retry("POST", 0, exc=connection_error), "非幂等请求不应重试"
+        assert not policy.should_retry("GET", 0, exc=CircuitOpenError()), "熔断时不应重试"
+        assert policy.should_retry("GET", 0, status=503)
+        assert not policy.should_retry("GET", 0, status=500)
+        for attempt, cap in [(0, 0.5), (1, 1.0), (5, 1.5)]:
+            assert all(0 <= policy.delay(attempt) <= cap for _ in range(50))
+
+    @allure.story("快速失败")
+    @allure.title("测试服务不可用时熔断并快速失败")
+    def test_dead_host_fails_fast(self, dead_handler):
+        """测试GET重试后触发熔断，之后的请求不发送直接失败，POST不重试"""
+        with pytest.raises(requests.exceptions.ConnectionError) as exc_info:
+            dead_handler.get(endpoints.USERS)
+        assert not isinstance(exc_info.value, CircuitOpenError), "第一次请求应实际发送并重试"
+
+        start = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            dead_handler.get(endpoints.get_user_endpoint(1))
+        with pytest.raises(CircuitOpenError):
+            dead_handler.post(endpoints.POSTS, json={})
+        assert time.perf_counter() - start < 0.1
+
+        stats = dead_handler.breakers.stats()
+        assert stats["short_circuited"] == 2
+        assert {t["breaker"] for t in stats["transitions"]} == {
+            dead_handler.base_url, f"{dead_handler.base_url} GET /users"}
+
+    @allure.story("熔断器")
+    @allure.title("测试试探请求因其他异常结束时释放半开的熔断器")
+    def test_trial_released_on_other_errors(self, dead_handler, monkeypatch):
+        """测试试探请求抛出连接错误和超时以外的异常后，下一个请求仍可作为试探请求发送"""
+        clock = FakeClock()
+        dead_handler.breakers.clock = clock
+        with pytest.raises(requests.exceptions.ConnectionError):
+            dead_handler.get(endpoints.USERS)
+        clock.now += 31
+
+        def broken_request(*args, **kwargs):
+            raise requests.exceptions.ContentDecodingError("响应解压失败")
+
+        with monkeypatch.context() as m:
+            m.setattr(dead_handler.session, "request", broken_request)
+            with pytest.raises(requests.exceptions.ContentDecodingError):
+                dead_handler.get(endpoints.USERS)
+        # 不重试，否则试探请求失败后重试时熔断器已重新打开
+        dead_handler.retry = RetryPolicy(max_retries=0, backoff=0, max_backoff=0)
+        with pytest.raises(requests.exceptions.ConnectionError) as exc_info:
+            dead_handler.get(endpoints.USERS)
+        assert not isinstance(exc_info.value, CircuitOpenError), "试探请求结束后应放行下一个试探请求"
@@ -0,0 +1,130 @@
+import pytest
+import allure
+from api.request_handler import RequestHandler
+from api.response_cache import ResponseCache, MemoryCacheStore, DiskCacheStore, CacheEntry
+from api.endpoints import endpoints
+from tests.helpers import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def handler(mock_server, clock):
+    """启用内存缓存并指向本地模拟服务器的请求封装实例"""
+    handler = RequestHandler()
+    handler.base_url = mock_server.base_url
+    handler.cache = ResponseCache(MemoryCacheStore(16), ttl=60, clock=clock)
+    yield handler
+    handler.close()
+
+
+@allure.feature("响应缓存")
+class TestResponseCache:
+    """GET响应缓存测试"""
+
+    @allure.story("缓存命中")
+    @allure.title("测试TTL内重复请求命中缓存")
+    def test_hit_within_ttl(self, handler):
+        """测试TTL内重复请求不发送网络请求"""
+        first = handler.get(endpoints.get_user_endpoint(1))
+        second = handler.get(endpoints.get_user_endpoint(1))
+        assert first == second
+        assert handler.cache.stats == {"hits": 1, "misses": 1, "revalidations": 0, "stores": 1}
+        assert handler.pool_stats()["requests"] == 1, "命中缓存时不应发送请求"
+
+    @allure.story("缓存失效")
+    @allure.title("测试写请求后相同URL的缓存失效")
+    def test_invalidate_on_write(self, handler):
+        """测试PUT之后该URL（包括带查询参数的）和所在集合的GET请求不返回PUT之前缓存的响应，其他资源不受影响"""
+        url = endpoints.get_post_endpoint(1)
+        other = endpoints.get_post_endpoint(10)
+        for path, params in ((url, None), (url, {"fields": "title"}), (endpoints.POSTS, None),
+                             (endpoints.POSTS, {"userId": 1}), (other, None)):
+            handler.get(path, params=params)
+        handler.put(url, json={"id": 1, "title": "updated", "body": "", "userId": 1})
+        assert len(handler.cache.store) == 1
+        requests_before = handler.pool_stats()["requests"]
+        handler.get(url)
+        handler.get(endpoints.POSTS, params={"userId": 1})
+        handler.get(other)
+        assert handler.pool_stats()["requests"] == requests_before + 2
+        assert handler.cache.stats["hits"] == 1
+
+    @allure.story("缓存命中")
+    @allure.title("测试调用方修改命中缓存的结果不影响缓存")
+    def test_hit_returns_copy(self, handler, clock):
+        """测试首次请求、命中和304重验证返回的结果都不是缓存保存的对象"""
+        url = endpoints.get_user_endpoint(1)
+        first = handler.get(url)
+        first["name"] = "modified"
+        second = handler.get(url)
+        assert second["name"] != "modified"
+        second["name"] = "modified"
+        clock.now += 61
+        assert handler.get(url)["name"] != "modified"
+        assert handler.cache.stats["revalidations"] == 1
+
+    @allure.story("条件重验证")
+    @allure.title("测试过期后通过ETag重验证")
+    def test_revalidate_after_ttl(self, handler, clock):
+        """测试缓存过期后携带If-None-Match，服务端返回304时复用缓存"""
+        first = handler.get(endpoints.get_user_endpoint(2))
+        clock.now += 61
+        second = handler.get(endpoints.get_user_endpoint(2))
+        assert second == first, "304时应该复用缓存的响应体"
+        assert handler.cache.stats["revalidations"] == 1
+        assert handler.pool_stats()["requests"] == 2, "重验证应该发送条件请求"
+        handler.get(endpoints.get_user_endpoint(2))
+        assert handler.cache.stats["hits"] == 1, "重验证后应该刷新过期时间"
+
+    @allure.story("条件重验证")
+    @allure.title("测试304响应的max-age=0和no-store不会刷新为默认TTL")
+    def test_revalidate_respects_cache_control(self, clock):
+        """测试304要求max-age=0时条目立即过期，要求no-store时删除条目"""
+        cache = ResponseCache(MemoryCacheStore(16), ttl=60, clock=clock)
+        cache.store_response("a", {"id": 1}, {"ETag": '"v1"'})
+        entry = cache.lookup("a")
+        assert cache.revalidated(entry, {"Cache-Control": "max-age=0"}) == {"id": 1}
+        assert cache.store.get("a") is not None and not cache.is_fresh(cache.store.get("a"))
+        assert cache.revalidated(entry, {"Cache-Control": "no-store"}) == {"id": 1}
+        assert cache.store.get("a") is None
+
+    @allure.story("跳过缓存")
+    @allure.title("测试单次请求跳过缓存")
+    def test_bypass(self, handler):
+        """测试cache=False时不读也不写缓存"""
+        handler.get(endpoints.get_user_endpoint(3), cache=False)
+        handler.get(endpoints.get_user_endpoint(3), cache=False)
+        assert handler.cache.stats["stores"] == 0
+        assert handler.pool_stats()["requests"] == 2
+
+    @allure.story("LRU淘汰")
+    @allure.title("测试超出容量时淘汰最久未使用的条目")
+    def test_lru_eviction(self, clock):
+        """测试内存存储的LRU淘汰"""
+        cache = ResponseCache(MemoryCacheStore(2), ttl=60, clock=clock)
+        cache.store_response("a", 1, {})
+        cache.store_response("b", 2, {})
+        cache.lookup("a")
+        cache.store_response("c", 3, {})
+        assert cache.store.get("b") is None, "最久未使用的条目应该被淘汰"
+        assert cache.store.get("a").result == 1
+        cache.store_response("d", 4, {"Cache-Control": "no-store"})
+        assert cache.store.get("d") is None, "no-store的响应不应缓存"
+
+    @allure.story("磁盘缓存")
+    @allure.title("测试磁盘缓存跨实例复用和淘汰")
+    def test_disk_store(self, tmp_path):
+        """测试磁盘缓存在新实例中仍可读取且按容量淘汰"""
+        store = DiskCacheStore(2, str(tmp_path))
+        store.set(CacheEntry("/users/1", {"id": 1}, etag='"v1"', expires_at=10))
+        store.set(CacheEntry("/users/2", {"id": 2}, expires_at=10))
+        reopened = DiskCacheStore(2, str(tmp_path))
+        assert reopened.get("/users/1").etag == '"v1"'
+        reopened.set(CacheEntry("/users/3", {"id": 3}, expires_at=10))
+        assert reopened.get("/users/2") is None, "最久未使用的条目应该被淘汰"
+        assert len(list(tmp_path.glob("*.json"))) == 2
+        assert sorted(DiskCacheStore(2, str(tmp_path)).keys()) == ["/users/1", "/users/3"], "上次运行的条目也能按键失效"
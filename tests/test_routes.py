@@ -0,0 +1,42 @@
+import itertools
+import allure
+import pytest
+from api.endpoints import endpoints
+from api.routes import Route, ROUTE_TABLE, expand, get_route
+
+
+@allure.feature("端点模板")
+class TestRoutes:
+    """端点模板注册与批量展开测试"""
+
+    @allure.story("批量展开")
+    @allure.title("测试按参数范围惰性生成路径")
+    def test_expand(self):
+        """测试展开结果与Endpoints方法一致，且大范围参数不会预先生成"""
+        assert list(expand(endpoints.USER, user_id=range(1, 4))) == \
+            [endpoints.get_user_endpoint(i) for i in range(1, 4)]
+        assert list(expand(endpoints.USERS)) == [endpoints.USERS]
+        assert list(expand(endpoints.ALBUM_PHOTOS, album_id=7)) == [endpoints.get_album_photos_endpoint(7)]
+        assert ROUTE_TABLE[endpoints.POST_COMMENTS].url(post_id=5) == endpoints.get_post_comments_endpoint(5)
+
+        huge = expand(endpoints.PHOTO, photo_id=range(1, 10 ** 12))
+        assert list(itertools.islice(huge, 2)) == ["/photos/1", "/photos/2"]
+
+        route = Route("USER_RESOURCE", "/users/{user_id}/{resource}")
+        paths = route.expand(user_id=(str(i) for i in (1, 2)), resource=iter(["posts", "todos"]))
+        assert list(paths) == ["/users/1/posts", "/users/1/todos", "/users/2/posts", "/users/2/todos"]
+
+    @allure.story("参数校验")
+    @allure.title("测试无效模板和参数名")
+    def test_validation(self):
+        """测试模板在注册时校验，参数名在调用时立即校验"""
+        assert set(ROUTE_TABLE) == {value for name, value in vars(type(endpoints)).items() if name.isupper()}
+        for template in ("/users/{0}", "/users/{id}/{id}", "/users/{user_id:d}", "/users/{user_id"):
+            with pytest.raises(ValueError):
+                Route("BAD", template)
+        with pytest.raises(TypeError):
+            expand(endpoints.USER, id=range(10))
+        with pytest.raises(TypeError):
+            get_route(endpoints.USER_POSTS).url()
+        with pytest.raises(ValueError):
+            expand("/unknown/{id}", id=1)
@@ -0,0 +1,81 @@
+import time
+import allure
+from api.metrics import RequestTiming
+from utils.run_history import RunHistory, RunRecorder, percentile
+
+
+def make_timing(method, template, total):
+    timing = RequestTiming(method, template, template)
+    timing.status = 200
+    timing.ttfb = total
+    return timing
+
+
+@allure.feature("运行历史数据库")
+class TestRunHistory:
+    """运行历史数据库测试"""
+
+    @allure.story("记录运行")
+    @allure.title("测试并行运行的各工作进程写入同一次运行")
+    def test_record_run(self, tmp_path):
+        """测试同一个run_key多次写入合并为一次运行，并按用例结果重新统计"""
+        path = str(tmp_path / "history.db")
+        recorder = RunRecorder()
+        recorder.add_requests("t.py::test_a", [make_timing("GET", "/posts/{post_id}", 0.01)])
+        recorder.write({"t.py::test_a": {"status": "passed", "duration": 0.5}}, time.time(), "run1", path)
+        assert recorder.latencies == []
+        RunRecorder().write({"t.py::test_b": {"status": "failed", "duration": 1.5}}, time.time(), "run1", path)
+
+        with RunHistory(path) as history:
+            runs = history.runs()
+            assert len(runs) == 1
+            assert (runs[0]["total"], runs[0]["passed"], runs[0]["failed"]) == (2, 1, 1)
+            assert history.latency_percentile("GET /posts/{post_id}") == 10.0
+            assert history.latency_percentile("POST /posts/{post_id}") is None
+            assert [t["status"] for t in history.test_history("t.py::test_b")] == ["failed"]
+
+    @allure.story("查询")
+    @allure.title("测试按最近运行数查询端点耗时分位数和最慢用例")
+    def test_queries(self, tmp_path):
+        """测试分位数只统计最近若干次运行，最慢用例按平均耗时排序"""
+        with RunHistory(str(tmp_path / "history.db"), keep_runs=0, max_age_days=0) as history:
+            for run in range(5):
+                latencies = [("t.py::test_a", "GET", "/posts/{post_id}", 200, float(run * 100 + i), 1.0)
+                             for i in range(1, 101)]
+                history.record_run(f"run{run}", {
+                    "t.py::test_a": {"status": "passed", "duration": 1.0 + run},
+                    "t.py::test_b": {"status": "passed", "duration": 0.1},
+                    "t.py::test_c": {"status": "skipped", "duration": 9.0},
+                }, latencies)
+
+            assert history.latency_percentile("/posts/{post_id}", 95, last_runs=1) == 495.0
+            assert history.latency_percentile("/posts/{post_id}", 50, last_runs=2) == 400.0
+            assert [point["p"] for point in history.latency_trend("/posts/{post_id}", 95, last_runs=2)] == [395.0, 495.0]
+            assert history.endpoint_latencies(95, last_runs=1)["GET /posts/{post_id}"]["count"] == 100
+
+            slowest = history.slowest_tests(limit=10, days=7)
+            assert [test["nodeid"] for test in slowest] == ["t.py::test_a", "t.py::test_b"], "跳过的用例不计入"
+            assert slowest[0]["mean"] == 3.0 and slowest[0]["runs"] == 5
+
+    @allure.story("保留策略")
+    @allure.title("测试超过保留数或保留天数的运行连同明细一起删除")
+    def test_prune(self, tmp_path):
+        """测试按运行数和天数清理"""
+        with RunHistory(str(tmp_path / "history.db"), keep_runs=3, max_age_days=30) as history:
+            history.record_run("old", {"t.py::test_a": {"status": "passed", "duration": 1.0}},
+                               [("t.py::test_a", "GET", "/users", 200, 5.0, 1.0)], started=time.time() - 40 * 86400)
+            assert history.runs() == [], "超过保留天数的运行应删除"
+            for run in range(5):
+                history.record_run(f"run{run}", {"t.py::test_a": {"status": "passed", "duration": 1.0}},
+                                   [("t.py::test_a", "GET", "/users", 200, 5.0, 1.0)])
+            assert [run["run_key"] for run in history.runs()] == ["run4", "run3", "run2"]
+            assert history.conn.execute("SELECT COUNT(*) FROM request_latencies").fetchone()[0] == 3
+            assert history.conn.execute("SELECT COUNT(*) FROM test_results").fetchone()[0] == 3
+
+    @allure.story("查询")
+    @allure.title("测试最近秩法分位数")
+    def test_percentile(self):
+        assert percentile([], 95) == 0.0
+        assert percentile([1.0], 95) == 1.0
+        assert percentile([float(i) for i in range(1, 21)], 95) == 19.0
+        assert percentile([float(i) for i in range(1, 21)], 100) == 20.0
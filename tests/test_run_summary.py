@@ -0,0 +1,72 @@
+import os
+import json
+import allure
+from utils.run_summary import RunSummary, merge_summaries
+from utils.allure_index import AllureResultIndex
+from tests.helpers import make_report, make_call
+
+
+@allure.feature("运行结果汇总")
+class TestRunSummary:
+    """运行结果汇总与Allure结果增量索引测试"""
+
+    @allure.story("用例状态")
+    @allure.title("测试按Allure规则累计用例状态")
+    def test_record_statuses(self):
+        """测试断言失败为failed，其他异常和teardown异常为broken"""
+        summary = RunSummary()
+        phases = {
+            "t::ok": [("setup", "passed", None), ("call", "passed", None), ("teardown", "passed", None)],
+            "t::assert": [("setup", "passed", None), ("call", "failed", AssertionError), ("teardown", "passed", None)],
+            "t::error": [("setup", "passed", None), ("call", "failed", KeyError), ("teardown", "passed", None)],
+            "t::skip": [("setup", "skipped", None), ("teardown", "passed", None)],
+            "t::teardown": [("setup", "passed", None), ("call", "passed", None), ("teardown", "failed", KeyError)],
+        }
+        for nodeid, steps in phases.items():
+            for when, outcome, exc_type in steps:
+                summary.record(make_report(nodeid, when, outcome, "E   boom"), make_call(exc_type))
+        assert summary.counts() == {"total": 5, "passed": 1, "failed": 1, "broken": 2, "skipped": 1}
+        data = summary.to_dict()
+        assert {f["nodeid"] for f in data["failures"]} == {"t::assert", "t::error", "t::teardown"}
+        assert data["tests"]["t::ok"]["duration"] == 1.5
+
+    @allure.story("合并汇总")
+    @allure.title("测试合并多个工作进程的汇总文件")
+    def test_merge_summaries(self, tmp_path):
+        """测试合并后计数相加，缺失的工作进程文件被跳过"""
+        paths = []
+        for i, outcome in enumerate(["passed", "failed"]):
+            summary = RunSummary()
+            summary.record(make_report(f"t::{i}", "call", outcome), make_call(AssertionError if i else None))
+            summary.add_section("pool", {"opened": i})
+            path = str(tmp_path / f"run_summary.worker{i}.json")
+            summary.write(path, alluredir=str(tmp_path))
+            paths.append(path)
+        output = str(tmp_path / "run_summary.json")
+        merged = merge_summaries(paths + [str(tmp_path / "missing.json")], output)
+        assert (merged["total"], merged["passed"], merged["failed"]) == (2, 1, 1)
+        assert merged["sections"]["pool"] == {"run_summary.worker0.json": {"opened": 0},
+                                              "run_summary.worker1.json": {"opened": 1}}
+        with open(output, encoding="utf-8") as f:
+            assert json.load(f)["alluredir"] == os.path.abspath(str(tmp_path))
+
+    @allure.story("增量索引")
+    @allure.title("测试只解析新增或变化的结果文件")
+    def test_incremental_index(self, tmp_path):
+        """测试再次扫描时跳过已索引的文件，并移除已删除的文件"""
+        results = tmp_path / "allure"
+        results.mkdir()
+        for i, status in enumerate(["passed", "failed", "passed"]):
+            (results / f"{i}-result.json").write_text(json.dumps({"uuid": str(i), "status": status}))
+        (results / "c-container.json").write_text(json.dumps({"uuid": "c", "status": "passed"}))
+        index_file = str(tmp_path / "index.json")
+
+        index = AllureResultIndex(str(results), index_file)
+        assert index.statistics() == {"total": 3, "passed": 2, "failed": 1, "broken": 0, "skipped": 0}
+        assert index.parsed == 3
+
+        (results / "0-result.json").unlink()
+        (results / "3-result.json").write_text(json.dumps({"uuid": "3", "status": "broken"}))
+        index = AllureResultIndex(str(results), index_file)
+        assert index.statistics() == {"total": 3, "passed": 1, "failed": 1, "broken": 1, "skipped": 0}
+        assert index.parsed == 1, "已索引且未变化的文件不应重新解析"
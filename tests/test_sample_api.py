@@ -1,5 +1,6 @@
 import pytest
 import allure
+import requests
 from api.request_handler import request_handler
 from api.endpoints import endpoints
 from data.test_data import test_data
@@ -42,6 +43,23 @@ class TestUserAPI:
         assert isinstance(response, dict), "响应应该是字典类型"
         assert response["name"] == new_user["name"], "返回的用户名应该与创建时一致"
         log.info("测试创建新用户成功")
+    
+    @allure.story("获取单个用户")
+    @allure.title("测试按数据文件获取用户")
+    @pytest.mark.parametrize("case", test_data.case_params("users.csv", types={"user_id": int, "expected_status": int}),
+                             ids=str)
+    def test_get_user_from_file(self, case):
+        """测试按CSV数据文件中的用户ID获取用户"""
+        row = case.load()
+        log.info(f"开始测试获取用户ID: {row['user_id']}，预期状态码: {row['expected_status']}")
+        user_endpoint = endpoints.get_user_endpoint(row["user_id"])
+        if row["expected_status"] == 200:
+            assert request_handler.get(user_endpoint)["id"] == row["user_id"]
+        else:
+            with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+                request_handler.get(user_endpoint)
+            assert exc_info.value.response.status_code == row["expected_status"]
+        log.info(f"测试获取用户ID: {row['user_id']}成功")
 
 
 @allure.feature("帖子管理")
@@ -81,6 +99,18 @@ class TestPostAPI:
         assert response["title"] == new_post["title"], "返回的帖子标题应该与创建时一致"
         log.info("测试创建新帖子成功")
     
+    @allure.story("创建帖子")
+    @allure.title("测试批量创建生成的帖子")
+    @pytest.mark.parametrize("chunk", test_data.synthetic_params("new_post", count=6, chunk_size=3), ids=str)
+    def test_create_generated_posts(self, chunk):
+        """测试按随机种子生成的帖子，每个用例创建一批"""
+        log.info(f"开始测试批量创建帖子: {chunk}")
+        for new_post in chunk:
+            response = request_handler.post(endpoints.POSTS, json=new_post)
+            assert response["title"] == new_post["title"], "返回的帖子标题应该与创建时一致"
+            assert response["userId"] == new_post["userId"], "返回的用户ID应该与创建时一致"
+        log.info(f"测试批量创建{len(chunk)}个帖子成功")
+    
     @allure.story("更新帖子")
     @allure.title("测试更新帖子")
     def test_update_post(self):
@@ -123,10 +153,10 @@ class TestCommentAPI:
     
     @allure.story("获取帖子评论")
     @allure.title("测试获取帖子评论")
-    def test_get_post_comments(self):
+    def test_get_post_comments(self, valid_post):
         """测试获取帖子评论"""
         log.info("开始测试获取帖子评论")
-        post_id = test_data.POST_TEST_DATA["valid_post_id"]
+        post_id = valid_post["id"]
         comments_endpoint = endpoints.get_post_comments_endpoint(post_id)
         response = request_handler.get(comments_endpoint)
         assert isinstance(response, list), "响应应该是列表类型"
@@ -202,10 +232,10 @@ class TestAlbumAPI:
     
     @allure.story("获取用户相册")
     @allure.title("测试获取用户相册")
-    def test_get_user_albums(self):
+    def test_get_user_albums(self, valid_user):
         """测试获取用户相册"""
         log.info("开始测试获取用户相册")
-        user_id = test_data.USER_TEST_DATA["valid_user_id"]
+        user_id = valid_user["id"]
         user_albums_endpoint = endpoints.get_user_albums_endpoint(user_id)
         response = request_handler.get(user_albums_endpoint)
         assert isinstance(response, list), "响应应该是列表类型"
@@ -255,17 +285,18 @@ class TestPhotoAPI:
     
     @allure.story("获取相册照片")
     @allure.title("测试获取相册照片")
-    def test_get_album_photos(self):
+    def test_get_album_photos(self, valid_album):
         """测试获取相册照片"""
         log.info("开始测试获取相册照片")
-        album_id = test_data.ALBUM_TEST_DATA["valid_album_id"]
+        album_id = valid_album["id"]
         album_photos_endpoint = endpoints.get_album_photos_endpoint(album_id)
-        response = request_handler.get(album_photos_endpoint)
-        assert isinstance(response, list), "响应应该是列表类型"
-        assert len(response) > 0, "相册照片列表不应为空"
-        # 验证所有照片都属于指定相册
-        for photo in response:
+        # 流式逐个解析照片，不在内存中保留整个列表
+        count = 0
+        for photo in request_handler.iter_items(album_photos_endpoint):
+            # 验证所有照片都属于指定相册
             assert photo["albumId"] == album_id, f"照片应该属于相册ID: {album_id}"
+            count += 1
+        assert count > 0, "相册照片列表不应为空"
         log.info("测试获取相册照片成功")
     
     @allure.story("上传照片")
@@ -0,0 +1,67 @@
+import sys
+import subprocess
+import allure
+from config.config import config
+from data.data_source import DataFile
+from utils.lazy import LazySingleton
+from utils.collection_cache import CollectionCache
+
+
+@allure.feature("启动优化")
+class TestStartup:
+    """延迟创建单例与收集缓存测试"""
+
+    @allure.story("延迟创建")
+    @allure.title("测试导入时不创建请求会话和日志输出")
+    def test_lazy_singletons(self):
+        """测试导入conftest不会创建request_handler和配置日志，第一次访问属性时才创建"""
+        code = ("import conftest; from api.request_handler import request_handler; from utils.logger import log; "
+                "print(request_handler.initialized, log.initialized)")
+        result = subprocess.run([sys.executable, "-c", code], cwd=config['BASE_DIR'], capture_output=True, text=True)
+        assert result.stdout.split() == ["False", "False"], result.stderr
+
+        created = []
+        lazy = LazySingleton(lambda: created.append(1) or type("Handler", (), {"base_url": "a"})())
+        assert not lazy.initialized and "未创建" in repr(lazy)
+        lazy.base_url = "b"
+        assert lazy.initialized and lazy.base_url == "b"
+        assert created == [1], "实例只应创建一次"
+
+    @allure.story("收集缓存")
+    @allure.title("测试按文件摘要缓存收集结果")
+    def test_collection_cache(self, tmp_path):
+        """测试文件没有变化时命中缓存且不重新读取文件，文件变化后缓存失效"""
+        (tmp_path / "tests").mkdir()
+        test_file = tmp_path / "tests" / "test_a.py"
+        test_file.write_text("def test_a():\n    pass\n", encoding="utf-8")
+        cache_file = str(tmp_path / ".cache" / "collection.json")
+
+        cache = CollectionCache(cache_file, str(tmp_path))
+        assert cache.get() is None
+        cache.put(["tests/test_a.py::test_a"])
+
+        cache = CollectionCache(cache_file, str(tmp_path))
+        assert cache.get() == ["tests/test_a.py::test_a"]
+        assert cache.hashed == 0, "未变化的文件不应重新计算摘要"
+        assert cache.get(["-m", "smoke"]) is None, "不同参数的收集结果分别缓存"
+
+        test_file.write_text("def test_renamed():\n    pass\n", encoding="utf-8")
+        assert cache.get() is None
+
+    @allure.story("收集缓存")
+    @allure.title("测试数据文件的偏移索引缓存")
+    def test_data_index_cache(self, tmp_path):
+        """测试数据文件没有变化时直接加载索引，变化后重新扫描"""
+        path = tmp_path / "users.csv"
+        path.write_text("user_id,name\n1,a\n2,b\n", encoding="utf-8")
+        cache_dir = str(tmp_path / "index")
+        assert DataFile(str(path), types={"user_id": int}, cache_dir=cache_dir).read(1) == {"user_id": 2, "name": "b"}
+
+        cached = DataFile(str(path), types={"user_id": int}, cache_dir=cache_dir)
+        assert cached._load_index()
+        assert cached.read(0) == {"user_id": 1, "name": "a"}
+
+        path.write_text("user_id,name\n1,a\n2,b\n3,c\n", encoding="utf-8")
+        changed = DataFile(str(path), cache_dir=cache_dir)
+        assert not changed._load_index()
+        assert len(changed) == 3 and changed.read(2)["name"] == "c"
@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import zipfile
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+
+# 展开目录中记录来源运行ID的文件，内容一致时不重复展开
+EXPANDED_MARKER = ".allure-archive"
+
+
+class AllureArchive:
+    """
+    Allure结果归档：每次运行的结果目录打包为一个压缩归档（运行ID.zip）
+    归档内的文件按内容摘要存储（objects/sha1），内容相同的附件只保存一份，manifest.json记录文件名到摘要的映射
+    归档目录下的index.json记录所有运行的汇总，列出历史运行时不需要打开归档
+    """
+
+    VERSION = 1
+    MANIFEST = "manifest.json"
+
+    def __init__(self, archive_dir: Optional[str] = None, keep_runs: Optional[int] = None):
+        """
+        :param archive_dir: 归档目录，默认使用配置中的ALLURE_ARCHIVE_DIR
+        :param keep_runs: 保留的运行数，超过时删除最早的归档，默认使用配置中的ALLURE_ARCHIVE_KEEP_RUNS
+        """
+        self.archive_dir = archive_dir or config['ALLURE_ARCHIVE_DIR']
+        self.keep_runs = config['ALLURE_ARCHIVE_KEEP_RUNS'] if keep_runs is None else keep_runs
+        self.index_file = os.path.join(self.archive_dir, "index.json")
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return data.get("runs", []) if data.get("version") == self.VERSION else []
+
+    def _save_index(self, runs: List[Dict[str, Any]]):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        tmp_path = f"{self.index_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "runs": runs}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.index_file)
+
+    def archive_path(self, run_id: str) -> str:
+        return os.path.join(self.archive_dir, f"{run_id}.zip")
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """
+        :return: 已归档的运行，按时间从早到晚排序
+        """
+        return self._load_index()
+
+    def compact(self, results_dir: Optional[str] = None, run_id: Optional[str] = None,
+                remove: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        将结果目录打包为一个归档，相同内容的文件只保存一份
+        :param results_dir: Allure结果目录，默认使用配置中的ALLURE_RESULTS_DIR
+        :param run_id: 运行ID，默认使用当前时间
+        :param remove: 归档完成后是否删除结果目录中已归档的文件
+        :return: 本次归档的汇总，结果目录为空时返回None
+        """
+        results_dir = results_dir or config['ALLURE_RESULTS_DIR']
+        try:
+            with os.scandir(results_dir) as it:
+                entries = sorted((entry for entry in it if entry.is_file() and entry.name != EXPANDED_MARKER),
+                                 key=lambda entry: entry.name)
+        except FileNotFoundError:
+            entries = []
+        if not entries:
+            return None
+
+        run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = self.archive_path(run_id)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        files: Dict[str, str] = {}
+        stats = {"total": 0, "passed": 0, "failed": 0, "broken": 0, "skipped": 0}
+        raw_size = 0
+        tmp_path = f"{path}.tmp"
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+            stored = set()
+            for entry in entries:
+                with open(entry.path, "rb") as f:
+                    data = f.read()
+                raw_size += len(data)
+                digest = hashlib.sha1(data).hexdigest()
+                files[entry.name] = digest
+                if digest not in stored:
+                    stored.add(digest)
+                    archive.writestr(f"objects/{digest}", data)
+                if entry.name.endswith("-result.json"):
+                    try:
+                        status = json.loads(data).get("status")
+                    except ValueError:
+                        status = None
+                    if status:
+                        stats["total"] += 1
+                        if status in stats:
+                            stats[status] += 1
+            manifest = {"version": self.VERSION, "run_id": run_id, "files": files}
+            archive.writestr(self.MANIFEST, json.dumps(manifest, ensure_ascii=False))
+        os.replace(tmp_path, path)
+
+        run = {
+            "run_id": run_id,
+            "created": round(time.time(), 3),
+            "files": len(files),
+            "objects": len(stored),
+            "raw_size": raw_size,
+            "archive_size": os.path.getsize(path),
+            "statistics": stats,
+        }
+        runs = [r for r in self._load_index() if r["run_id"] != run_id] + [run]
+        runs = self._prune(runs)
+        self._save_index(runs)
+        if remove:
+            for entry in entries:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        log.info(f"Allure结果已归档: {path}，{run['files']}个文件去重后{run['objects']}个，"
+                 f"{raw_size}字节压缩为{run['archive_size']}字节")
+        return run
+
+    def _prune(self, runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.keep_runs <= 0 or len(runs) <= self.keep_runs:
+            return runs
+        expired, runs = runs[:-self.keep_runs], runs[-self.keep_runs:]
+        for run in expired:
+            try:
+                os.remove(self.archive_path(run["run_id"]))
+            except FileNotFoundError:
+                pass
+        return runs
+
+    def _manifest(self, archive: zipfile.ZipFile) -> Dict[str, str]:
+        return json.loads(archive.read(self.MANIFEST))["files"]
+
+    def read(self, run_id: str, name: str) -> bytes:
+        """
+        读取归档中的单个文件，不展开整个归档
+        :param run_id: 运行ID
+        :param name: 原结果目录中的文件名
+        :return: 文件内容
+        """
+        with zipfile.ZipFile(self.archive_path(run_id)) as archive:
+            files = self._manifest(archive)
+            if name not in files:
+                raise KeyError(f"归档{run_id}中没有文件: {name}")
+            return archive.read(f"objects/{files[name]}")
+
+    def expand(self, run_id: Optional[str] = None, target_dir: Optional[str] = None) -> str:
+        """
+        将归档展开为Allure可以直接读取的结果目录，目录中已经是同一次运行的结果时不重复展开
+        内容相同的文件使用硬链接，不额外占用磁盘空间
+        :param run_id: 运行ID，默认使用最近一次运行
+        :param target_dir: 展开目录，默认为归档目录下的expanded/运行ID
+        :return: 展开目录
+        """
+        if run_id is None:
+            runs = self.runs()
+            if not runs:
+                raise FileNotFoundError(f"没有已归档的运行: {self.archive_dir}")
+            run_id = runs[-1]["run_id"]
+        target_dir = target_dir or os.path.join(self.archive_dir, "expanded", run_id)
+        marker = os.path.join(target_dir, EXPANDED_MARKER)
+        try:
+            with open(marker, "r", encoding="utf-8") as f:
+                if f.read().strip() == run_id:
+                    return target_dir
+        except OSError:
+            pass
+
+        if os.path.isdir(target_dir):
+            shutil.rmtree(target_dir)
+        os.makedirs(target_dir)
+        with zipfile.ZipFile(self.archive_path(run_id)) as archive:
+            first: Dict[str, str] = {}
+            for name, digest in self._manifest(archive).items():
+                path = os.path.join(target_dir, name)
+                if digest in first:
+                    try:
+                        os.link(first[digest], path)
+                        continue
+                    except OSError:
+                        # 文件系统不支持硬链接时复制
+                        pass
+                with open(path, "wb") as f:
+                    f.write(archive.read(f"objects/{digest}"))
+                first.setdefault(digest, path)
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(run_id)
+        return target_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="归档Allure结果目录，或展开已归档的运行")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="归档结果目录并删除已归档的文件")
+    compact_parser.add_argument("--results-dir", help="Allure结果目录，默认使用配置中的ALLURE_RESULTS_DIR")
+    compact_parser.add_argument("--keep", action="store_true", help="归档后保留结果目录中的文件")
+    subparsers.add_parser("list", help="列出已归档的运行")
+    expand_parser = subparsers.add_parser("expand", help="展开归档为Allure结果目录")
+    expand_parser.add_argument("run_id", nargs="?", help="运行ID，默认使用最近一次运行")
+    expand_parser.add_argument("--output", help="展开目录")
+    args = parser.parse_args()
+
+    archive = AllureArchive()
+    if args.command == "compact":
+        run = archive.compact(args.results_dir, remove=not args.keep)
+        print(json.dumps(run, ensure_ascii=False, indent=2) if run else "结果目录为空，无需归档")
+    elif args.command == "list":
+        for run in archive.runs():
+            stats = run["statistics"]
+            print(f"{run['run_id']}: 用例{stats['total']}个（失败{stats['failed']}，异常{stats['broken']}），"
+                  f"{run['files']}个文件，{run['raw_size']} -> {run['archive_size']}字节")
+    else:
+        print(archive.expand(args.run_id, args.output))
+
+
+if __name__ == "__main__":
+    main()
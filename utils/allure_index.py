@@ -0,0 +1,105 @@
+import os
+import json
+from typing import Dict, Any
+from utils.logger import log
+
+
+class AllureResultIndex:
+    """Allure结果目录的增量索引：只解析新增或变化的*-result.json，跳过容器和附件文件"""
+
+    VERSION = 2
+    # 索引中保存的失败堆栈的最大字符数
+    TRACE_MAX_CHARS = 4000
+
+    def __init__(self, results_dir: str, index_file: str):
+        self.results_dir = os.path.abspath(results_dir)
+        self.index_file = index_file
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.parsed = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == self.VERSION and data.get("results_dir") == self.results_dir:
+            self.entries = data.get("entries", {})
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_file)), exist_ok=True)
+        tmp_path = f"{self.index_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": self.VERSION, "results_dir": self.results_dir, "entries": self.entries}))
+        os.replace(tmp_path, self.index_file)
+
+    def _summarize(self, data: Dict[str, Any], signature) -> Dict[str, Any]:
+        """提取统计和生成报告需要的字段"""
+        labels = {}
+        for label in data.get("labels") or ():
+            labels.setdefault(label.get("name"), label.get("value"))
+        details = data.get("statusDetails") or {}
+        return {
+            "signature": signature,
+            "fullName": data.get("fullName"),
+            "name": data.get("name"),
+            "historyId": data.get("historyId"),
+            "status": data.get("status"),
+            "start": data.get("start"),
+            "stop": data.get("stop"),
+            "feature": labels.get("feature"),
+            "story": labels.get("story"),
+            "message": (details.get("message") or "")[:500],
+            "trace": (details.get("trace") or "")[:self.TRACE_MAX_CHARS],
+        }
+
+    def scan(self) -> Dict[str, Dict[str, Any]]:
+        """
+        增量扫描结果目录并更新索引
+        :return: 文件名到用例摘要（fullName、status、start、stop、feature、失败信息等）的映射
+        """
+        self.parsed = 0
+        seen = {}
+        try:
+            with os.scandir(self.results_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith("-result.json"):
+                        continue
+                    stat = entry.stat()
+                    signature = [stat.st_mtime_ns, stat.st_size]
+                    cached = self.entries.get(entry.name)
+                    if cached is not None and cached["signature"] == signature:
+                        seen[entry.name] = cached
+                        continue
+                    try:
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            data = json.load(f)
+                    except (OSError, ValueError) as e:
+                        log.warning(f"解析Allure结果文件失败: {entry.path}, 错误: {str(e)}")
+                        continue
+                    self.parsed += 1
+                    seen[entry.name] = self._summarize(data, signature)
+        except FileNotFoundError:
+            pass
+        # 已删除的文件不会出现在seen中，随之从索引移除；没有新增、变化或删除的文件时不重写索引
+        changed = self.parsed > 0 or len(seen) != len(self.entries)
+        self.entries = seen
+        if changed:
+            self._save()
+        return self.entries
+
+    def statistics(self) -> Dict[str, int]:
+        """
+        增量扫描并统计各状态的用例数
+        :return: 测试统计信息字典
+        """
+        stats = {"total": 0, "passed": 0, "failed": 0, "broken": 0, "skipped": 0}
+        for entry in self.scan().values():
+            status = entry.get("status")
+            if not status:
+                continue
+            stats["total"] += 1
+            if status in stats:
+                stats[status] += 1
+        return stats
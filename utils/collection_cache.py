@@ -0,0 +1,107 @@
+import os
+import json
+import hashlib
+from typing import Dict, Any, List, Optional, Sequence
+from config.config import config
+
+# 影响用例收集结果的文件：测试用例、conftest、pytest配置、测试数据和配置
+FINGERPRINT_DIRS = ("tests", "data", "config")
+FINGERPRINT_FILES = ("conftest.py", "pytest.ini")
+FINGERPRINT_SUFFIXES = (".py", ".ini", ".csv", ".jsonl", ".ndjson", ".yaml", ".yml", ".json")
+
+
+class CollectionCache:
+    """
+    用例收集结果的缓存，以测试文件和数据文件的内容摘要为键，文件没有变化时直接返回上次收集的节点ID
+    文件摘要按(修改时间, 大小)缓存，未变化的文件不会重新读取
+    只用于parallel_runner在启动工作进程前收集节点ID；pytest不能跨进程复用已收集的用例，串行运行不使用该缓存
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Optional[str] = None, base_dir: Optional[str] = None):
+        """
+        :param cache_file: 缓存文件路径，默认使用配置中的COLLECTION_CACHE_FILE
+        :param base_dir: 项目根目录
+        """
+        self.cache_file = cache_file or config['COLLECTION_CACHE_FILE']
+        self.base_dir = os.path.abspath(base_dir or config['BASE_DIR'])
+        self.files: Dict[str, List[Any]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hashed = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == self.VERSION and data.get("base_dir") == self.base_dir:
+            self.files = data.get("files", {})
+            self.entries = data.get("entries", {})
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_file)), exist_ok=True)
+        tmp_path = f"{self.cache_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "base_dir": self.base_dir,
+                       "files": self.files, "entries": self.entries}, f)
+        os.replace(tmp_path, self.cache_file)
+
+    def _tracked_files(self) -> List[str]:
+        paths = [os.path.join(self.base_dir, name) for name in FINGERPRINT_FILES]
+        for directory in FINGERPRINT_DIRS:
+            for root, dirs, names in os.walk(os.path.join(self.base_dir, directory)):
+                dirs[:] = [d for d in dirs if d != "__pycache__"]
+                paths.extend(os.path.join(root, name) for name in names if name.endswith(FINGERPRINT_SUFFIXES))
+        return sorted(paths)
+
+    def fingerprint(self) -> str:
+        """
+        计算所有相关文件的摘要
+        :return: 摘要
+        """
+        self.hashed = 0
+        digest = hashlib.sha1()
+        files = {}
+        for path in self._tracked_files():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            relpath = os.path.relpath(path, self.base_dir)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            cached = self.files.get(relpath)
+            if cached is not None and cached[:2] == signature:
+                file_hash = cached[2]
+            else:
+                with open(path, "rb") as f:
+                    file_hash = hashlib.file_digest(f, "sha1").hexdigest() if hasattr(hashlib, "file_digest") \
+                        else hashlib.sha1(f.read()).hexdigest()
+                self.hashed += 1
+            files[relpath] = signature + [file_hash]
+            digest.update(f"{relpath}\0{file_hash}\n".encode("utf-8"))
+        self.files = files
+        return digest.hexdigest()
+
+    def get(self, args: Sequence[str] = ()) -> Optional[List[str]]:
+        """
+        查找缓存的收集结果
+        :param args: 收集时使用的pytest参数
+        :return: 节点ID列表，文件有变化或没有缓存时返回None
+        """
+        entry = self.entries.get(" ".join(args))
+        fingerprint = self.fingerprint()
+        if entry is not None and entry["fingerprint"] == fingerprint:
+            return entry["node_ids"]
+        return None
+
+    def put(self, node_ids: List[str], args: Sequence[str] = ()):
+        """
+        保存收集结果
+        :param node_ids: 节点ID列表
+        :param args: 收集时使用的pytest参数
+        """
+        self.entries[" ".join(args)] = {"fingerprint": self.fingerprint(), "node_ids": node_ids}
+        self._save()
@@ -4,23 +4,43 @@ import time
 import requests
 import socket
 import schedule
-import json
+import threading
+from typing import Dict
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.logger import log
 from config.config import config
+from utils.run_summary import load_summary
+from utils.allure_index import AllureResultIndex
+from utils.report_server import ensure_report_server, report_dir
+from utils.notify_queue import NotificationQueue, NotificationError
+from utils.run_history import RunHistory
+
+# 钉钉限流的错误码：发送过于频繁（每分钟超过20条）
+THROTTLED_ERRCODES = {130101}
+
+# 按webhook地址共享的通知队列
+_queues: Dict[str, NotificationQueue] = {}
+_queues_lock = threading.Lock()
 
 
 class DingTalkNotifier:
     """钉钉通知类"""
     
-    def __init__(self):
-        self.webhook_url = "https://oapi.dingtalk.com/robot/send?access_token=994449cdb5a1f9546881a2de6cdcae4f4991f4746a6569a6f8efb6bdc7323361"
+    def __init__(self, detach_server: bool = False, webhook_url: str = None):
+        """
+        :param detach_server: 是否在独立进程中启动报告服务器，本进程发送通知后即退出时设为True
+        :param webhook_url: 机器人webhook地址，默认使用项目的机器人
+        """
+        self.webhook_url = webhook_url or "https://oapi.dingtalk.com/robot/send?access_token=994449cdb5a1f9546881a2de6cdcae4f4991f4746a6569a6f8efb6bdc7323361"
+        self.timeout = config['DINGTALK_TIMEOUT']
         self.keyword = "自动测试"
-        self.report_dir = config['ALLURE_REPORT_DIR']
-        self.port = 8080
+        # 内置HTML报告和Allure命令行生成的报告在不同目录
+        self.report_dir = report_dir()
+        self.port = config['REPORT_SERVER_PORT']
+        self.detach_server = detach_server
     
     def get_local_ip(self) -> str:
         """
@@ -38,9 +58,27 @@ class DingTalkNotifier:
             log.error(f"获取本地IP失败: {str(e)}")
             return "127.0.0.1"
     
-    def send_dingtalk_message(self, message: str):
+    @property
+    def queue(self) -> NotificationQueue:
+        """同一个webhook地址的通知共用一个后台队列，限流对该机器人的所有通知生效"""
+        with _queues_lock:
+            queue = _queues.get(self.webhook_url)
+            if queue is None:
+                queue = NotificationQueue(
+                    self.post_message,
+                    rate_per_minute=config['DINGTALK_RATE_PER_MINUTE'],
+                    burst=config['DINGTALK_BURST'],
+                    batch_max=config['DINGTALK_BATCH_MAX'],
+                    max_retries=config['DINGTALK_MAX_RETRIES'],
+                    max_pending=config['DINGTALK_QUEUE_SIZE'],
+                    name="dingtalk-notify",
+                )
+                _queues[self.webhook_url] = queue
+            return queue
+    
+    def post_message(self, message: str):
         """
-        发送钉钉消息
+        调用webhook发送一条钉钉消息，失败时抛出异常，由通知队列决定是否重试
         :param message: 消息内容
         """
         headers = {
@@ -54,44 +92,58 @@ class DingTalkNotifier:
             }
         }
         
-        try:
-            response = requests.post(self.webhook_url, json=data, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            if result["errcode"] == 0:
-                log.info("钉钉消息发送成功")
-            else:
-                log.error(f"钉钉消息发送失败: {result['errmsg']}")
-        except Exception as e:
-            log.error(f"发送钉钉消息异常: {str(e)}")
+        response = requests.post(self.webhook_url, json=data, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errcode") != 0:
+            errcode = result.get("errcode")
+            raise NotificationError(f"钉钉消息发送失败: {errcode} {result.get('errmsg')}",
+                                    retryable=errcode in THROTTLED_ERRCODES)
+    
+    def send_dingtalk_message(self, message: str) -> bool:
+        """
+        发送钉钉消息：放入后台通知队列后立即返回，由队列限流发送，积压时合并为一条消息
+        :param message: 消息内容
+        :return: 是否放入队列
+        """
+        return self.queue.put(message)
+    
+    def flush(self, timeout: float = 60.0) -> bool:
+        """
+        等待队列中的消息发送完成，本进程即将退出时调用
+        :param timeout: 最长等待时间，单位：秒
+        :return: 是否在超时前完成
+        """
+        return self.queue.flush(timeout)
     
     def start_report_server(self):
         """
-        启动Allure报告HTTP服务器
-        """
-        # 检查是否已有进程在运行
-        import subprocess
-        import psutil
-        
-        # 检查端口是否被占用
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                cmdline = proc.info['cmdline']
-                if cmdline and f"python -m http.server {self.port}" in ' '.join(cmdline):
-                    log.info(f"HTTP服务器已在端口{self.port}运行")
-                    return
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                pass
-        
-        # 启动HTTP服务器
-        log.info(f"启动HTTP服务器，端口: {self.port}")
-        subprocess.Popen(
-            ["python", "-m", "http.server", str(self.port), "--directory", self.report_dir],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        time.sleep(2)  # 等待服务器启动
+        启动报告HTTP服务器：锁文件记录的服务器仍在运行时直接复用，否则启动新的服务器并等待就绪
+        :return: 实际使用的端口
+        """
+        info = ensure_report_server(self.report_dir, self.port, detach=self.detach_server)
+        if info is not None:
+            self.port = info["port"]
+        return self.port
     
+    @staticmethod
+    def _load_run_summary(allure_results_dir):
+        """
+        读取与结果目录匹配的运行汇总，结果目录在汇总写入后有变化时视为过期
+        :param allure_results_dir: Allure结果目录
+        :return: 汇总信息，不可用时返回None
+        """
+        summary_file = config['RUN_SUMMARY_FILE']
+        summary = load_summary(summary_file)
+        if summary is None or summary.get("alluredir") != os.path.abspath(allure_results_dir):
+            return None
+        try:
+            if os.path.getmtime(summary_file) < os.path.getmtime(allure_results_dir):
+                return None
+        except OSError:
+            return None
+        return summary
+
     def get_test_statistics(self):
         """
         获取测试结果统计信息
@@ -112,25 +164,13 @@ class DingTalkNotifier:
         }
         
         try:
-            # 遍历allure结果目录下的json文件
-            for filename in os.listdir(allure_results_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(allure_results_dir, filename)
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    # 检查是否是测试结果文件
-                    if isinstance(data, dict) and data.get('uuid') and data.get('status'):
-                        stats["total"] += 1
-                        status = data["status"]
-                        if status == "passed":
-                            stats["passed"] += 1
-                        elif status == "failed":
-                            stats["failed"] += 1
-                        elif status == "broken":
-                            stats["broken"] += 1
-                        elif status == "skipped":
-                            stats["skipped"] += 1
+            summary = self._load_run_summary(allure_results_dir)
+            if summary is not None:
+                # 直接读取运行结束时写入的汇总文件，无需解析结果目录
+                stats = {key: summary[key] for key in stats}
+            else:
+                # 没有可用的汇总文件时，增量扫描结果目录
+                stats = AllureResultIndex(allure_results_dir, config['ALLURE_INDEX_FILE']).statistics()
             
             log.info(f"测试结果统计: {stats}")
         except Exception as e:
@@ -138,11 +178,37 @@ class DingTalkNotifier:
         
         return stats
     
+    @staticmethod
+    def get_history_message(runs: int = 5, slowest: int = 3) -> str:
+        """
+        从运行历史数据库查询最近运行的结果和本周耗时最长的用例
+        :param runs: 列出最近多少次运行
+        :param slowest: 列出多少个耗时最长的用例
+        :return: 历史信息，没有历史或查询失败时返回空字符串
+        """
+        if not config['RUN_HISTORY_ENABLED'] or not os.path.exists(config['RUN_HISTORY_DB']):
+            return ""
+        try:
+            with RunHistory() as history:
+                recent = history.runs(runs)
+                slow_tests = history.slowest_tests(slowest, days=7)
+        except Exception as e:
+            log.error(f"查询运行历史失败: {str(e)}")
+            return ""
+        if not recent:
+            return ""
+        lines = [f"\n最近{len(recent)}次运行（通过/总数）: "
+                 + " ".join(f"{run['passed']}/{run['total']}" for run in reversed(recent))]
+        if slow_tests:
+            lines.append("本周耗时最长的用例:")
+            lines.extend(f"{test['mean']:.2f}s {test['nodeid']}" for test in slow_tests)
+        return "\n".join(lines)
+    
     def notify_report_url(self):
         """
         发送报告URL通知
         """
-        log.info("开始发送Allure报告URL通知")
+        log.info("开始发送测试报告URL通知")
         
         # 启动报告服务器
         self.start_report_server()
@@ -165,10 +231,10 @@ class DingTalkNotifier:
                        f"跳过: {stats['skipped']}"
         
         # 发送钉钉消息
-        message = f"Allure报告已生成，访问地址: {report_url}{stats_message}"
+        message = f"测试报告已生成，访问地址: {report_url}{stats_message}{self.get_history_message()}"
         self.send_dingtalk_message(message)
         
-        log.info(f"Allure报告URL: {report_url}")
+        log.info(f"测试报告URL: {report_url}")
     
     def schedule_notification(self, interval: int = 60):
         """
@@ -190,26 +256,17 @@ class DingTalkNotifier:
 
 
 if __name__ == "__main__":
-    import subprocess
+    from run_test_schedule import generate_allure_report
     
-    # 生成Allure报告
-    log.info("生成Allure报告")
-    try:
-        # 尝试生成Allure报告
-        subprocess.run(["allure", "generate", config['ALLURE_RESULTS_DIR'], "-o", config['ALLURE_REPORT_DIR'], "--clean"], check=True)
-        log.info("Allure报告生成成功")
-    except FileNotFoundError:
-        log.error("未找到allure命令，请确保已安装Allure并添加到系统PATH中")
-    except subprocess.CalledProcessError as e:
-        log.error(f"生成Allure报告失败: {str(e)}")
-    except Exception as e:
-        log.error(f"生成Allure报告异常: {str(e)}")
+    # 生成测试报告，按REPORT_ENGINE使用内置HTML报告或Allure命令行
+    generate_allure_report()
     
-    # 初始化钉钉通知器
-    notifier = DingTalkNotifier()
+    # 初始化钉钉通知器，本进程发送通知后退出，报告服务器在独立进程中运行
+    notifier = DingTalkNotifier(detach_server=True)
     
-    # 发送一次通知
+    # 发送一次通知，退出前等待通知队列发送完成
     notifier.notify_report_url()
+    notifier.flush()
     
     # 或者设置定时任务
     # notifier.schedule_notification(interval=60)
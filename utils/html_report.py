@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+from html import escape
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+from utils.allure_index import AllureResultIndex
+
+STATUSES = ("passed", "failed", "broken", "skipped")
+STATUS_NAMES = {"passed": "通过", "failed": "失败", "broken": "错误", "skipped": "跳过", "unknown": "未知"}
+STATUS_COLORS = {"passed": "#97cc64", "failed": "#fd5a3e", "broken": "#ffd050", "skipped": "#aaaaaa"}
+
+STYLE = """body{font-family:-apple-system,"Segoe UI","PingFang SC","Microsoft YaHei",sans-serif;margin:0;color:#333}
+nav{background:#343434;padding:10px 20px}nav a{color:#fff;margin-right:20px;text-decoration:none}
+main{padding:20px}table{border-collapse:collapse;width:100%}th,td{border-bottom:1px solid #eee;padding:6px;text-align:left}
+.status{display:inline-block;padding:1px 8px;border-radius:3px;color:#fff}
+.passed{background:#97cc64}.failed{background:#fd5a3e}.broken{background:#ffd050;color:#333}
+.skipped,.unknown{background:#aaa}.cards span{display:inline-block;margin-right:30px;font-size:20px}
+pre{background:#f7f7f7;padding:8px;overflow-x:auto;white-space:pre-wrap}
+"""
+
+
+def _duration(test: Dict[str, Any]) -> float:
+    """用例耗时，单位：秒"""
+    if test.get("start") is None or test.get("stop") is None:
+        return 0.0
+    return round((test["stop"] - test["start"]) / 1000, 3)
+
+
+def _status(status: Optional[str]) -> str:
+    status = status if status in STATUS_NAMES else "unknown"
+    return f'<span class="status {status}">{STATUS_NAMES[status]}</span>'
+
+
+def _counts(tests: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts = {"total": len(tests)}
+    counts.update({status: 0 for status in STATUSES})
+    for test in tests:
+        if test["status"] in counts:
+            counts[test["status"]] += 1
+    return counts
+
+
+def _slug(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+class HtmlReport:
+    """
+    不依赖Allure命令行（JVM）的静态HTML报告：概览、按功能分组、失败用例、耗时排行和历次运行趋势
+    结果文件按Allure结果索引增量解析，每个页面按输入数据的摘要判断是否需要重新渲染
+    """
+
+    VERSION = 1
+    # 耗时排行页面列出的用例数
+    SLOWEST = 100
+
+    def __init__(self, results_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                 trend_runs: Optional[int] = None):
+        """
+        :param results_dir: Allure结果目录，默认使用配置中的ALLURE_RESULTS_DIR
+        :param output_dir: 报告目录，默认使用配置中的HTML_REPORT_DIR
+        :param trend_runs: 趋势图保留的运行数，默认使用配置中的REPORT_TREND_RUNS
+        """
+        self.results_dir = results_dir or config['ALLURE_RESULTS_DIR']
+        self.output_dir = output_dir or config['HTML_REPORT_DIR']
+        self.trend_runs = trend_runs or config['REPORT_TREND_RUNS']
+        self.state_file = os.path.join(self.output_dir, ".report_state.json")
+        self.rendered: List[str] = []
+        self.state: Dict[str, Any] = {"version": self.VERSION, "pages": {}, "history": []}
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == self.VERSION:
+            self.state = data
+
+    def _save_state(self):
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_file)
+
+    def _write(self, page: str, inputs: Any, render: Callable[[], str]):
+        """
+        输入数据的摘要与上次相同且页面文件存在时跳过渲染
+        :param page: 页面相对路径
+        :param inputs: 页面的全部输入数据，可序列化为JSON
+        :param render: 渲染函数
+        """
+        digest = hashlib.sha1(json.dumps(inputs, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+        path = os.path.join(self.output_dir, page)
+        if self.state["pages"].get(page) == digest and os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render())
+        os.replace(tmp_path, path)
+        self.state["pages"][page] = digest
+        self.rendered.append(page)
+
+    @staticmethod
+    def _page(title: str, body: str, root: str = "") -> str:
+        return (f'<!DOCTYPE html><html lang="zh-CN"><head><meta charset="utf-8"><title>{escape(title)}</title>'
+                f'<link rel="stylesheet" href="{root}style.css"></head><body><nav>'
+                f'<a href="{root}index.html">概览</a><a href="{root}features.html">功能</a>'
+                f'<a href="{root}failures.html">失败用例</a><a href="{root}durations.html">耗时排行</a>'
+                f'</nav><main><h1>{escape(title)}</h1>{body}</main></body></html>')
+
+    def _update_history(self, tests: List[Dict[str, Any]], counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        """同一组结果重复生成报告时不增加趋势点"""
+        key = hashlib.sha1(json.dumps(sorted((t["file"], t["status"], t["start"], t["stop"]) for t in tests),
+                                      default=str).encode("utf-8")).hexdigest()
+        history = self.state["history"]
+        if tests and (not history or history[-1]["key"] != key):
+            starts = [t["start"] for t in tests if t.get("start")]
+            stops = [t["stop"] for t in tests if t.get("stop")]
+            history.append({
+                "key": key,
+                "time": max(stops) if stops else None,
+                "counts": counts,
+                "duration": round((max(stops) - min(starts)) / 1000, 3) if starts and stops else 0.0,
+            })
+            del history[:-self.trend_runs]
+        return history
+
+    def generate(self) -> Dict[str, Any]:
+        """
+        生成或增量更新报告
+        :return: 生成信息：页面数、重新渲染的页面数、重新解析的结果文件数
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.rendered = []
+        index = AllureResultIndex(self.results_dir, os.path.join(self.output_dir, ".results_index.json"))
+        tests = [dict(entry, file=name) for name, entry in sorted(index.scan().items()) if entry.get("status")]
+        for test in tests:
+            test["duration"] = _duration(test)
+            test["feature"] = test.get("feature") or "未分组"
+        counts = _counts(tests)
+        history = self._update_history(tests, counts)
+
+        features: Dict[str, List[Dict[str, Any]]] = {}
+        for test in tests:
+            features.setdefault(test["feature"], []).append(test)
+        pages = {"style.css", "index.html", "features.html", "failures.html", "durations.html"}
+
+        self._write("style.css", STYLE, lambda: STYLE)
+        self._write("index.html", {"counts": counts, "history": history},
+                    lambda: self._render_overview(counts, history))
+        feature_rows = [{"feature": name, "slug": _slug(name), "counts": _counts(items),
+                         "duration": round(sum(t["duration"] for t in items), 3)}
+                        for name, items in sorted(features.items())]
+        self._write("features.html", feature_rows, lambda: self._render_features(feature_rows))
+        for row in feature_rows:
+            page = f"features/{row['slug']}.html"
+            pages.add(page)
+            items = [{key: t[key] for key in ("name", "fullName", "story", "status", "duration", "message")}
+                     for t in features[row["feature"]]]
+            self._write(page, [row["feature"], items], lambda: self._render_feature(row["feature"], items))
+        failures = [{key: t[key] for key in ("name", "fullName", "feature", "status", "message", "trace")}
+                    for t in tests if t["status"] in ("failed", "broken")]
+        self._write("failures.html", failures, lambda: self._render_failures(failures))
+        slowest = sorted(({key: t[key] for key in ("name", "fullName", "feature", "status", "duration")}
+                          for t in tests), key=lambda t: -t["duration"])[:self.SLOWEST]
+        self._write("durations.html", slowest, lambda: self._render_durations(slowest))
+
+        # 删除已不存在的功能页面
+        for page in [page for page in self.state["pages"] if page not in pages]:
+            del self.state["pages"][page]
+            try:
+                os.remove(os.path.join(self.output_dir, page))
+            except FileNotFoundError:
+                pass
+        self._save_state()
+        info = {"pages": len(pages), "rendered": len(self.rendered), "parsed": index.parsed,
+                "output_dir": self.output_dir}
+        log.info(f"HTML报告生成完成: {info}")
+        return info
+
+    def _render_overview(self, counts: Dict[str, int], history: List[Dict[str, Any]]) -> str:
+        total = counts["total"]
+        rate = f"{counts['passed'] / total * 100:.1f}%" if total else "-"
+        cards = "".join(f"<span>{STATUS_NAMES[s]}: {counts[s]}</span>" for s in STATUSES)
+        body = f'<div class="cards"><span>总用例数: {total}</span>{cards}<span>通过率: {rate}</span></div>'
+        if history:
+            last = history[-1]
+            run_time = datetime.fromtimestamp(last["time"] / 1000).strftime("%Y-%m-%d %H:%M:%S") if last["time"] else "-"
+            body += f"<p>最近一次运行: {run_time}，耗时 {last['duration']}s</p>"
+            body += "<h2>历次运行趋势</h2>" + self._render_trend(history)
+        return self._page("测试报告", body)
+
+    @staticmethod
+    def _render_trend(history: List[Dict[str, Any]]) -> str:
+        """按运行绘制各状态用例数的堆叠柱状图"""
+        height, width, gap = 160, 24, 8
+        peak = max(run["counts"]["total"] for run in history) or 1
+        bars = []
+        for i, run in enumerate(history):
+            x, y = i * (width + gap), height
+            for status in STATUSES:
+                h = run["counts"][status] / peak * height
+                if h:
+                    y -= h
+                    bars.append(f'<rect x="{x}" y="{y:.1f}" width="{width}" height="{h:.1f}" '
+                                f'fill="{STATUS_COLORS[status]}"><title>{STATUS_NAMES[status]}: '
+                                f'{run["counts"][status]}</title></rect>')
+        return (f'<svg width="{len(history) * (width + gap)}" height="{height}" '
+                f'xmlns="http://www.w3.org/2000/svg">{"".join(bars)}</svg>')
+
+    def _render_features(self, rows: List[Dict[str, Any]]) -> str:
+        header = "".join(f"<th>{STATUS_NAMES[s]}</th>" for s in STATUSES)
+        lines = "".join(
+            f'<tr><td><a href="features/{row["slug"]}.html">{escape(row["feature"])}</a></td>'
+            f'<td>{row["counts"]["total"]}</td>' + "".join(f"<td>{row['counts'][s]}</td>" for s in STATUSES) +
+            f'<td>{row["duration"]}s</td></tr>' for row in rows)
+        return self._page("按功能分组", f"<table><tr><th>功能</th><th>总数</th>{header}<th>耗时</th></tr>{lines}</table>")
+
+    def _render_feature(self, feature: str, items: List[Dict[str, Any]]) -> str:
+        lines = "".join(
+            f'<tr><td title="{escape(t["fullName"] or "")}">{escape(t["name"] or "")}</td>'
+            f'<td>{escape(t["story"] or "")}</td><td>{_status(t["status"])}</td><td>{t["duration"]}s</td>'
+            f'<td>{escape(t["message"])}</td></tr>' for t in items)
+        return self._page(feature, f"<table><tr><th>用例</th><th>场景</th><th>状态</th><th>耗时</th><th>信息</th></tr>"
+                                   f"{lines}</table>", root="../")
+
+    def _render_failures(self, failures: List[Dict[str, Any]]) -> str:
+        if not failures:
+            return self._page("失败用例", "<p>没有失败的用例</p>")
+        body = "".join(
+            f'<h3>{_status(t["status"])} {escape(t["name"] or "")}</h3><p>{escape(t["feature"])} / '
+            f'{escape(t["fullName"] or "")}</p><pre>{escape(t["message"])}\n{escape(t["trace"])}</pre>'
+            for t in failures)
+        return self._page("失败用例", body)
+
+    def _render_durations(self, slowest: List[Dict[str, Any]]) -> str:
+        lines = "".join(
+            f'<tr><td title="{escape(t["fullName"] or "")}">{escape(t["name"] or "")}</td>'
+            f'<td>{escape(t["feature"])}</td><td>{_status(t["status"])}</td><td>{t["duration"]}s</td></tr>'
+            for t in slowest)
+        return self._page("耗时排行", f"<table><tr><th>用例</th><th>功能</th><th>状态</th><th>耗时</th></tr>"
+                                  f"{lines}</table>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据Allure结果生成静态HTML报告，只重新渲染输入有变化的页面")
+    parser.add_argument("--results-dir", help="Allure结果目录，默认使用配置中的ALLURE_RESULTS_DIR")
+    parser.add_argument("--output", help="报告目录，默认使用配置中的HTML_REPORT_DIR")
+    args = parser.parse_args()
+    info = HtmlReport(args.results_dir, args.output).generate()
+    print(json.dumps(info, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import threading
+from typing import Any, Callable
+
+
+class LazySingleton:
+    """
+    延迟创建的单例代理：第一次访问或设置属性时才调用工厂函数创建实例，之后所有属性访问都转发给该实例
+    用于request_handler、log等模块级单例，导入模块（如pytest --collect-only）时不会创建会话或日志文件
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        :param factory: 创建实例的函数
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.RLock())
+
+    @property
+    def initialized(self) -> bool:
+        """实例是否已经创建"""
+        return self._instance is not None
+
+    def _get(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", self._factory())
+                instance = self._instance
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._get(), name)
+
+    def __repr__(self):
+        if self._instance is None:
+            return f"<LazySingleton {getattr(self._factory, '__qualname__', self._factory)} (未创建)>"
+        return repr(self._instance)
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Callable
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+from api.endpoints import endpoints
+from api.metrics import LatencyHistogram
+from data.test_data import test_data
+
+
+class Step:
+    """压测场景中的一个请求步骤"""
+
+    def __init__(self, name: str, method: str, template: str, url: Callable[[random.Random], str],
+                 payload: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.method = method
+        self.template = template
+        self.url = url
+        self.payload = payload
+
+    @property
+    def key(self) -> str:
+        return f"{self.method} {self.template}"
+
+
+# 可用于组合场景的请求步骤，复用Endpoints和TestData
+STEPS: Dict[str, Step] = {
+    "get_users": Step("get_users", "GET", endpoints.USERS, lambda rnd: endpoints.USERS),
+    "get_user": Step("get_user", "GET", endpoints.USER, lambda rnd: endpoints.get_user_endpoint(rnd.randint(1, 10))),
+    "get_posts": Step("get_posts", "GET", endpoints.POSTS, lambda rnd: endpoints.POSTS),
+    "get_post": Step("get_post", "GET", endpoints.POST, lambda rnd: endpoints.get_post_endpoint(rnd.randint(1, 100))),
+    "get_post_comments": Step("get_post_comments", "GET", endpoints.POST_COMMENTS,
+                              lambda rnd: endpoints.get_post_comments_endpoint(rnd.randint(1, 100))),
+    "get_user_albums": Step("get_user_albums", "GET", endpoints.USER_ALBUMS,
+                            lambda rnd: endpoints.get_user_albums_endpoint(rnd.randint(1, 10))),
+    "get_todos": Step("get_todos", "GET", endpoints.TODOS, lambda rnd: endpoints.TODOS),
+    "create_user": Step("create_user", "POST", endpoints.USERS, lambda rnd: endpoints.USERS,
+                        test_data.USER_TEST_DATA["new_user"]),
+    "create_post": Step("create_post", "POST", endpoints.POSTS, lambda rnd: endpoints.POSTS,
+                        test_data.POST_TEST_DATA["new_post"]),
+    "update_post": Step("update_post", "PUT", endpoints.POST, lambda rnd: endpoints.get_post_endpoint(rnd.randint(1, 100)),
+                        test_data.POST_TEST_DATA["update_post"]),
+    "create_todo": Step("create_todo", "POST", endpoints.TODOS, lambda rnd: endpoints.TODOS,
+                        test_data.TODO_TEST_DATA["new_todo"]),
+}
+
+
+def create_load_handler(base_url: Optional[str] = None):
+    """
+    创建压测使用的请求封装实例：关闭响应缓存、请求合并、熔断和重试，延迟直方图中的每个样本都是一次实际发送的请求
+    :param base_url: 目标服务地址，默认使用配置中的BASE_URL
+    :return: 请求封装实例
+    """
+    from api.request_handler import RequestHandler
+    from api.resilience import RetryPolicy
+    handler = RequestHandler()
+    if base_url:
+        handler.base_url = base_url
+    handler.cache = None
+    handler.coalescer = None
+    handler.breakers = None
+    handler.retry = RetryPolicy(0, 0.0, 0.0)
+    return handler
+
+
+class LoadTest:
+    """压测：多个虚拟用户并发循环执行场景，按端点统计吞吐量和延迟分位数"""
+
+    def __init__(self, scenario: List[str], users: int = 10, duration: Optional[float] = None,
+                 iterations: Optional[int] = None, handler=None, seed: int = 0):
+        """
+        :param scenario: 场景步骤名称
+        :param users: 虚拟用户数
+        :param duration: 持续时间，单位：秒
+        :param iterations: 每个虚拟用户执行场景的次数
+        :param handler: 请求封装实例，默认使用create_load_handler()创建；传入的实例应同样关闭熔断和重试，
+                        否则熔断的快速失败计入错误数，重试的耗时计入延迟
+        :param seed: 随机数种子
+        """
+        unknown = [name for name in scenario if name not in STEPS]
+        if unknown:
+            raise ValueError(f"未知的场景步骤: {unknown}，可用步骤: {list(STEPS)}")
+        if duration is None and iterations is None:
+            raise ValueError("duration和iterations至少指定一个")
+        self.scenario = [STEPS[name] for name in scenario]
+        self.users = users
+        self.duration = duration
+        self.iterations = iterations
+        self.seed = seed
+        self._owns_handler = handler is None
+        self.handler = handler or create_load_handler()
+        self._results: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _virtual_user(self, user_index: int, deadline: Optional[float]):
+        rnd = random.Random(self.seed + user_index)
+        histograms: Dict[str, LatencyHistogram] = {}
+        errors: Dict[str, int] = {}
+        iteration = 0
+        while (self.iterations is None or iteration < self.iterations) and \
+                (deadline is None or time.perf_counter() < deadline):
+            for step in self.scenario:
+                call = getattr(self.handler, step.method.lower())
+                url = step.url(rnd)
+                start = time.perf_counter()
+                try:
+                    if step.payload is None:
+                        # 压测需要每个请求都实际发送，不使用响应缓存，也不与其他虚拟用户的相同请求合并
+                        call(url, cache=False, coalesce=False)
+                    else:
+                        call(url, json=step.payload)
+                except Exception:
+                    errors[step.key] = errors.get(step.key, 0) + 1
+                    continue
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                histograms.setdefault(step.key, LatencyHistogram()).record(elapsed_ms)
+            iteration += 1
+        with self._lock:
+            self._results.append({"histograms": histograms, "errors": errors})
+
+    def run(self, quiet: bool = True) -> Dict[str, Any]:
+        """
+        运行压测
+        :param quiet: 为True时压测期间不输出每个请求的日志，避免日志影响延迟
+        :return: 压测报告
+        """
+        log.info(f"开始压测: 场景{[s.name for s in self.scenario]}, 虚拟用户数: {self.users}, "
+                 f"持续时间: {self.duration}, 迭代次数: {self.iterations}")
+        if quiet:
+            log.disable("api.request_handler")
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration is not None else None
+        threads = [threading.Thread(target=self._virtual_user, args=(i, deadline), daemon=True)
+                   for i in range(self.users)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            if quiet:
+                log.enable("api.request_handler")
+            if self._owns_handler:
+                self.handler.close()
+        elapsed = time.perf_counter() - start
+
+        histograms: Dict[str, LatencyHistogram] = {}
+        errors: Dict[str, int] = {}
+        for result in self._results:
+            for key, histogram in result["histograms"].items():
+                histograms.setdefault(key, LatencyHistogram()).merge(histogram)
+            for key, count in result["errors"].items():
+                errors[key] = errors.get(key, 0) + count
+
+        endpoints_report = {}
+        for step in self.scenario:
+            histogram = histograms.get(step.key, LatencyHistogram())
+            summary = histogram.summary()
+            summary["errors"] = errors.get(step.key, 0)
+            summary["throughput"] = round(histogram.count / elapsed, 2) if elapsed else 0.0
+            endpoints_report[step.key] = summary
+
+        total = sum(h.count for h in histograms.values())
+        report = {
+            "scenario": [s.name for s in self.scenario],
+            "users": self.users,
+            "duration": round(elapsed, 3),
+            "requests": total,
+            "errors": sum(errors.values()),
+            "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+            "endpoints": endpoints_report,
+        }
+        log.info(f"压测完成: 请求数: {total}, 吞吐量: {report['throughput']} req/s, 错误数: {report['errors']}")
+        return report
+
+
+def save_report(report: Dict[str, Any], output_dir: Optional[str] = None) -> str:
+    """
+    保存压测报告为JSON文件
+    :param report: 压测报告
+    :param output_dir: 输出目录，默认使用配置中的LOAD_TEST_DIR
+    :return: 报告文件路径
+    """
+    output_dir = output_dir or config['LOAD_TEST_DIR']
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"load_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    log.info(f"压测报告已保存: {path}")
+    return path
+
+
+def attach_report(report: Dict[str, Any]):
+    """
+    将压测报告作为附件添加到当前Allure测试
+    :param report: 压测报告
+    """
+    import allure
+    allure.attach(
+        json.dumps(report, ensure_ascii=False, indent=2),
+        name="压测报告",
+        attachment_type=allure.attachment_type.JSON,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压测：并发虚拟用户循环执行场景")
+    parser.add_argument("--scenario", default=",".join(config['LOAD_TEST_SCENARIO']),
+                        help=f"逗号分隔的步骤名称，可用步骤: {','.join(STEPS)}")
+    parser.add_argument("--users", type=int, default=10, help="虚拟用户数")
+    parser.add_argument("--duration", type=float, help="持续时间，单位：秒")
+    parser.add_argument("--iterations", type=int, help="每个虚拟用户执行场景的次数")
+    parser.add_argument("--base-url", help="目标服务地址，默认使用配置中的BASE_URL")
+    args = parser.parse_args()
+
+    duration = args.duration if args.duration is not None or args.iterations is not None else 30
+
+    load_test = LoadTest(args.scenario.split(","), users=args.users, duration=duration, iterations=args.iterations,
+                         handler=create_load_handler(args.base_url))
+    report = load_test.run()
+    save_report(report)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+
+# 用例索引文件的扩展名，索引与日志文件同名，如 api_test_2024-01-01.log.idx
+INDEX_SUFFIX = ".idx"
+# 压缩后的日志文件扩展名，每个用例的日志区间压缩为一个独立的gzip成员，可以直接解压单个区间
+GZIP_SUFFIX = ".gz"
+# 压缩时的锁文件扩展名，同一个日志文件只由一个进程压缩
+LOCK_SUFFIX = ".lock"
+# 锁文件超过该时间（秒）视为压缩进程已中断
+LOCK_TIMEOUT = 600
+
+# 日志区间：(日志文件路径, 起始偏移, 长度, 是否压缩)
+Span = Tuple[str, int, int, bool]
+
+
+def _read_index(index_path: str) -> List[Tuple[Optional[str], int, Optional[int]]]:
+    """
+    读取索引文件，每行一个区间：{"nodeid": 节点ID, "offset": 起始偏移, "length": 压缩后长度（仅压缩文件）}
+    :return: [(节点ID, 起始偏移, 长度), ...]，未压缩的日志文件长度为None，由下一个区间的起始偏移确定
+    """
+    entries = []
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 进程中断时最后一行可能不完整
+                continue
+            entries.append((entry.get("nodeid"), entry["offset"], entry.get("length")))
+    return entries
+
+
+def _plain_spans(log_path: str, entries) -> List[Tuple[Optional[str], int, int]]:
+    """根据相邻区间的起始偏移计算未压缩日志文件中每个区间的长度，第一个区间之前的内容不属于任何用例"""
+    size = os.path.getsize(log_path)
+    entries = sorted(entries, key=lambda entry: entry[1])
+    if not entries or entries[0][1] > 0:
+        entries.insert(0, (None, 0, None))
+    spans = []
+    for i, (nodeid, offset, _) in enumerate(entries):
+        end = entries[i + 1][1] if i + 1 < len(entries) else size
+        if end > offset:
+            spans.append((nodeid, offset, end - offset))
+    return spans
+
+
+def compress_log(log_path: str, level: int = 6) -> Optional[str]:
+    """
+    压缩日志文件：每个用例的日志区间压缩为一个gzip成员，整个文件仍可以用gzip/zcat直接解压
+    同时写入压缩文件的索引（压缩文件名.idx），之后删除原日志文件和原索引
+    多个进程（如定时任务和它启动的pytest）同时压缩同一个文件时，只有取得锁文件的进程执行压缩
+    :param log_path: 日志文件路径
+    :param level: 压缩级别
+    :return: 压缩文件路径，日志文件不存在（已被其他进程压缩）或其他进程正在压缩时返回None
+    """
+    index_path = f"{log_path}{INDEX_SUFFIX}"
+    gz_path = f"{log_path}{GZIP_SUFFIX}"
+    lock_path = f"{log_path}{LOCK_SUFFIX}"
+    if not _acquire_lock(lock_path):
+        return None
+    tmp_suffix = f".{os.getpid()}.tmp"
+    tmp_paths = (gz_path + tmp_suffix, gz_path + INDEX_SUFFIX + tmp_suffix)
+    try:
+        entries = _read_index(index_path) if os.path.exists(index_path) else []
+        spans = _plain_spans(log_path, entries)
+        with open(log_path, "rb") as src, open(tmp_paths[0], "wb") as dst, \
+                open(tmp_paths[1], "w", encoding="utf-8") as index:
+            for nodeid, offset, length in spans:
+                src.seek(offset)
+                member = gzip.compress(src.read(length), compresslevel=level, mtime=0)
+                index.write(json.dumps({"nodeid": nodeid, "offset": dst.tell(), "length": len(member)},
+                                       ensure_ascii=False) + "\n")
+                dst.write(member)
+        # 先替换索引再替换压缩文件，查询时以压缩文件是否存在为准
+        os.replace(tmp_paths[1], gz_path + INDEX_SUFFIX)
+        os.replace(tmp_paths[0], gz_path)
+    except OSError:
+        # 日志文件在压缩期间被其他进程压缩或清理，删除本进程的临时文件
+        for path in tmp_paths:
+            _remove(path)
+        return None
+    finally:
+        _remove(lock_path)
+    for path in (log_path, index_path):
+        _remove(path)
+    return gz_path
+
+
+def _acquire_lock(lock_path: str) -> bool:
+    """
+    创建锁文件，锁文件已存在且未过期时返回False；进程中断留下的锁文件超过LOCK_TIMEOUT秒后视为过期
+    """
+    try:
+        if time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT:
+            _remove(lock_path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except OSError:
+        return False
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class LogIndex:
+    """
+    按用例节点ID查询日志：只读取各日志文件的索引，再按偏移直接读取对应区间，不扫描日志内容
+    压缩的日志文件按区间解压单个gzip成员
+    """
+
+    def __init__(self, log_dir: Optional[str] = None, pattern: str = "api_test_*.log"):
+        """
+        :param log_dir: 日志目录，默认使用配置中的LOG_DIR
+        :param pattern: 日志文件名模式，同时匹配压缩后的文件
+        """
+        self.log_dir = log_dir or config['LOG_DIR']
+        self.pattern = pattern
+        # 索引文件路径 -> ((修改时间, 大小), {节点ID: [区间, ...]})
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, List[Span]]]] = {}
+
+    def _index_files(self) -> List[str]:
+        compressed = glob.glob(os.path.join(self.log_dir, f"{self.pattern}{GZIP_SUFFIX}{INDEX_SUFFIX}"))
+        done = {path[:-len(GZIP_SUFFIX + INDEX_SUFFIX)] for path in compressed}
+        # 压缩完成到删除原文件之间两者同时存在，只使用压缩文件
+        paths = [path for path in glob.glob(os.path.join(self.log_dir, f"{self.pattern}{INDEX_SUFFIX}"))
+                 if path[:-len(INDEX_SUFFIX)] not in done] + compressed
+        # 文件名中包含日期，按文件名排序即按时间排序
+        return sorted(paths)
+
+    def _load(self, index_path: str) -> Dict[str, List[Span]]:
+        stat = os.stat(index_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(index_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        log_path = index_path[:-len(INDEX_SUFFIX)]
+        compressed = log_path.endswith(GZIP_SUFFIX)
+        entries = _read_index(index_path)
+        if compressed:
+            spans = [(nodeid, offset, length) for nodeid, offset, length in entries]
+        else:
+            spans = _plain_spans(log_path, entries)
+        tests: Dict[str, List[Span]] = {}
+        for nodeid, offset, length in spans:
+            if nodeid is not None:
+                tests.setdefault(nodeid, []).append((log_path, offset, length, compressed))
+        self._cache[index_path] = (signature, tests)
+        return tests
+
+    def _indexes(self):
+        for index_path in self._index_files():
+            try:
+                yield self._load(index_path)
+            except FileNotFoundError:
+                # 查询期间日志文件被压缩或清理
+                continue
+
+    def spans(self, nodeid: str) -> List[Span]:
+        """
+        :param nodeid: 用例节点ID
+        :return: 该用例在各日志文件中的区间，按时间排序
+        """
+        result = []
+        for tests in self._indexes():
+            result.extend(tests.get(nodeid, ()))
+        return result
+
+    def nodeids(self, keyword: str = "") -> List[str]:
+        """
+        :param keyword: 节点ID中包含的关键字，为空时返回全部
+        :return: 有日志的用例节点ID
+        """
+        found = set()
+        for tests in self._indexes():
+            found.update(nodeid for nodeid in tests if keyword in nodeid)
+        return sorted(found)
+
+    def read(self, nodeid: str) -> str:
+        """
+        读取某个用例的全部日志
+        :param nodeid: 用例节点ID
+        :return: 日志文本，没有记录时返回空字符串
+        """
+        chunks = []
+        for log_path, offset, length, compressed in self.spans(nodeid):
+            try:
+                with open(log_path, "rb") as f:
+                    f.seek(offset)
+                    data = f.read(length)
+            except FileNotFoundError:
+                continue
+            chunks.append(gzip.decompress(data) if compressed else data)
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+
+def read_test_log(nodeid: str, log_dir: Optional[str] = None) -> str:
+    """
+    读取某个用例的日志
+    :param nodeid: 用例节点ID
+    :param log_dir: 日志目录，默认使用配置中的LOG_DIR
+    :return: 日志文本
+    """
+    return LogIndex(log_dir).read(nodeid)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="按用例节点ID查询日志")
+    parser.add_argument("nodeid", nargs="?", help="用例节点ID，如 tests/test_sample_api.py::TestUserAPI::test_get_users")
+    parser.add_argument("--list", nargs="?", const="", metavar="KEYWORD", help="列出有日志的用例节点ID，可按关键字过滤")
+    parser.add_argument("--log-dir", help="日志目录，默认使用配置中的LOG_DIR")
+    args = parser.parse_args(argv)
+
+    index = LogIndex(args.log_dir)
+    if args.list is not None:
+        for nodeid in index.nodeids(args.list):
+            print(nodeid)
+        return 0
+    if not args.nodeid:
+        parser.error("需要指定用例节点ID或--list")
+    text = index.read(args.nodeid)
+    if not text:
+        print(f"没有找到用例的日志: {args.nodeid}", file=sys.stderr)
+        return 1
+    sys.stdout.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+from typing import Any, Dict, Optional
+from config.config import config
+from utils.logger import log
+
+
+class LogPolicy:
+    """响应日志策略：按端点控制详细程度，限制响应体日志长度并对大列表抽样"""
+
+    FULL = "full"  # 记录响应体（受长度上限约束）
+    SUMMARY = "summary"  # 只记录类型、长度和抽样元素
+    OFF = "off"  # 不记录响应体
+
+    def __init__(self, max_chars: Optional[int] = None, list_sample: Optional[int] = None,
+                 list_threshold: Optional[int] = None, endpoint_verbosity: Optional[Dict[str, str]] = None):
+        self.max_chars = max_chars if max_chars is not None else config['LOG_BODY_MAX_CHARS']
+        self.list_sample = list_sample if list_sample is not None else config['LOG_LIST_SAMPLE']
+        self.list_threshold = list_threshold if list_threshold is not None else config['LOG_LIST_THRESHOLD']
+        self.endpoint_verbosity = dict(config['LOG_ENDPOINT_VERBOSITY'] if endpoint_verbosity is None else endpoint_verbosity)
+
+    def verbosity(self, template: str) -> str:
+        """
+        获取端点的日志详细程度
+        :param template: 端点模板
+        :return: full、summary或off
+        """
+        return self.endpoint_verbosity.get(template, self.FULL)
+
+    def _truncate(self, text: str) -> str:
+        if self.max_chars and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}...(共{len(text)}字符，已截断)"
+        return text
+
+    def format_body(self, template: str, body: Any) -> str:
+        """
+        格式化响应体用于日志输出，大列表只格式化抽样元素，不会格式化整个响应体
+        :param template: 端点模板
+        :param body: 解析后的响应体
+        :return: 日志文本
+        """
+        verbosity = self.verbosity(template)
+        if verbosity == self.OFF:
+            return "<已省略>"
+        if isinstance(body, list) and (verbosity == self.SUMMARY or len(body) > self.list_threshold):
+            sample = body[:self.list_sample]
+            return self._truncate(f"list[{len(body)}] 抽样前{len(sample)}项: {sample}")
+        if verbosity == self.SUMMARY:
+            keys = list(body.keys()) if isinstance(body, dict) else None
+            return f"{type(body).__name__} 字段: {keys}" if keys is not None else self._truncate(repr(body))
+        return self._truncate(repr(body))
+
+    def log_response(self, prefix: str, template: str, body: Any, depth: int = 1, duration: Optional[float] = None):
+        """
+        延迟格式化并记录响应日志，日志级别被过滤时不会格式化响应体
+        :param prefix: 日志前缀，如 GET请求成功: https://...
+        :param template: 端点模板
+        :param body: 解析后的响应体
+        :param depth: 调用栈深度，使日志位置指向调用方
+        :param duration: 请求耗时，单位：秒，与端点模板一起写入结构化日志的附加字段
+        """
+        logger = log.bind(endpoint=template, duration_ms=None if duration is None else round(duration * 1000, 3))
+        if self.verbosity(template) == self.OFF:
+            logger.opt(depth=depth).info(prefix)
+            return
+        logger.opt(lazy=True, depth=depth).info(
+            "{}, 响应: {}", lambda: prefix, lambda: self.format_body(template, body)
+        )
+
+
+# 导出默认日志策略供其他模块使用
+log_policy = LogPolicy()
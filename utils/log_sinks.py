@@ -0,0 +1,381 @@
+import os
+import sys
+import json
+import time
+import glob
+import queue
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from utils.log_index import INDEX_SUFFIX, compress_log
+
+# 控制台日志级别的颜色，与loguru默认配置一致
+_RESET = "\x1b[0m"
+_LEVEL_COLORS = {
+    "TRACE": "\x1b[36m\x1b[1m", "DEBUG": "\x1b[34m\x1b[1m", "INFO": "\x1b[1m", "SUCCESS": "\x1b[32m\x1b[1m",
+    "WARNING": "\x1b[33m\x1b[1m", "ERROR": "\x1b[31m\x1b[1m", "CRITICAL": "\x1b[41m\x1b[1m",
+}
+
+
+# 还没有开始任何区间的标记，与节点ID为None（用例之外的日志）区分
+_NO_SPAN = object()
+
+
+def _format_exception(record: Dict[str, Any]) -> str:
+    exception = record["exception"]
+    if exception is None:
+        return ""
+    return "".join(traceback.format_exception(exception.type, exception.value, exception.traceback))
+
+
+class LogWriter:
+    """日志输出目标：format_record把loguru的日志记录渲染为文本，队列模式下在后台线程中执行"""
+
+    def __init__(self):
+        self._second = None
+        self._time_text = ""
+
+    def time_text(self, record: Dict[str, Any]) -> str:
+        # 同一秒内的日志复用格式化后的时间
+        moment = record["time"]
+        second = int(moment.timestamp())
+        if second != self._second:
+            self._second, self._time_text = second, moment.strftime("%Y-%m-%d %H:%M:%S")
+        return self._time_text
+
+    def format_record(self, record: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def write(self, text: str):
+        raise NotImplementedError
+
+    def write_records(self, records: List[Dict[str, Any]]):
+        """渲染并写入一批日志记录"""
+        self.write("".join([self.format_record(record) for record in records]))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class StreamWriter(LogWriter):
+    """控制台输出，每次写入时读取sys.stdout，兼容pytest的输出捕获"""
+
+    def __init__(self, colorize: bool = True):
+        super().__init__()
+        self.colorize = colorize
+
+    def format_record(self, record: Dict[str, Any]) -> str:
+        level = record["level"].name
+        if not self.colorize:
+            return (f"{self.time_text(record)} | {level: <8} | {record['name']}:{record['function']}:{record['line']}"
+                    f" - {record['message']}\n{_format_exception(record)}")
+        color = _LEVEL_COLORS.get(level, "\x1b[1m")
+        return (f"\x1b[32m{self.time_text(record)}{_RESET} | {color}{level: <8}{_RESET} | "
+                f"\x1b[36m{record['name']}{_RESET}:\x1b[36m{record['function']}{_RESET}:\x1b[36m{record['line']}{_RESET}"
+                f" - {color}{record['message']}{_RESET}\n{_format_exception(record)}")
+
+    def write(self, text: str):
+        sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class DailyFileWriter(LogWriter):
+    """按天切分的日志文件，文件名如 api_test_2024-01-01.log，超过保留天数的文件在切分时删除"""
+
+    def __init__(self, log_dir: str, prefix: str = "api_test_", suffix: str = ".log", retention_days: int = 7,
+                 indexed: bool = False, compress: bool = False):
+        """
+        :param log_dir: 日志目录
+        :param prefix: 文件名前缀
+        :param suffix: 文件扩展名
+        :param retention_days: 保留天数
+        :param indexed: 是否写入用例索引（日志文件名.idx），记录每个用例的日志在文件中的偏移
+        :param compress: 是否压缩切分前的日志文件
+        """
+        super().__init__()
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.suffix = suffix
+        self.retention_days = retention_days
+        self.indexed = indexed
+        self.compress = compress
+        self.path: Optional[str] = None
+        # 当前日志文件中每个用例的日志区间：节点ID -> [[起始偏移, 结束偏移（进行中为None）], ...]
+        self.spans: Dict[str, List[List[Optional[int]]]] = {}
+        self._file = None
+        self._index = None
+        self._size = 0
+        self._nodeid = _NO_SPAN
+        self._rollover_at = 0.0
+
+    def _open(self, now: float):
+        today = datetime.fromtimestamp(now).date()
+        if self._file is not None:
+            self._close_files()
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.path = os.path.join(self.log_dir, f"{self.prefix}{today:%Y-%m-%d}{self.suffix}")
+        self._file = open(self.path, "ab")
+        self._size = os.fstat(self._file.fileno()).st_size
+        if self.indexed:
+            self._index = open(f"{self.path}{INDEX_SUFFIX}", "a", encoding="utf-8")
+        self._nodeid = _NO_SPAN
+        self.spans = {}
+        self._rollover_at = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        self._remove_expired(now)
+        if self.compress:
+            self._compress_previous(datetime.combine(today, datetime.min.time()).timestamp())
+
+    def _close_files(self):
+        self._file.close()
+        self._file = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        self._rollover_at = 0.0
+
+    def _compress_previous(self, before: float):
+        """在后台线程中压缩今天之前的日志文件，压缩完成前原文件保持可读"""
+        threading.Thread(target=self._compress_files, args=(before,), name="log-compress", daemon=True).start()
+
+    def _compress_files(self, before: float):
+        for path in glob.glob(os.path.join(self.log_dir, f"{self.prefix}*{self.suffix}")):
+            if path == self.path:
+                continue
+            try:
+                if os.path.getmtime(path) < before:
+                    compress_log(path)
+            except OSError:
+                # 文件已被其他进程压缩或清理
+                continue
+
+    def _remove_expired(self, now: float):
+        expire_before = now - self.retention_days * 86400
+        for path in glob.glob(os.path.join(self.log_dir, f"{self.prefix}*{self.suffix}*")):
+            try:
+                if os.path.getmtime(path) < expire_before:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def format_record(self, record: Dict[str, Any]) -> str:
+        return (f"{self.time_text(record)} | {record['level'].name: <8} | "
+                f"{record['name']}:{record['function']}:{record['line']} - {record['message']}\n"
+                f"{_format_exception(record)}")
+
+    def _ensure_open(self):
+        now = time.time()
+        if now >= self._rollover_at:
+            self._open(now)
+
+    def _append(self, text: str):
+        data = text.encode("utf-8")
+        self._file.write(data)
+        self._size += len(data)
+
+    def write(self, text: str):
+        self._ensure_open()
+        self._append(text)
+
+    def _start_span(self, nodeid: Optional[str]):
+        """用例切换时在索引中记录新区间的起始偏移，上一个区间在这里结束"""
+        previous = self.spans.get(self._nodeid)
+        if previous:
+            previous[-1][1] = self._size
+        self._nodeid = nodeid
+        if nodeid is not None:
+            self.spans.setdefault(nodeid, []).append([self._size, None])
+        self._index.write(json.dumps({"nodeid": nodeid, "offset": self._size}, ensure_ascii=False) + "\n")
+
+    def write_records(self, records: List[Dict[str, Any]]):
+        if not self.indexed:
+            super().write_records(records)
+            return
+        self._ensure_open()
+        parts = []
+        for record in records:
+            nodeid = record["extra"].get("nodeid")
+            if nodeid != self._nodeid:
+                if parts:
+                    self._append("".join(parts))
+                    parts = []
+                self._start_span(nodeid)
+            parts.append(self.format_record(record))
+        if parts:
+            self._append("".join(parts))
+
+    def read_test_log(self, nodeid: str) -> str:
+        """
+        读取当前日志文件中某个用例的日志，队列模式下需要先等待日志写入
+        :param nodeid: 用例节点ID
+        :return: 日志文本
+        """
+        spans = self.spans.get(nodeid)
+        if not spans or self._file is None:
+            return ""
+        self._file.flush()
+        chunks = []
+        with open(self.path, "rb") as f:
+            for start, end in spans:
+                f.seek(start)
+                chunks.append(f.read((self._size if end is None else end) - start))
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+        if self._index is not None:
+            self._index.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._close_files()
+
+
+class JsonLinesWriter(DailyFileWriter):
+    """结构化日志：每条日志一行JSON，包含用例节点ID、端点模板和请求耗时等附加字段"""
+
+    def __init__(self, log_dir: str, prefix: str = "api_test_", suffix: str = ".jsonl", retention_days: int = 7,
+                 compress: bool = False):
+        super().__init__(log_dir, prefix, suffix, retention_days, compress=compress)
+
+    def format_record(self, record: Dict[str, Any]) -> str:
+        entry = {"time": round(record["time"].timestamp(), 6), "level": record["level"].name,
+                 "logger": f"{record['name']}:{record['function']}:{record['line']}", "message": record["message"]}
+        entry.update(record["extra"])
+        if record["exception"] is not None:
+            entry["exception"] = _format_exception(record)
+        return json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+
+class SyncSink:
+    """同步输出：在记录日志的线程中渲染并写入所有输出目标"""
+
+    def __init__(self, writers: List[LogWriter]):
+        self.writers = writers
+        self._lock = threading.Lock()
+
+    def __call__(self, message):
+        records = [message.record]
+        with self._lock:
+            for writer in self.writers:
+                writer.write_records(records)
+
+    def flush(self):
+        with self._lock:
+            for writer in self.writers:
+                writer.flush()
+
+    def close(self):
+        with self._lock:
+            for writer in self.writers:
+                writer.close()
+
+
+class _Control:
+    """后台线程的控制消息"""
+
+    def __init__(self, stop: bool = False):
+        self.stop = stop
+        self.done = threading.Event()
+
+
+class QueuedSink:
+    """
+    队列输出：记录日志的线程只把日志记录放入队列，后台线程渲染并批量写入所有输出目标
+    队列中有积压时一次写入多条，空闲或超过刷新间隔时才刷新缓冲区
+    """
+
+    def __init__(self, writers: List[LogWriter], batch_size: int = 256, flush_interval: float = 0.2):
+        """
+        :param writers: 输出目标
+        :param batch_size: 每批最多写入的日志条数
+        :param flush_interval: 有积压时的最长刷新间隔，单位：秒
+        """
+        self.writers = writers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self.written = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message):
+        self._queue.put(message.record)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        if not batch:
+            return
+        for writer in self.writers:
+            try:
+                writer.write_records(batch)
+            except Exception as e:
+                # 写入失败不能影响后台线程，否则之后的日志都会丢失
+                sys.stderr.write(f"日志写入失败: {type(writer).__name__}: {type(e).__name__}: {e}\n")
+        self.batches += 1
+        self.written += len(batch)
+
+    def _flush_writers(self):
+        for writer in self.writers:
+            try:
+                writer.flush()
+            except Exception:
+                pass
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            item = self._queue.get()
+            batch = []
+            control = None
+            while True:
+                if isinstance(item, _Control):
+                    control = item
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write(batch)
+            now = time.monotonic()
+            if control is not None or self._queue.empty() or now - last_flush >= self.flush_interval:
+                self._flush_writers()
+                last_flush = now
+            if control is not None:
+                if control.stop:
+                    for writer in self.writers:
+                        writer.close()
+                control.done.set()
+                if control.stop:
+                    return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        等待队列中已有的日志写入完成
+        :param timeout: 最长等待时间，单位：秒
+        :return: 是否在超时前完成
+        """
+        if self._closed:
+            return True
+        control = _Control()
+        self._queue.put(control)
+        return control.done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        """写入队列中剩余的日志并停止后台线程"""
+        if self._closed:
+            return
+        self._closed = True
+        control = _Control(stop=True)
+        self._queue.put(control)
+        control.done.wait(timeout)
@@ -1,14 +1,26 @@
 import os
+import atexit
 from loguru import logger
 from config.config import config
+from utils.lazy import LazySingleton
+from utils.log_sinks import StreamWriter, DailyFileWriter, JsonLinesWriter, SyncSink, QueuedSink
 
 
 class Logger:
     """日志配置类"""
     
-    def __init__(self):
-        self.log_dir = config['LOG_DIR']
-        self.log_level = config['LOG_LEVEL']
+    def __init__(self, log_dir: str = None, log_level: str = None, queued: bool = None, json_logs: bool = None):
+        """
+        :param log_dir: 日志目录，默认使用配置中的LOG_DIR
+        :param log_level: 日志级别，默认使用配置中的LOG_LEVEL
+        :param queued: 是否使用后台线程批量写入，默认使用配置中的LOG_QUEUE_ENABLED
+        :param json_logs: 是否同时输出JSON Lines结构化日志，默认使用配置中的LOG_JSON_ENABLED
+        """
+        self.log_dir = log_dir or config['LOG_DIR']
+        self.log_level = log_level or config['LOG_LEVEL']
+        self.queued = config['LOG_QUEUE_ENABLED'] if queued is None else queued
+        self.json_logs = config['LOG_JSON_ENABLED'] if json_logs is None else json_logs
+        self.sink = None
         self._setup_logger()
     
     def _setup_logger(self):
@@ -20,27 +32,74 @@ class Logger:
         # 移除默认的控制台输出
         logger.remove()
         
-        # 配置控制台输出
-        logger.add(
-            sink=lambda msg: print(msg, end=""),
-            level=self.log_level,
-            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-            colorize=True
-        )
+        # 并行运行时每个工作进程写入自己的日志文件，用例索引中的偏移才不会被其他进程的写入打乱
+        worker_id = os.getenv('PYTEST_WORKER_ID')
+        prefix = f"api_test_worker{worker_id}_" if worker_id is not None else "api_test_"
+        compress = config['LOG_COMPRESS_ROTATED']
+        # 文件输出，每天0点创建新日志文件，保留7天日志；同时写入用例索引，按节点ID记录日志在文件中的偏移
+        self.file_writer = DailyFileWriter(self.log_dir, prefix, ".log", retention_days=7,
+                                           indexed=True, compress=compress)
+        writers = [
+            # 控制台输出
+            StreamWriter(colorize=True),
+            self.file_writer,
+        ]
+        # 结构化日志输出，附加字段（用例节点ID、端点模板、耗时）写入JSON
+        if self.json_logs:
+            writers.append(JsonLinesWriter(self.log_dir, prefix, ".jsonl", retention_days=7, compress=compress))
         
-        # 配置文件输出
-        logger.add(
-            sink=os.path.join(self.log_dir, "api_test_{time:YYYY-MM-DD}.log"),
-            level=self.log_level,
-            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-            rotation="00:00",  # 每天0点创建新日志文件
-            retention="7 days",  # 保留7天日志
-            encoding="utf-8"
-        )
-
-
-# 初始化日志实例
-logger_instance = Logger()
-
-# 导出logger供其他模块使用
-log = logger
+        # 所有输出目标共用一个loguru处理器，由输出目标自行渲染日志记录；队列模式下渲染和写入都在后台线程中执行
+        if self.queued:
+            self.sink = QueuedSink(writers, config['LOG_BATCH_SIZE'], config['LOG_FLUSH_INTERVAL'])
+        else:
+            self.sink = SyncSink(writers)
+        logger.add(sink=self.sink, level=self.log_level, format="{message}")
+        atexit.register(self.close)
+    
+    def flush(self):
+        """等待已记录的日志全部写入"""
+        self.sink.flush()
+    
+    def close(self):
+        """写入剩余日志并关闭日志文件"""
+        self.sink.close()
+    
+    def read_test_log(self, nodeid: str) -> str:
+        """
+        读取本进程当前日志文件中某个用例的日志
+        :param nodeid: 用例节点ID
+        :return: 日志文本
+        """
+        self.flush()
+        return self.file_writer.read_test_log(nodeid)
+
+
+# 日志配置实例，第一次记录日志时创建
+logger_instance = None
+
+
+def _create_logger():
+    global logger_instance
+    logger_instance = Logger()
+    return logger
+
+
+def flush_logs():
+    """等待已记录的日志全部写入，队列模式下在读取日志文件前调用"""
+    if logger_instance is not None:
+        logger_instance.flush()
+
+
+def read_test_log(nodeid: str) -> str:
+    """
+    读取本进程中某个用例已记录的日志，用于把日志添加到Allure报告；查询历史日志使用utils.log_index
+    :param nodeid: 用例节点ID
+    :return: 日志文本，还没有记录日志时返回空字符串
+    """
+    if logger_instance is None:
+        return ""
+    return logger_instance.read_test_log(nodeid)
+
+
+# 导出logger供其他模块使用，第一次记录日志时才配置输出，导入本模块不会创建日志目录和日志文件
+log = LazySingleton(_create_logger)
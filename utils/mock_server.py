@@ -0,0 +1,369 @@
+import json
+import socket
+import random
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qsl
+from typing import Dict, Any, List, Optional, Tuple
+from api.routes import ROUTES
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore "
+          "et dolore magna aliqua enim ad minim veniam quis nostrud exercitation ullamco laboris nisi").split()
+
+# 资源集合之间的父子关系：子资源 -> (父资源, 子资源中指向父资源的字段)
+PARENTS = {
+    "posts": ("users", "userId"),
+    "albums": ("users", "userId"),
+    "todos": ("users", "userId"),
+    "comments": ("posts", "postId"),
+    "photos": ("albums", "albumId"),
+}
+
+_BAD_REQUEST_BODY = b'{"error":"malformed request"}'
+_BAD_REQUEST = (b"HTTP/1.1 400 Bad Request\r\nContent-Type: application/json; charset=utf-8\r\n"
+                b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(_BAD_REQUEST_BODY)) + _BAD_REQUEST_BODY
+
+_REASONS = {200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+            404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class MockDataset:
+    """模拟jsonplaceholder数据集：按种子生成，结构与jsonplaceholder一致，各集合在首次访问时生成"""
+
+    def __init__(self, users: int = 10, posts_per_user: int = 10, comments_per_post: int = 5,
+                 albums_per_user: int = 10, photos_per_album: int = 50, todos_per_user: int = 20, seed: int = 0):
+        self.sizes = {
+            "users": users,
+            "posts": posts_per_user,
+            "comments": comments_per_post,
+            "albums": albums_per_user,
+            "todos": todos_per_user,
+            "photos": photos_per_album,
+        }
+        self.seed = seed
+        self._collections: Dict[str, List[Dict[str, Any]]] = {}
+        self._indexes: Dict[Tuple[str, str], Dict[Any, List[Dict[str, Any]]]] = {}
+        # 生成子资源时会先生成父资源，需要可重入锁
+        self._lock = threading.RLock()
+
+    def _text(self, rnd: random.Random, words: int) -> str:
+        return " ".join(rnd.choice(_WORDS) for _ in range(words))
+
+    def _make(self, name: str, item_id: int, parent_id: Optional[int], rnd: random.Random) -> Dict[str, Any]:
+        if name == "users":
+            return {
+                "id": item_id, "name": f"User {item_id}", "username": f"user{item_id}",
+                "email": f"user{item_id}@example.com",
+                "address": {
+                    "street": f"{self._text(rnd, 2).title()} St", "suite": f"Apt. {rnd.randint(1, 999)}",
+                    "city": self._text(rnd, 1).title(), "zipcode": f"{rnd.randint(10000, 99999)}",
+                    "geo": {"lat": f"{rnd.uniform(-90, 90):.4f}", "lng": f"{rnd.uniform(-180, 180):.4f}"},
+                },
+                "phone": f"{rnd.randint(100, 999)}-{rnd.randint(100, 999)}-{rnd.randint(1000, 9999)}",
+                "website": f"user{item_id}.example.com",
+                "company": {"name": f"Company {item_id}", "catchPhrase": self._text(rnd, 3), "bs": self._text(rnd, 3)},
+            }
+        if name == "posts":
+            return {"userId": parent_id, "id": item_id, "title": self._text(rnd, 5), "body": self._text(rnd, 20)}
+        if name == "comments":
+            return {"postId": parent_id, "id": item_id, "name": self._text(rnd, 4),
+                    "email": f"commenter{item_id}@example.com", "body": self._text(rnd, 15)}
+        if name == "albums":
+            return {"userId": parent_id, "id": item_id, "title": self._text(rnd, 4)}
+        if name == "photos":
+            color = f"{rnd.randrange(0x1000000):06x}"
+            return {"albumId": parent_id, "id": item_id, "title": self._text(rnd, 5),
+                    "url": f"https://via.placeholder.com/600/{color}",
+                    "thumbnailUrl": f"https://via.placeholder.com/150/{color}"}
+        return {"userId": parent_id, "id": item_id, "title": self._text(rnd, 5), "completed": rnd.random() < 0.5}
+
+    def collection(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        获取资源集合
+        :param name: 资源名称
+        :return: 资源列表，id从1开始连续编号；未知资源返回None
+        """
+        if name not in self.sizes:
+            return None
+        items = self._collections.get(name)
+        if items is not None:
+            return items
+        with self._lock:
+            if name in self._collections:
+                return self._collections[name]
+            rnd = random.Random(f"{self.seed}:{name}")
+            if name in PARENTS:
+                parent, _ = PARENTS[name]
+                parents = len(self.collection(parent))
+                per_parent = self.sizes[name]
+                items = [self._make(name, (p - 1) * per_parent + n, p, rnd)
+                         for p in range(1, parents + 1) for n in range(1, per_parent + 1)]
+            else:
+                items = [self._make(name, i, None, rnd) for i in range(1, self.sizes[name] + 1)]
+            self._collections[name] = items
+            return items
+
+    def get(self, name: str, item_id: int) -> Optional[Dict[str, Any]]:
+        """
+        按id获取资源
+        :return: 资源，不存在时返回None
+        """
+        items = self.collection(name)
+        if items is None or not 1 <= item_id <= len(items):
+            return None
+        return items[item_id - 1]
+
+    def filter(self, name: str, field: str, value: str) -> List[Dict[str, Any]]:
+        """
+        按字段值筛选资源，每个字段的索引在首次筛选时建立
+        :param name: 资源名称
+        :param field: 字段名，如 userId
+        :param value: 字段值（查询参数中的字符串）
+        :return: 资源列表
+        """
+        key = (name, field)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for item in self.collection(name) or []:
+                index.setdefault(str(item.get(field)).lower(), []).append(item)
+            self._indexes[key] = index
+        return index.get(value.lower(), [])
+
+
+def _parse_route(template: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    解析端点模板
+    :param template: 如 /users/{user_id}/posts
+    :return: (资源名称, id参数名, 父资源名称)，如 ("posts", None, "users")
+    """
+    parts = template.strip("/").split("/")
+    if len(parts) == 3:
+        return parts[2], None, parts[0]
+    return parts[0], (parts[1][1:-1] if len(parts) == 2 else None), None
+
+
+class MockServer:
+    """
+    基于asyncio的本地模拟jsonplaceholder服务器，实现Endpoints中的所有端点：
+    GET返回集合（支持查询参数筛选）、单个资源或嵌套集合；POST/PUT/PATCH/DELETE按jsonplaceholder的语义返回请求体，
+    不修改数据；无效id返回404。可注入延迟和错误率
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, dataset: MockDataset = None,
+                 error_rate: float = 0.0, seed: int = 0, response_cache_size: int = 1024):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.dataset = dataset or MockDataset(seed=seed)
+        self.requests = 0
+        # 最近一次请求的方法、路径和请求头（小写），供测试检查客户端发送的内容
+        self.last_request: Optional[Dict[str, Any]] = None
+        self._rnd = random.Random(seed)
+        self._routes = [(pattern, _parse_route(template)) for template, pattern in ROUTES.items()]
+        self._responses: "OrderedDict[str, Tuple[int, bytes, str]]" = OrderedDict()
+        self._response_cache_size = response_cache_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._writers = set()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _match(self, path: str):
+        for pattern, route in self._routes:
+            match = pattern.match(path)
+            if match:
+                return route, match.groupdict()
+        return None, None
+
+    def _get(self, target: str) -> Tuple[int, bytes, str]:
+        """处理GET请求，编码后的响应按请求路径缓存"""
+        cached = self._responses.get(target)
+        if cached is not None:
+            return cached
+        parts = urlsplit(target)
+        route, params = self._match(parts.path)
+        if route is None:
+            status, body = 404, {}
+        else:
+            status, body = self._read(route, params, parse_qsl(parts.query))
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        response = (status, payload, f'W/"{hashlib.sha1(payload).hexdigest()}"')
+        self._responses[target] = response
+        if len(self._responses) > self._response_cache_size:
+            self._responses.popitem(last=False)
+        return response
+
+    def _read(self, route, params: Dict[str, str], query: List[Tuple[str, str]]) -> Tuple[int, Any]:
+        name, id_param, parent = route
+        dataset = self.dataset
+        if id_param is not None:
+            item = dataset.get(name, self._int(params[id_param]))
+            return (200, item) if item is not None else (404, {})
+        if parent is not None:
+            parent_id = self._int(next(iter(params.values())))
+            if dataset.get(parent, parent_id) is None:
+                return 404, {}
+            items = dataset.filter(name, PARENTS[name][1], str(parent_id))
+        else:
+            items = dataset.collection(name)
+        for field, value in query:
+            # 与jsonplaceholder一致，查询参数按字段值筛选，第一个条件使用索引
+            if parent is None and items is dataset.collection(name):
+                items = dataset.filter(name, field, value)
+            else:
+                items = [item for item in items if str(item.get(field)).lower() == value.lower()]
+        return 200, items
+
+    def _write(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        route, params = self._match(urlsplit(target).path)
+        if route is None:
+            return 404, {}
+        name, id_param, parent = route
+        content_type = headers.get("content-type", "")
+        try:
+            payload = json.loads(body) if body and content_type.startswith("application/json") else {}
+        except ValueError:
+            return 400, {"error": "invalid json"}
+        if not isinstance(payload, dict):
+            payload = {"body": payload}
+
+        if method == "POST":
+            if id_param is not None:
+                return 404, {}
+            if parent is not None:
+                parent_id = self._int(next(iter(params.values())))
+                if self.dataset.get(parent, parent_id) is None:
+                    return 404, {}
+                payload[PARENTS[name][1]] = parent_id
+            # 与jsonplaceholder一致：返回请求体和新的id，数据不会真正保存；非JSON请求体（如文件上传）只返回id
+            payload["id"] = len(self.dataset.collection(name)) + 1
+            return 201, payload
+
+        if id_param is None:
+            return 405, {}
+        item_id = self._int(params[id_param])
+        item = self.dataset.get(name, item_id)
+        if item is None:
+            return 404, {}
+        if method == "DELETE":
+            return 200, {}
+        if method == "PATCH":
+            return 200, {**item, **payload, "id": item_id}
+        return 200, {**payload, "id": item_id}
+
+    @staticmethod
+    def _int(value: str) -> int:
+        return int(value) if value.isdigit() else -1
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> bytes:
+        self.requests += 1
+        self.last_request = {"method": method, "target": target, "headers": headers}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        etag = None
+        if self.error_rate and self._rnd.random() < self.error_rate:
+            status, payload = 500, b'{"error":"injected"}'
+        elif method in ("GET", "HEAD"):
+            status, payload, etag = self._get(target)
+            if status != 200:
+                etag = None
+            elif headers.get("if-none-match") == etag:
+                status, payload = 304, b""
+        elif method in ("POST", "PUT", "PATCH", "DELETE"):
+            status, result = self._write(method, target, headers, body)
+            payload = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        else:
+            status, payload = 405, b"{}"
+
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        if status != 304:
+            lines.append("Content-Type: application/json; charset=utf-8")
+        if etag:
+            lines.append(f"ETag: {etag}")
+        lines.append(f"Content-Length: {len(payload) if status != 304 else 0}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        return head if method == "HEAD" or status == 304 else head + payload
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # 请求行或Content-Length无效时无法确定请求边界，返回400后关闭连接
+                    writer.write(_BAD_REQUEST)
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+                writer.write(await self._respond(method, target, headers, body))
+                await writer.drain()
+                if version != "HTTP/1.1" or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def start(self) -> "MockServer":
+        """
+        在后台线程的事件循环中启动服务器
+        :return: 服务器实例
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=1024), self._loop)
+        self._server = future.result(timeout=10)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        """
+        停止服务器并关闭所有连接
+        """
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,191 @@
+import time
+import atexit
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+import requests
+from utils.logger import log
+from api.resilience import RetryPolicy
+
+
+class NotificationError(Exception):
+    """通知发送失败，retryable表示是否值得重试（如被限流、服务端错误）"""
+
+    def __init__(self, message: str, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    判断发送失败是否重试：连接错误、超时、429和5xx重试，其他错误（如关键词不匹配）重试也不会成功
+    :param exc: 发送时抛出的异常
+    :return: 是否重试
+    """
+    if isinstance(exc, NotificationError):
+        return exc.retryable
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+class TokenBucket:
+    """令牌桶限流：按固定速率补充令牌，桶满时最多允许capacity次突发发送"""
+
+    def __init__(self, rate_per_minute: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        """
+        :param rate_per_minute: 每分钟补充的令牌数
+        :param capacity: 桶容量
+        :param clock: 时钟函数
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        尝试取出一个令牌
+        :return: 0表示已取出，否则为需要等待的时间，单位：秒
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        """等待直到取出一个令牌"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class NotificationQueue:
+    """
+    后台通知队列：put只把消息放入队列后立即返回，后台线程按令牌桶速率发送
+    等待令牌期间积压的消息合并为一条发送，发送失败时按指数退避有限次重试
+    """
+
+    def __init__(self, send: Callable[[str], None], rate_per_minute: float = 18, burst: int = 2, batch_max: int = 10,
+                 max_retries: int = 3, max_pending: int = 100, retry_policy: Optional[RetryPolicy] = None,
+                 name: str = "notify"):
+        """
+        :param send: 发送函数，失败时抛出异常
+        :param rate_per_minute: 每分钟补充的发送次数，任意一分钟内最多发送rate_per_minute + burst次
+        :param burst: 允许的突发发送次数（令牌桶容量）
+        :param batch_max: 每次最多合并的消息数
+        :param max_retries: 每条消息的最大重试次数
+        :param max_pending: 队列中最多积压的消息数，超过时丢弃最早的消息
+        :param retry_policy: 重试退避策略，默认首次退避上限1秒、最大30秒
+        :param name: 后台线程名称
+        """
+        self.send = send
+        self.bucket = TokenBucket(rate_per_minute, capacity=burst)
+        self.batch_max = batch_max
+        self.max_pending = max_pending
+        self.retry_policy = retry_policy or RetryPolicy(max_retries, backoff=1.0, max_backoff=30.0)
+        self.stats = {"queued": 0, "sent": 0, "requests": 0, "batched": 0, "retries": 0, "failed": 0, "dropped": 0}
+        self._pending: deque = deque()
+        self._inflight = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, message: str) -> bool:
+        """
+        放入一条消息，不等待发送
+        :param message: 消息内容
+        :return: 是否放入，队列已关闭时返回False
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.stats["dropped"] += 1
+                log.warning(f"通知队列已满（{self.max_pending}条），丢弃最早的一条消息")
+            self._pending.append(message)
+            self.stats["queued"] += 1
+            self._cond.notify_all()
+        return True
+
+    @staticmethod
+    def combine(batch: List[str]) -> str:
+        """把积压的多条消息合并为一条"""
+        if len(batch) == 1:
+            return batch[0]
+        return f"合并{len(batch)}条通知:\n" + "\n\n----------\n\n".join(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # 等待令牌期间到达的消息会和当前消息一起合并发送
+            self.bucket.acquire()
+            with self._cond:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_max, len(self._pending)))]
+                self._inflight = len(batch)
+            try:
+                self._deliver(batch)
+            finally:
+                with self._cond:
+                    self._inflight = 0
+                    self._cond.notify_all()
+
+    def _deliver(self, batch: List[str]):
+        text = self.combine(batch)
+        attempt = 0
+        while True:
+            self.stats["requests"] += 1
+            try:
+                self.send(text)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.retry_policy.max_retries:
+                    self.stats["failed"] += len(batch)
+                    log.error(f"通知发送失败（已重试{attempt}次），丢弃{len(batch)}条消息: {type(e).__name__}: {e}")
+                    return
+                delay = self.retry_policy.delay(attempt)
+                log.warning(f"通知发送失败，{delay:.2f}秒后重试: {type(e).__name__}: {e}")
+                time.sleep(delay)
+                attempt += 1
+                self.stats["retries"] += 1
+                self.bucket.acquire()
+                continue
+            self.stats["sent"] += len(batch)
+            if len(batch) > 1:
+                self.stats["batched"] += len(batch)
+            log.info(f"通知发送成功，包含{len(batch)}条消息")
+            return
+
+    def flush(self, timeout: float = 60.0) -> bool:
+        """
+        等待已放入的消息全部处理完成（发送成功或放弃）
+        :param timeout: 最长等待时间，单位：秒
+        :return: 是否在超时前完成
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self, timeout: float = 10.0):
+        """停止接收新消息，在超时时间内发送剩余消息后停止后台线程"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
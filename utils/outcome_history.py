@@ -0,0 +1,134 @@
+import os
+import json
+from typing import Dict, Any, List, Optional
+import requests
+from config.config import config
+from utils.logger import log
+
+# 视为环境故障（而不是用例本身失败）的异常
+OUTAGE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class OutcomeHistory:
+    """按节点ID保存最近若干次运行的结果和耗时，用于调整用例执行顺序"""
+
+    def __init__(self, path: Optional[str] = None, failed_runs: Optional[int] = None,
+                 retention_runs: Optional[int] = None):
+        """
+        :param path: 历史文件路径，默认使用配置中的TEST_HISTORY_FILE
+        :param failed_runs: 失败后在多少次运行内视为最近失败
+        :param retention_runs: 超过多少次运行没有执行的用例从历史中删除
+        """
+        self.path = path or config['TEST_HISTORY_FILE']
+        self.failed_runs = failed_runs or config['TEST_HISTORY_FAILED_RUNS']
+        self.retention_runs = retention_runs or config['TEST_HISTORY_RETENTION_RUNS']
+        self.run = 0
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.run, self.tests = data["run"], data["tests"]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning(f"读取用例历史失败，将重新记录: {self.path}, 错误: {str(e)}")
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run": self.run, "tests": self.tests}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def update(self, tests: Dict[str, Dict[str, Any]]):
+        """
+        记录一次运行的结果
+        :param tests: 节点ID到{"status", "duration"}的映射，即运行汇总中的tests
+        """
+        self.run += 1
+        for nodeid, result in tests.items():
+            entry = self.tests.get(nodeid)
+            if entry is None:
+                entry = self.tests[nodeid] = {"duration": result["duration"], "failed_run": None}
+            elif result["status"] != "skipped":
+                # 指数加权平均，平滑单次运行的网络抖动
+                entry["duration"] = round((entry["duration"] + result["duration"]) / 2, 6)
+            entry["status"] = result["status"]
+            entry["seen_run"] = self.run
+            if result["status"] in ("failed", "broken"):
+                entry["failed_run"] = self.run
+        expired = [nodeid for nodeid, entry in self.tests.items()
+                   if self.run - entry["seen_run"] >= self.retention_runs]
+        for nodeid in expired:
+            del self.tests[nodeid]
+
+    def recently_failed(self, nodeid: str) -> bool:
+        entry = self.tests.get(nodeid)
+        return entry is not None and entry["failed_run"] is not None \
+            and self.run - entry["failed_run"] < self.failed_runs
+
+    def order(self, nodeids: List[str]) -> List[str]:
+        """
+        排序：最近失败的用例在前，其余按历史耗时从长到短；没有历史的用例按耗时中位数处理
+        排序是稳定的，条件相同的用例保持收集顺序
+        :param nodeids: 节点ID列表
+        :return: 排序后的节点ID列表
+        """
+        known = sorted(entry["duration"] for entry in self.tests.values())
+        default = known[len(known) // 2] if known else 0.0
+
+        def key(nodeid):
+            entry = self.tests.get(nodeid)
+            return not self.recently_failed(nodeid), -(entry["duration"] if entry else default)
+
+        return sorted(nodeids, key=key)
+
+
+class OutageDetector:
+    """连续出现环境故障（连接失败、超时、熔断、5xx）时提前结束运行"""
+
+    def __init__(self, threshold: int):
+        """
+        :param threshold: 连续多少个用例因环境故障失败时停止，0表示不启用
+        """
+        self.threshold = threshold
+        self.consecutive = 0
+        self._counted = None
+
+    @staticmethod
+    def is_outage(call) -> bool:
+        if call.excinfo is None:
+            return False
+        exc = call.excinfo.value
+        if isinstance(exc, OUTAGE_ERRORS):
+            return True
+        response = getattr(exc, "response", None)
+        return isinstance(exc, requests.exceptions.HTTPError) and response is not None \
+            and response.status_code >= 500
+
+    def observe(self, report, call) -> Optional[str]:
+        """
+        记录用例某个阶段的结果
+        :param report: pytest的TestReport
+        :param call: pytest的CallInfo
+        :return: 需要停止运行时返回原因，否则返回None
+        """
+        if not self.threshold:
+            return None
+        if report.failed:
+            if not self.is_outage(call):
+                self.consecutive = 0
+                return None
+            # 同一个用例的多个阶段只计一次
+            if report.nodeid == self._counted:
+                return None
+            self._counted = report.nodeid
+            self.consecutive += 1
+            if self.consecutive >= self.threshold:
+                return f"连续{self.consecutive}个用例因环境故障失败，最后一次: {call.excinfo.typename}"
+        elif report.when == "call" and report.passed:
+            self.consecutive = 0
+        return None
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import heapq
+import shutil
+import argparse
+import tempfile
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+from utils.run_summary import summary_path, merge_summaries
+from utils.outcome_history import OutcomeHistory
+from utils.run_history import new_run_key
+from utils.collection_cache import CollectionCache
+from api.cassette import cassette_path, merge_cassettes
+
+# 没有历史耗时的测试用例使用的默认耗时，单位：秒
+DEFAULT_DURATION = 1.0
+
+
+def node_id_to_full_name(node_id: str) -> str:
+    """
+    将pytest节点ID转换为Allure结果中的fullName
+    :param node_id: 如 tests/test_sample_api.py::TestUserAPI::test_get_user[1]
+    :return: 如 tests.test_sample_api.TestUserAPI#test_get_user
+    """
+    parts = node_id.split("[", 1)[0].split("::")
+    module = parts[0][:-3] if parts[0].endswith(".py") else parts[0]
+    module = module.replace("/", ".").replace("\\", ".")
+    return f"{'.'.join([module] + parts[1:-1])}#{parts[-1]}"
+
+
+def group_key(node_id: str) -> str:
+    """
+    获取测试用例所属的分组（测试类，即@allure.feature所在的类），没有类的用例按模块分组
+    :param node_id: pytest节点ID
+    :return: 分组键
+    """
+    parts = node_id.split("[", 1)[0].split("::")
+    return "::".join(parts[:-1]) if len(parts) > 2 else parts[0]
+
+
+def collect_node_ids(use_cache: bool = True) -> List[str]:
+    """
+    收集所有测试用例的节点ID；测试文件和数据文件都没有变化时使用上次的收集结果，不再启动pytest
+    :param use_cache: 是否使用收集缓存
+    :return: 节点ID列表
+    """
+    cache = CollectionCache() if use_cache else None
+    if cache is not None:
+        node_ids = cache.get()
+        if node_ids is not None:
+            log.info(f"测试文件没有变化，使用缓存的收集结果: {len(node_ids)}个用例")
+            return node_ids
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", "-o", "addopts=", "-p", "no:cacheprovider"],
+        capture_output=True,
+        text=True,
+        cwd=config['BASE_DIR'],
+    )
+    node_ids = [line.strip() for line in result.stdout.splitlines() if "::" in line]
+    if cache is not None and result.returncode == 0:
+        cache.put(node_ids)
+    return node_ids
+
+
+def load_durations(results_dir: str, durations_file: str) -> Dict[str, float]:
+    """
+    加载历史耗时：先读取持久化的耗时文件，再用上次运行的Allure结果覆盖
+    :param results_dir: Allure结果目录
+    :param durations_file: 持久化的耗时文件
+    :return: fullName到平均耗时（秒）的映射
+    """
+    durations = {}
+    if os.path.exists(durations_file):
+        try:
+            with open(durations_file, "r", encoding="utf-8") as f:
+                durations.update(json.load(f))
+        except (OSError, ValueError) as e:
+            log.warning(f"读取历史耗时文件失败: {durations_file}, 错误: {str(e)}")
+
+    samples: Dict[str, List[float]] = {}
+    if os.path.isdir(results_dir):
+        for filename in os.listdir(results_dir):
+            if not filename.endswith("-result.json"):
+                continue
+            try:
+                with open(os.path.join(results_dir, filename), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                duration = (data["stop"] - data["start"]) / 1000
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            samples.setdefault(data.get("fullName", ""), []).append(duration)
+    for full_name, values in samples.items():
+        durations[full_name] = sum(values) / len(values)
+    return durations
+
+
+def plan_workers(node_ids: List[str], durations: Dict[str, float], workers: int) -> List[Tuple[float, List[str]]]:
+    """
+    按测试类分组，并用最长处理时间优先（LPT）算法把分组分配给各个工作进程
+    :param node_ids: 节点ID列表
+    :param durations: 历史耗时
+    :param workers: 工作进程数
+    :return: 每个工作进程的(预计耗时, 节点ID列表)
+    """
+    known = sorted(durations.values())
+    default = known[len(known) // 2] if known else DEFAULT_DURATION
+
+    groups: "OrderedDict[str, List[str]]" = OrderedDict()
+    for node_id in node_ids:
+        groups.setdefault(group_key(node_id), []).append(node_id)
+    weighted = [
+        (sum(durations.get(node_id_to_full_name(n), default) for n in members), key, members)
+        for key, members in groups.items()
+    ]
+    weighted.sort(key=lambda g: g[0], reverse=True)
+
+    heap = [(0.0, i, []) for i in range(max(workers, 1))]
+    for cost, _, members in weighted:
+        load, i, assigned = heapq.heappop(heap)
+        heapq.heappush(heap, (load + cost, i, assigned + members))
+    return [(load, assigned) for load, _, assigned in sorted(heap, key=lambda w: w[1]) if assigned]
+
+
+def save_durations(results_dir: str, durations_file: str):
+    """
+    持久化本次运行的耗时，供下次运行分配负载
+    """
+    durations = load_durations(results_dir, durations_file)
+    os.makedirs(os.path.dirname(durations_file), exist_ok=True)
+    with open(durations_file, "w", encoding="utf-8") as f:
+        json.dump(durations, f, ensure_ascii=False, indent=2)
+
+
+def read_tail(path: str, size: int = 2000) -> str:
+    """
+    读取文件末尾
+    :param path: 文件路径
+    :param size: 读取的字节数
+    :return: 文件末尾的内容
+    """
+    with open(path, "rb") as f:
+        f.seek(max(os.path.getsize(path) - size, 0))
+        return f.read().decode("utf-8", errors="replace")
+
+
+def run_parallel(workers: int, node_ids: List[str] = None) -> bool:
+    """
+    在多个工作进程中并行运行测试，每个进程使用独立的RequestHandler会话，结果写入同一个Allure结果目录
+    :param workers: 工作进程数
+    :param node_ids: 要运行的节点ID，默认收集全部用例
+    :return: 所有工作进程是否都运行成功
+    """
+    results_dir = config['ALLURE_RESULTS_DIR']
+    durations_file = config['TEST_DURATIONS_FILE']
+
+    # 清理结果目录前先读取上次运行的耗时
+    durations = load_durations(results_dir, durations_file)
+    node_ids = node_ids if node_ids is not None else collect_node_ids()
+    plan = plan_workers(node_ids, durations, workers)
+    log.info(f"并行运行{len(node_ids)}个测试用例，工作进程数: {len(plan)}")
+
+    shutil.rmtree(results_dir, ignore_errors=True)
+    os.makedirs(results_dir, exist_ok=True)
+
+    processes = []
+    # 各工作进程把结果写入运行历史数据库中的同一次运行
+    run_key = new_run_key()
+    # 节点ID写入文件，避免用例较多时命令行超过系统长度限制；输出写入各自的文件，避免管道写满后阻塞
+    node_ids_dir = tempfile.mkdtemp(prefix="parallel_runner_")
+    log_dir = os.path.join(config['BASE_DIR'], 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    try:
+        for i, (estimate, assigned) in enumerate(plan):
+            log.info(f"工作进程{i}: {len(assigned)}个用例，预计耗时: {estimate:.2f}s")
+            node_ids_file = os.path.join(node_ids_dir, f"worker{i}.txt")
+            with open(node_ids_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(assigned))
+            # 只收集分配到的测试文件，再按节点ID文件筛选
+            paths = sorted({node_id.split("::", 1)[0] for node_id in assigned})
+            cmd = [
+                sys.executable, "-m", "pytest", "-p", "no:cacheprovider",
+                "-o", "addopts=-v",
+                "-o", f"log_file=logs/pytest_worker{i}.log",
+                f"--alluredir={results_dir}",
+                f"--node-ids-file={node_ids_file}",
+            ] + paths
+            env = dict(os.environ, PYTEST_WORKER_ID=str(i), TEST_RUN_ID=run_key)
+            output_file = os.path.join(log_dir, f"pytest_worker{i}.out")
+            with open(output_file, "w", encoding="utf-8") as output:
+                processes.append((subprocess.Popen(
+                    cmd, cwd=config['BASE_DIR'], env=env, stdout=output, stderr=subprocess.STDOUT,
+                ), output_file))
+
+        success = True
+        for i, (process, output_file) in enumerate(processes):
+            process.wait()
+            # 退出码1表示存在失败用例，其他非0退出码表示运行异常（如收集出错、内部错误、被中断）
+            if process.returncode == 0:
+                log.info(f"工作进程{i}运行成功")
+            elif process.returncode == 1:
+                success = False
+                log.warning(f"工作进程{i}存在失败的用例，完整输出: {output_file}")
+            else:
+                success = False
+                log.error(f"工作进程{i}运行异常，退出码: {process.returncode}，完整输出: {output_file}\n"
+                          f"输出: {read_tail(output_file)}")
+    finally:
+        shutil.rmtree(node_ids_dir, ignore_errors=True)
+
+    if config['CASSETTE_MODE'].lower() == 'record':
+        # 各工作进程录制到独立的文件，合并为一个录制文件供回放使用
+        path = cassette_path()
+        count = merge_cassettes([cassette_path(worker_id=str(i)) for i in range(len(processes))], path)
+        log.info(f"已合并各工作进程的录制文件: {path}, 记录数: {count}")
+
+    worker_summaries = [summary_path(str(i)) for i in range(len(processes))]
+    save_durations(results_dir, durations_file)
+    # 合并各工作进程的运行汇总
+    merged = merge_summaries(worker_summaries, config['RUN_SUMMARY_FILE'])
+    if merged["tests"]:
+        history = OutcomeHistory()
+        history.update(merged["tests"])
+        history.save()
+    for path in worker_summaries:
+        if os.path.exists(path):
+            os.remove(path)
+    return success
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按历史耗时均衡负载，并行运行测试")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="工作进程数")
+    args = parser.parse_args()
+
+    success = run_parallel(args.workers)
+
+    from utils.dingtalk_notifier import DingTalkNotifier
+    stats = DingTalkNotifier().get_test_statistics()
+    log.info(f"并行测试完成，结果: {'成功' if success else '失败'}，统计: {stats}")
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
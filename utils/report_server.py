@@ -0,0 +1,480 @@
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import mimetypes
+import posixpath
+import signal
+import threading
+import subprocess
+import http.client
+from collections import OrderedDict
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+
+try:
+    import brotli
+except ImportError:
+    # 未安装brotli时只使用gzip，已预压缩的.br文件仍可直接返回
+    brotli = None
+
+# 压缩后返回的文件类型，图片和字体本身已经压缩
+COMPRESSIBLE_SUFFIXES = (".html", ".htm", ".js", ".css", ".json", ".svg", ".txt", ".csv", ".xml", ".map")
+# 小于该大小的文件不压缩
+MIN_COMPRESS_SIZE = 1024
+# 就绪检查的路径，返回服务器的PID和根目录
+HEALTH_PATH = "/__health"
+# 页面和数据文件每次都用ETag验证，其他静态资源缓存1小时
+REVALIDATE_SUFFIXES = (".html", ".htm", ".json", ".csv", ".txt")
+
+
+class _CompressedCache:
+    """按(路径, 修改时间, 大小, 编码)缓存压缩后的文件内容，超过容量时淘汰最早的条目"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result, encoding: str) -> bytes:
+        key = (path, stat.st_mtime_ns, stat.st_size, encoding)
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+                return body
+        with open(path, "rb") as f:
+            data = f.read()
+        body = brotli.compress(data) if encoding == "br" else gzip.compress(data, compresslevel=6, mtime=0)
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = body
+                self.size += len(body)
+            while self.size > self.max_bytes and len(self._items) > 1:
+                self.size -= len(self._items.popitem(last=False)[1])
+        return body
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """报告静态文件处理：预压缩或内存缓存的gzip/brotli、ETag协商缓存、Range请求，未压缩的文件使用sendfile发送"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "ReportServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _resolve(self, url_path: str) -> Optional[str]:
+        """把URL路径映射到根目录下的文件，超出根目录时返回None"""
+        root = self.server.root
+        path = posixpath.normpath(unquote(url_path)).lstrip("/")
+        full = os.path.realpath(os.path.join(root, path))
+        if full != root and not full.startswith(root + os.sep):
+            return None
+        return full
+
+    def _send_empty(self, status: int, headers: Dict[str, str] = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _accepted_encodings(self) -> set:
+        accepted = set()
+        for token in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, params = token.strip().partition(";")
+            if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+                accepted.add(name.lower())
+        return accepted
+
+    def _choose_encoding(self, path: str, stat: os.stat_result) -> Tuple[Optional[str], Optional[str]]:
+        """
+        :return: (内容编码, 预压缩文件路径)；预压缩文件不存在或比原文件旧时使用内存缓存压缩
+        """
+        if not path.endswith(COMPRESSIBLE_SUFFIXES) or stat.st_size < MIN_COMPRESS_SIZE:
+            return None, None
+        accepted = self._accepted_encodings()
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding not in accepted:
+                continue
+            sibling = path + suffix
+            try:
+                if os.stat(sibling).st_mtime_ns >= stat.st_mtime_ns:
+                    return encoding, sibling
+            except OSError:
+                pass
+            if encoding == "gzip" or brotli is not None:
+                return encoding, None
+        return None, None
+
+    @staticmethod
+    def _parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+        """
+        解析单个字节区间，多个区间时返回None（按完整文件响应）
+        :return: (起始偏移, 结束偏移（包含）)，区间无法满足时返回(-1, -1)
+        """
+        unit, _, ranges = value.partition("=")
+        if unit.strip() != "bytes" or "," in ranges:
+            return None
+        start, _, end = ranges.strip().partition("-")
+        try:
+            if start:
+                first, last = int(start), int(end) if end else size - 1
+            else:
+                first, last = max(size - int(end), 0), size - 1
+        except ValueError:
+            return None
+        if first >= size or first > last:
+            return -1, -1
+        return first, min(last, size - 1)
+
+    def _serve(self, head: bool):
+        url_path = urlsplit(self.path).path
+        if url_path == HEALTH_PATH:
+            body = json.dumps({"pid": os.getpid(), "root": self.server.root}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+            return
+
+        path = self._resolve(url_path)
+        if path is not None and os.path.isdir(path):
+            if not url_path.endswith("/"):
+                # 目录需要以/结尾，页面中的相对路径才能正确解析
+                self._send_empty(301, {"Location": url_path + "/"})
+                return
+            path = os.path.join(path, "index.html")
+        try:
+            stat = os.stat(path) if path is not None else None
+        except OSError:
+            stat = None
+        if stat is None or not os.path.isfile(path):
+            self._send_empty(404)
+            return
+
+        encoding, sibling = (None, None) if "Range" in self.headers else self._choose_encoding(path, stat)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/json", "application/javascript"):
+            content_type += "; charset=utf-8"
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": "no-cache" if path.endswith(REVALIDATE_SUFFIXES) else "public, max-age=3600",
+            "Vary": "Accept-Encoding",
+            "Accept-Ranges": "bytes",
+        }
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self._send_empty(304, headers)
+            return
+
+        status, offset, length = 200, 0, stat.st_size
+        if "Range" in self.headers:
+            byte_range = self._parse_range(self.headers["Range"], stat.st_size)
+            if byte_range == (-1, -1):
+                self._send_empty(416, {"Content-Range": f"bytes */{stat.st_size}"})
+                return
+            if byte_range is not None:
+                status, offset, length = 206, byte_range[0], byte_range[1] - byte_range[0] + 1
+                headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{stat.st_size}"
+
+        body = None
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            if sibling is None:
+                body = self.server.cache.get(path, stat, encoding)
+                length = len(body)
+            else:
+                path, length = sibling, os.path.getsize(sibling)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if head:
+            return
+        if body is not None:
+            self.wfile.write(body)
+            return
+        with open(path, "rb") as f:
+            self.connection.sendfile(f, offset, length)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, root: str):
+        self.root = os.path.realpath(root)
+        self.cache = _CompressedCache()
+        super().__init__(address, ReportRequestHandler)
+
+
+def _probe_host(host: str) -> str:
+    return "127.0.0.1" if host in ("", "0.0.0.0") else host
+
+
+def probe(host: str, port: int, timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+    """
+    就绪检查：请求健康检查路径
+    :return: 服务器的PID和根目录，端口未监听或不是报告服务器时返回None
+    """
+    connection = http.client.HTTPConnection(_probe_host(host), port, timeout=timeout)
+    try:
+        connection.request("GET", HEALTH_PATH)
+        response = connection.getresponse()
+        if response.status != 200:
+            return None
+        return json.loads(response.read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        connection.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def find_running(root: Optional[str] = None, lock_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    根据锁文件查找正在运行的报告服务器，进程已退出、端口不可用或根目录不同时视为没有运行
+    :param root: 报告目录，为None时不比较
+    :param lock_file: 锁文件，默认使用配置中的REPORT_SERVER_LOCK_FILE
+    :return: 锁文件中的服务器信息（pid、host、port、root）
+    """
+    try:
+        with open(lock_file or config['REPORT_SERVER_LOCK_FILE'], "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not _pid_alive(info.get("pid", -1)):
+        return None
+    health = probe(info["host"], info["port"])
+    if health is None or health["pid"] != info["pid"]:
+        return None
+    if root is not None and health["root"] != os.path.realpath(root):
+        return None
+    return info
+
+
+class ReportServer:
+    """
+    进程内的多线程报告静态文件服务器，启动后通过健康检查确认就绪，并把PID和端口写入锁文件
+    """
+
+    def __init__(self, root: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None,
+                 lock_file: Optional[str] = None):
+        """
+        :param root: 报告目录，默认为当前使用的报告目录
+        :param host: 监听地址，默认使用配置中的REPORT_SERVER_HOST
+        :param port: 端口，0表示随机端口，默认使用配置中的REPORT_SERVER_PORT
+        :param lock_file: 锁文件，默认使用配置中的REPORT_SERVER_LOCK_FILE
+        """
+        self.root = root or report_dir()
+        self.host = config['REPORT_SERVER_HOST'] if host is None else host
+        self.port = config['REPORT_SERVER_PORT'] if port is None else port
+        self.lock_file = lock_file or config['REPORT_SERVER_LOCK_FILE']
+        self._server: Optional[_HTTPServer] = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{_probe_host(self.host)}:{self.port}"
+
+    def start(self, timeout: float = 5.0) -> "ReportServer":
+        """
+        在后台线程中启动服务器，就绪后写入锁文件
+        :param timeout: 等待就绪的最长时间，单位：秒
+        :return: 服务器实例
+        """
+        os.makedirs(self.root, exist_ok=True)
+        self._server = _HTTPServer((self.host, self.port), self.root)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.1},
+                                        name="report-server", daemon=True)
+        self._thread.start()
+        if not self.wait_ready(timeout):
+            self.stop()
+            raise RuntimeError(f"报告服务器未在{timeout}秒内就绪: {self.url}")
+        self._write_lock()
+        log.info(f"报告服务器已启动: {self.url}，目录: {self.root}")
+        return self
+
+    def wait_ready(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if probe(self.host, self.port, timeout=0.5) is not None:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def _write_lock(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_file)), exist_ok=True)
+        tmp_path = f"{self.lock_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"pid": os.getpid(), "host": self.host, "port": self.port,
+                       "root": self._server.root, "started": round(time.time(), 3)}, f)
+        os.replace(tmp_path, self.lock_file)
+
+    def stop(self):
+        """停止服务器，锁文件属于本进程时删除"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            with open(self.lock_file, "r", encoding="utf-8") as f:
+                owner = json.load(f).get("pid")
+            if owner == os.getpid():
+                os.remove(self.lock_file)
+        except (OSError, ValueError):
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def report_dir() -> str:
+    """当前报告生成方式对应的报告目录"""
+    return config['ALLURE_REPORT_DIR'] if config['REPORT_ENGINE'] == 'allure' else config['HTML_REPORT_DIR']
+
+
+# 本进程中启动的报告服务器
+_embedded: Optional[ReportServer] = None
+
+
+def ensure_report_server(root: Optional[str] = None, port: Optional[int] = None, detach: bool = False,
+                         timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+    """
+    确保报告服务器在运行：锁文件指向的服务器仍可用时直接复用，否则启动新的服务器
+    :param root: 报告目录，默认为当前使用的报告目录
+    :param port: 端口，默认使用配置中的REPORT_SERVER_PORT
+    :param detach: 为True时在独立进程中启动（调用进程即将退出时使用），否则在本进程的后台线程中启动
+    :param timeout: 等待就绪的最长时间，单位：秒
+    :return: 服务器信息（pid、host、port、root），启动失败时返回None
+    """
+    global _embedded
+    root = root or report_dir()
+    running = find_running(root)
+    if running is not None:
+        log.info(f"报告服务器已在端口{running['port']}运行，PID: {running['pid']}")
+        return running
+    port = config['REPORT_SERVER_PORT'] if port is None else port
+    if not detach:
+        if _embedded is not None:
+            _embedded.stop()
+        try:
+            _embedded = ReportServer(root, port=port).start(timeout)
+        except (OSError, RuntimeError) as e:
+            log.error(f"启动报告服务器失败: {str(e)}")
+            _embedded = None
+            return None
+        return find_running(root)
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--root", root, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        running = find_running(root)
+        if running is not None:
+            log.info(f"报告服务器已在独立进程中启动，端口: {running['port']}，PID: {running['pid']}")
+            return running
+        time.sleep(0.05)
+    log.error(f"报告服务器未在{timeout}秒内就绪，端口: {port}")
+    return None
+
+
+def precompress(root: Optional[str] = None, min_size: int = MIN_COMPRESS_SIZE) -> int:
+    """
+    为报告目录中的文本文件生成.gz（安装了brotli时同时生成.br）预压缩文件，已是最新的文件跳过
+    :param root: 报告目录，默认为当前使用的报告目录
+    :param min_size: 小于该大小的文件不压缩
+    :return: 生成的预压缩文件数
+    """
+    written = 0
+    encoders = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", brotli.compress))
+    for directory, _, names in os.walk(root or report_dir()):
+        for name in names:
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            if stat.st_size < min_size:
+                continue
+            data = None
+            for suffix, encode in encoders:
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                with open(target, "wb") as f:
+                    f.write(encode(data))
+                written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="报告静态文件服务器")
+    parser.add_argument("--root", help="报告目录，默认为当前使用的报告目录")
+    parser.add_argument("--host", help="监听地址，默认使用配置中的REPORT_SERVER_HOST")
+    parser.add_argument("--port", type=int, help="端口，默认使用配置中的REPORT_SERVER_PORT")
+    parser.add_argument("--precompress", action="store_true", help="启动前为文本文件生成预压缩文件")
+    args = parser.parse_args()
+
+    if args.precompress:
+        log.info(f"生成预压缩文件: {precompress(args.root)}个")
+    server = ReportServer(args.root, args.host, args.port).start()
+    # 收到终止信号时正常退出，删除锁文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
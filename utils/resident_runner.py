@@ -0,0 +1,201 @@
+import os
+import sys
+import site
+import time
+import sysconfig
+import argparse
+import subprocess
+from typing import Dict, Any, List, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logger import log
+from config.config import config
+
+# 常驻进程中保留的项目模块：配置和日志，以及需要跨轮保留的通知队列（后台线程、webhook限流）和本进程启动的报告服务器
+RESIDENT_MODULES = ("config", "config.config", "utils", "utils.logger", "utils.resident_runner", "run_test_schedule",
+                    "utils.notify_queue", "utils.dingtalk_notifier", "utils.report_server")
+
+# 每轮定时任务原本需要启动的Python解释器：pytest和钉钉通知脚本
+SPAWNED_INTERPRETERS = 2
+
+# 冷启动时导入的依赖；pytest插件（如allure_pytest）由第一轮pytest自行导入，提前导入会跳过断言重写
+WARM_IMPORTS = ("pytest", "requests", "allure", "loguru", "schedule")
+
+
+def measure_cold_start(base_dir: str = None) -> float:
+    """
+    测量启动一个新Python解释器并导入依赖、初始化日志的耗时
+    :param base_dir: 项目根目录
+    :return: 耗时，单位：秒
+    """
+    code = f"import {', '.join(WARM_IMPORTS)}; from utils.logger import log; log.bind()"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=base_dir or config['BASE_DIR'],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def library_dirs(base_dir: str) -> List[str]:
+    """
+    获取解释器和第三方库的安装目录，项目目录下的虚拟环境（.venv、venv）也在其中
+    :param base_dir: 项目根目录，项目目录本身所在的安装目录不计入
+    :return: 目录列表
+    """
+    dirs = {sys.prefix, sys.base_prefix, sys.exec_prefix}
+    dirs.update(sysconfig.get_paths().values())
+    try:
+        dirs.update(site.getsitepackages())
+        dirs.add(site.getusersitepackages())
+    except AttributeError:
+        # 部分虚拟环境中的site模块没有这些函数
+        pass
+    base_dir = os.path.abspath(base_dir)
+    return [os.path.abspath(d) for d in dirs
+            if d and not (base_dir + os.sep).startswith(os.path.abspath(d) + os.sep)]
+
+
+def purge_project_modules(base_dir: str, keep=RESIDENT_MODULES) -> List[str]:
+    """
+    从sys.modules中移除项目模块（测试用例、conftest、请求封装等），下一轮运行时重新导入，保证每轮的模块状态相互隔离
+    项目目录下虚拟环境中的第三方库（pytest、requests、loguru等）不会被移除
+    :param base_dir: 项目根目录，只移除该目录下的模块
+    :param keep: 保留的模块名
+    :return: 被移除的模块名
+    """
+    base_dir = os.path.abspath(base_dir)
+    excluded = tuple(d + os.sep for d in library_dirs(base_dir))
+    purged = []
+    for name, module in list(sys.modules.items()):
+        if name in keep or name == "__main__":
+            continue
+        path = getattr(module, "__file__", None)
+        if not path:
+            continue
+        path = os.path.abspath(path)
+        if path.startswith(base_dir + os.sep) and not path.startswith(excluded):
+            del sys.modules[name]
+            purged.append(name)
+    return purged
+
+
+class ResidentRunner:
+    """常驻运行器：在保持预热的解释器中直接调用pytest，并在同一进程中生成报告和发送通知"""
+
+    def __init__(self, pytest_args: Optional[List[str]] = None, base_dir: str = None,
+                 generate_report: bool = True, notify: bool = True, archive: bool = True):
+        self.pytest_args = list(pytest_args or [])
+        self.base_dir = base_dir or config['BASE_DIR']
+        self.generate_report = generate_report
+        self.notify = notify
+        self.archive = archive
+        self.cold_start: Optional[float] = None
+        self.cycles = 0
+
+    def warm_up(self) -> float:
+        """
+        预先导入依赖，并测量一次冷启动耗时作为节省耗时的基准
+        :return: 在当前进程中导入依赖的耗时，单位：秒
+        """
+        start = time.perf_counter()
+        for name in WARM_IMPORTS:
+            __import__(name)
+        elapsed = time.perf_counter() - start
+        self.cold_start = measure_cold_start(self.base_dir)
+        log.info(f"常驻运行器预热完成，导入耗时: {elapsed:.3f}s，新解释器冷启动耗时: {self.cold_start:.3f}s")
+        return elapsed
+
+    def run_tests(self) -> int:
+        """
+        在当前进程中运行一轮pytest
+        :return: pytest退出码
+        """
+        import pytest
+        purged = purge_project_modules(self.base_dir)
+        log.debug(f"已移除{len(purged)}个项目模块，本轮重新导入")
+        cwd = os.getcwd()
+        os.chdir(self.base_dir)
+        try:
+            return int(pytest.main(self.pytest_args))
+        finally:
+            os.chdir(cwd)
+
+    def run_cycle(self) -> Dict[str, Any]:
+        """
+        运行一轮：测试、生成Allure报告、发送钉钉通知、归档Allure结果
+        :return: 本轮运行信息
+        """
+        if self.cold_start is None:
+            self.warm_up()
+        self.cycles += 1
+        log.info(f"=== 常驻运行器第{self.cycles}轮 ===")
+
+        start = time.perf_counter()
+        exit_code = self.run_tests()
+        tests_duration = time.perf_counter() - start
+        log.info(f"测试运行{'成功' if exit_code == 0 else '失败'}，退出码: {exit_code}，耗时: {tests_duration:.2f}s")
+
+        report_generated = False
+        if self.generate_report:
+            from run_test_schedule import generate_allure_report
+            report_generated = generate_allure_report()
+
+        notified = False
+        if self.notify:
+            from utils.dingtalk_notifier import DingTalkNotifier
+            try:
+                DingTalkNotifier().notify_report_url()
+                notified = True
+            except Exception as e:
+                log.error(f"钉钉通知发送异常: {str(e)}")
+
+        archived = False
+        if self.archive:
+            from run_test_schedule import archive_allure_results
+            archived = archive_allure_results()
+
+        # 估算值：预热时测得的一次冷启动耗时乘以本轮未启动的解释器数，并非本轮实际测量
+        saved = self.cold_start * SPAWNED_INTERPRETERS
+        log.info(f"本轮估计节省启动和导入耗时约{saved:.2f}s（按未启动{SPAWNED_INTERPRETERS}个Python解释器、"
+                 f"预热时测得的冷启动耗时{self.cold_start:.2f}s估算）")
+        return {
+            "cycle": self.cycles,
+            "exit_code": exit_code,
+            "tests_duration": round(tests_duration, 3),
+            "report_generated": report_generated,
+            "notified": notified,
+            "archived": archived,
+            "startup_saved_estimate": round(saved, 3),
+        }
+
+    def serve(self, interval: int = 60):
+        """
+        立即运行一轮，之后按间隔定时运行
+        :param interval: 时间间隔，单位：分钟
+        """
+        import schedule
+        log.info(f"=== 启动常驻运行器，每{interval}分钟运行一次 ===")
+        self.run_cycle()
+        schedule.every(interval).minutes.do(self.run_cycle)
+        while True:
+            schedule.run_pending()
+            time.sleep(60)  # 每分钟检查一次
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻运行器：在同一进程中定时运行测试、生成报告并发送通知")
+    parser.add_argument("--interval", type=int, default=60, help="时间间隔，单位：分钟")
+    parser.add_argument("--once", action="store_true", help="只运行一轮")
+    parser.add_argument("--no-notify", action="store_true", help="不发送钉钉通知")
+    args, pytest_args = parser.parse_known_args()
+
+    runner = ResidentRunner(pytest_args, notify=not args.no_notify)
+    if args.once:
+        result = runner.run_cycle()
+        sys.exit(0 if result["exit_code"] == 0 else 1)
+    runner.serve(args.interval)
+
+
+if __name__ == "__main__":
+    main()
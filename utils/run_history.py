@@ -0,0 +1,363 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_key TEXT NOT NULL UNIQUE,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    passed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    broken INTEGER NOT NULL DEFAULT 0,
+    skipped INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started);
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    nodeid TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    PRIMARY KEY (run_id, nodeid)
+);
+CREATE INDEX IF NOT EXISTS idx_test_results_nodeid ON test_results (nodeid, run_id);
+CREATE TABLE IF NOT EXISTS request_latencies (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    method TEXT NOT NULL,
+    template TEXT NOT NULL,
+    nodeid TEXT,
+    status INTEGER,
+    total_ms REAL NOT NULL,
+    ttfb_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_request_latencies_template ON request_latencies (template, run_id, total_ms);
+CREATE INDEX IF NOT EXISTS idx_request_latencies_run ON request_latencies (run_id);
+"""
+
+# 请求耗时记录：(节点ID, 请求方法, 端点模板, 状态码, 总耗时毫秒, 首字节耗时毫秒)
+LatencyRow = Tuple[Optional[str], str, str, Optional[int], float, float]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    最近秩法计算分位数
+    :param values: 已从小到大排序的数值
+    :param pct: 分位数，如95
+    :return: 分位数值，没有数据时返回0
+    """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[min(int(rank), len(values)) - 1]
+
+
+def split_endpoint(endpoint: str) -> Tuple[Optional[str], str]:
+    """
+    :param endpoint: 端点模板，可以带请求方法，如 "/posts/{post_id}" 或 "GET /posts/{post_id}"
+    :return: (请求方法，未指定时为None, 端点模板)
+    """
+    method, _, template = endpoint.partition(" ")
+    if template and method.isupper():
+        return method, template
+    return None, endpoint
+
+
+class RunHistory:
+    """
+    运行历史数据库：每次运行的用例结果、耗时和按端点模板的请求耗时保存在本地SQLite中，跨运行查询趋势
+    使用WAL模式，并行运行时各工作进程可以同时写入同一次运行
+    """
+
+    def __init__(self, path: Optional[str] = None, keep_runs: Optional[int] = None,
+                 max_age_days: Optional[float] = None):
+        """
+        :param path: 数据库文件路径，默认使用配置中的RUN_HISTORY_DB
+        :param keep_runs: 保留的运行数，0表示不限制，默认使用配置中的RUN_HISTORY_KEEP_RUNS
+        :param max_age_days: 保留的天数，0表示不限制，默认使用配置中的RUN_HISTORY_MAX_AGE_DAYS
+        """
+        self.path = path or config['RUN_HISTORY_DB']
+        self.keep_runs = config['RUN_HISTORY_KEEP_RUNS'] if keep_runs is None else keep_runs
+        self.max_age_days = config['RUN_HISTORY_MAX_AGE_DAYS'] if max_age_days is None else max_age_days
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record_run(self, run_key: str, tests: Dict[str, Dict[str, Any]], latencies: Iterable[LatencyRow] = (),
+                   started: Optional[float] = None, finished: Optional[float] = None) -> int:
+        """
+        记录一次运行，同一个run_key多次写入（如并行运行的各工作进程）合并为一次运行
+        :param run_key: 运行标识
+        :param tests: 节点ID到{"status", "duration"}的映射，即运行汇总中的tests
+        :param latencies: 请求耗时记录
+        :param started: 开始时间戳
+        :param finished: 结束时间戳
+        :return: 运行ID
+        """
+        finished = finished or time.time()
+        started = started or finished
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_key, started, finished) VALUES (?, ?, ?) "
+                "ON CONFLICT (run_key) DO UPDATE SET started = MIN(started, excluded.started), "
+                "finished = MAX(finished, excluded.finished)",
+                (run_key, started, finished),
+            )
+            run_id = self.conn.execute("SELECT id FROM runs WHERE run_key = ?", (run_key,)).fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO test_results (run_id, nodeid, status, duration) VALUES (?, ?, ?, ?)",
+                ((run_id, nodeid, test["status"], test["duration"]) for nodeid, test in tests.items()),
+            )
+            self.conn.executemany(
+                "INSERT INTO request_latencies (run_id, nodeid, method, template, status, total_ms, ttfb_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((run_id,) + tuple(row) for row in latencies),
+            )
+            # 按已写入的用例结果重新计算，兼容多个工作进程分别写入
+            self.conn.execute(
+                "UPDATE runs SET "
+                "total = (SELECT COUNT(*) FROM test_results WHERE run_id = :id), "
+                "passed = (SELECT COUNT(*) FROM test_results WHERE run_id = :id AND status = 'passed'), "
+                "failed = (SELECT COUNT(*) FROM test_results WHERE run_id = :id AND status = 'failed'), "
+                "broken = (SELECT COUNT(*) FROM test_results WHERE run_id = :id AND status = 'broken'), "
+                "skipped = (SELECT COUNT(*) FROM test_results WHERE run_id = :id AND status = 'skipped') "
+                "WHERE id = :id",
+                {"id": run_id},
+            )
+        self.prune()
+        return run_id
+
+    def prune(self, keep_runs: Optional[int] = None, max_age_days: Optional[float] = None) -> int:
+        """
+        按保留策略删除过期的运行及其用例结果和请求耗时
+        :param keep_runs: 保留的运行数，0表示不限制
+        :param max_age_days: 保留的天数，0表示不限制
+        :return: 删除的运行数
+        """
+        keep_runs = self.keep_runs if keep_runs is None else keep_runs
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        removed = 0
+        with self.conn:
+            if keep_runs > 0:
+                removed += self.conn.execute(
+                    "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)", (keep_runs,)
+                ).rowcount
+            if max_age_days > 0:
+                removed += self.conn.execute(
+                    "DELETE FROM runs WHERE started < ?", (time.time() - max_age_days * 86400,)
+                ).rowcount
+        return removed
+
+    def runs(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        :param limit: 返回的运行数
+        :return: 最近的运行，按时间从晚到早排序
+        """
+        rows = self.conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def test_history(self, nodeid: str, last_runs: int = 30) -> List[Dict[str, Any]]:
+        """
+        :param nodeid: 用例节点ID
+        :param last_runs: 最近多少次运行
+        :return: 该用例在最近运行中的结果和耗时，按时间从早到晚排序
+        """
+        rows = self.conn.execute(
+            "SELECT r.run_key, r.started, t.status, t.duration FROM test_results t JOIN runs r ON r.id = t.run_id "
+            "WHERE t.nodeid = ? AND t.run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?) ORDER BY t.run_id",
+            (nodeid, last_runs),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def slowest_tests(self, limit: int = 10, days: float = 7) -> List[Dict[str, Any]]:
+        """
+        查询一段时间内平均耗时最长的用例，跳过的用例不计入
+        :param limit: 返回的用例数
+        :param days: 最近多少天
+        :return: [{"nodeid", "runs", "mean", "max", "failures"}, ...]，耗时单位：秒
+        """
+        rows = self.conn.execute(
+            "SELECT t.nodeid, COUNT(*) AS runs, ROUND(AVG(t.duration), 3) AS mean, ROUND(MAX(t.duration), 3) AS max, "
+            "SUM(t.status IN ('failed', 'broken')) AS failures "
+            "FROM test_results t JOIN runs r ON r.id = t.run_id "
+            "WHERE r.started >= ? AND t.status != 'skipped' "
+            "GROUP BY t.nodeid ORDER BY mean DESC LIMIT ?",
+            (time.time() - days * 86400, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def _latencies(self, template: Optional[str], method: Optional[str], last_runs: int):
+        sql = "SELECT run_id, method, template, total_ms FROM request_latencies " \
+              "WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)"
+        params: List[Any] = [last_runs]
+        if template is not None:
+            sql += " AND template = ?"
+            params.append(template)
+        if method is not None:
+            sql += " AND method = ?"
+            params.append(method)
+        return self.conn.execute(sql + " ORDER BY total_ms", params)
+
+    def latency_percentile(self, endpoint: str, pct: float = 95, last_runs: int = 30) -> Optional[float]:
+        """
+        查询端点在最近若干次运行中的请求耗时分位数
+        :param endpoint: 端点模板，可以带请求方法，如 "/posts/{post_id}" 或 "GET /posts/{post_id}"
+        :param pct: 分位数
+        :param last_runs: 最近多少次运行
+        :return: 耗时分位数，单位：毫秒，没有记录时返回None
+        """
+        method, template = split_endpoint(endpoint)
+        values = [row["total_ms"] for row in self._latencies(template, method, last_runs)]
+        return round(percentile(values, pct), 3) if values else None
+
+    def latency_trend(self, endpoint: str, pct: float = 95, last_runs: int = 30) -> List[Dict[str, Any]]:
+        """
+        查询端点在最近每次运行中的请求耗时分位数，用于观察趋势
+        :param endpoint: 端点模板，可以带请求方法
+        :param pct: 分位数
+        :param last_runs: 最近多少次运行
+        :return: [{"run_key", "count", "p": 分位数}, ...]，按时间从早到晚排序
+        """
+        method, template = split_endpoint(endpoint)
+        per_run: Dict[int, List[float]] = {}
+        for row in self._latencies(template, method, last_runs):
+            per_run.setdefault(row["run_id"], []).append(row["total_ms"])
+        if not per_run:
+            return []
+        keys = dict(self.conn.execute(
+            f"SELECT id, run_key FROM runs WHERE id IN ({','.join('?' * len(per_run))})", list(per_run)
+        ).fetchall())
+        return [{"run_key": keys[run_id], "count": len(values), "p": round(percentile(values, pct), 3)}
+                for run_id, values in sorted(per_run.items())]
+
+    def endpoint_latencies(self, pct: float = 95, last_runs: int = 30) -> Dict[str, Dict[str, Any]]:
+        """
+        按端点汇总最近若干次运行的请求耗时
+        :param pct: 分位数
+        :param last_runs: 最近多少次运行
+        :return: "请求方法 端点模板"到{"count", "p50", "p": 分位数, "max"}的映射，单位：毫秒
+        """
+        grouped: Dict[str, List[float]] = {}
+        for row in self._latencies(None, None, last_runs):
+            grouped.setdefault(f"{row['method']} {row['template']}", []).append(row["total_ms"])
+        return {
+            key: {"count": len(values), "p50": round(percentile(values, 50), 3),
+                  "p": round(percentile(values, pct), 3), "max": round(values[-1], 3)}
+            for key, values in sorted(grouped.items())
+        }
+
+
+class RunRecorder:
+    """在测试运行过程中按用例缓存请求耗时，运行结束时与用例结果一起写入运行历史数据库"""
+
+    def __init__(self):
+        self.latencies: List[LatencyRow] = []
+
+    def add_requests(self, nodeid: Optional[str], timings):
+        """
+        :param nodeid: 用例节点ID
+        :param timings: 该用例的请求耗时分解（RequestTiming列表）
+        """
+        self.latencies.extend(
+            (nodeid, t.method, t.template, t.status, round(t.total * 1000, 3), round(t.ttfb * 1000, 3))
+            for t in timings
+        )
+
+    def write(self, tests: Dict[str, Dict[str, Any]], started: float, run_key: Optional[str] = None,
+              path: Optional[str] = None) -> Optional[int]:
+        """
+        写入本次运行
+        :param tests: 运行汇总中的tests
+        :param started: 运行开始时间戳
+        :param run_key: 运行标识，默认使用环境变量TEST_RUN_ID（并行运行时由parallel_runner设置），否则按时间和进程号生成
+        :param path: 数据库文件路径
+        :return: 运行ID，没有用例结果时返回None
+        """
+        if not tests:
+            return None
+        run_key = run_key or os.getenv('TEST_RUN_ID') or new_run_key()
+        with RunHistory(path) as history:
+            run_id = history.record_run(run_key, tests, self.latencies, started=started)
+        self.latencies = []
+        return run_id
+
+
+def new_run_key() -> str:
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+# 全局运行记录实例
+run_recorder = RunRecorder()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="查询运行历史数据库中的用例耗时和请求耗时")
+    parser.add_argument("--db", help="数据库文件路径，默认使用配置中的RUN_HISTORY_DB")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    runs_parser = subparsers.add_parser("runs", help="列出最近的运行")
+    runs_parser.add_argument("--limit", type=int, default=10)
+    slowest_parser = subparsers.add_parser("slowest", help="一段时间内平均耗时最长的用例")
+    slowest_parser.add_argument("--limit", type=int, default=10)
+    slowest_parser.add_argument("--days", type=float, default=7)
+    latency_parser = subparsers.add_parser("latency", help="端点请求耗时分位数，不指定端点时按端点汇总")
+    latency_parser.add_argument("endpoint", nargs="?", help="端点模板，如 /posts/{post_id} 或 \"GET /posts/{post_id}\"")
+    latency_parser.add_argument("--pct", type=float, default=95)
+    latency_parser.add_argument("--runs", type=int, default=30, help="最近多少次运行")
+    latency_parser.add_argument("--trend", action="store_true", help="按运行列出分位数")
+    subparsers.add_parser("prune", help="按保留策略删除过期的运行")
+    args = parser.parse_args(argv)
+
+    with RunHistory(args.db) as history:
+        if args.command == "runs":
+            for run in history.runs(args.limit):
+                started = datetime.fromtimestamp(run["started"]).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"{run['run_key']}: {started}，耗时{run['finished'] - run['started']:.1f}s，"
+                      f"用例{run['total']}个（通过{run['passed']}，失败{run['failed']}，"
+                      f"异常{run['broken']}，跳过{run['skipped']}）")
+        elif args.command == "slowest":
+            for test in history.slowest_tests(args.limit, args.days):
+                print(f"{test['mean']:8.3f}s  最大{test['max']:.3f}s  {test['runs']}次  "
+                      f"失败{test['failures']}次  {test['nodeid']}")
+        elif args.command == "latency" and args.endpoint and args.trend:
+            for point in history.latency_trend(args.endpoint, args.pct, args.runs):
+                print(f"{point['run_key']}: p{args.pct:g}={point['p']}ms（{point['count']}次请求）")
+        elif args.command == "latency" and args.endpoint:
+            value = history.latency_percentile(args.endpoint, args.pct, args.runs)
+            if value is None:
+                print(f"没有端点的请求记录: {args.endpoint}", file=sys.stderr)
+                return 1
+            print(f"{args.endpoint} 最近{args.runs}次运行 p{args.pct:g}: {value}ms")
+        elif args.command == "latency":
+            for endpoint, stats in history.endpoint_latencies(args.pct, args.runs).items():
+                print(f"{endpoint}: 次数={stats['count']}, p50={stats['p50']}, "
+                      f"p{args.pct:g}={stats['p']}, max={stats['max']}")
+        else:
+            print(f"删除了{history.prune()}次运行")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+from typing import Dict, Any, List, Optional
+from config.config import config
+
+STATUSES = ("passed", "failed", "broken", "skipped")
+
+
+class RunSummary:
+    """在测试运行过程中累计用例结果，运行结束时写入一个汇总文件，供通知等模块直接读取"""
+
+    def __init__(self):
+        self.start = time.time()
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self.failures: Dict[str, str] = {}
+        self.sections: Dict[str, Any] = {}
+
+    @staticmethod
+    def _status(report, call) -> str:
+        # 与Allure保持一致：断言失败为failed，其他异常（包括setup/teardown异常）为broken
+        if report.passed:
+            return "passed"
+        if report.skipped:
+            return "skipped"
+        if report.when == "call" and call is not None and call.excinfo is not None \
+                and call.excinfo.errisinstance(AssertionError):
+            return "failed"
+        return "broken"
+
+    def record(self, report, call=None):
+        """
+        记录用例某个阶段（setup/call/teardown）的结果
+        :param report: pytest的TestReport
+        :param call: pytest的CallInfo
+        """
+        status = self._status(report, call)
+        test = self.tests.setdefault(report.nodeid, {"status": status, "duration": 0.0})
+        test["duration"] = round(test["duration"] + report.duration, 6)
+        if report.when == "call" or (report.when == "teardown" and status == "broken" and test["status"] == "passed"):
+            test["status"] = status
+        elif report.when == "setup":
+            test["status"] = status
+        if status in ("failed", "broken"):
+            lines = (report.longreprtext or "").strip().splitlines()
+            self.failures[report.nodeid] = lines[-1][:500] if lines else ""
+
+    def add_section(self, name: str, data: Any):
+        """
+        添加附加汇总信息，如请求耗时、连接池统计
+        :param name: 名称
+        :param data: 可序列化为JSON的数据
+        """
+        self.sections[name] = data
+
+    def counts(self) -> Dict[str, int]:
+        stats = {"total": len(self.tests)}
+        stats.update({status: 0 for status in STATUSES})
+        for test in self.tests.values():
+            stats[test["status"]] += 1
+        return stats
+
+    def to_dict(self, alluredir: Optional[str] = None) -> Dict[str, Any]:
+        stop = time.time()
+        result = self.counts()
+        result.update({
+            "alluredir": os.path.abspath(alluredir) if alluredir else None,
+            "start": self.start,
+            "stop": stop,
+            "duration": round(stop - self.start, 3),
+            "tests": self.tests,
+            "failures": [
+                {"nodeid": nodeid, "status": self.tests[nodeid]["status"], "message": message}
+                for nodeid, message in self.failures.items()
+                if self.tests[nodeid]["status"] in ("failed", "broken")
+            ],
+            "sections": self.sections,
+        })
+        return result
+
+    def write(self, path: str, alluredir: Optional[str] = None):
+        """
+        写入汇总文件
+        :param path: 汇总文件路径
+        :param alluredir: 本次运行的Allure结果目录
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(alluredir), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def summary_path(worker_id: Optional[str] = None) -> str:
+    """
+    获取汇总文件路径，并行运行时每个工作进程写入独立的文件
+    :param worker_id: 工作进程ID
+    :return: 汇总文件路径
+    """
+    path = config['RUN_SUMMARY_FILE']
+    if worker_id is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{worker_id}{ext}"
+
+
+def load_summary(path: str = None) -> Optional[Dict[str, Any]]:
+    """
+    读取汇总文件
+    :param path: 汇总文件路径，默认使用配置中的RUN_SUMMARY_FILE
+    :return: 汇总信息，文件不存在或无法解析时返回None
+    """
+    path = path or config['RUN_SUMMARY_FILE']
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def merge_summaries(paths: List[str], output: str) -> Dict[str, Any]:
+    """
+    合并多个工作进程的汇总文件
+    :param paths: 工作进程的汇总文件路径
+    :param output: 合并后的汇总文件路径
+    :return: 合并后的汇总信息
+    """
+    merged = {"total": 0, **{status: 0 for status in STATUSES},
+              "alluredir": None, "start": None, "stop": None, "tests": {}, "failures": [], "sections": {}}
+    for path in paths:
+        summary = load_summary(path)
+        if summary is None:
+            continue
+        for key in ("total",) + STATUSES:
+            merged[key] += summary[key]
+        merged["alluredir"] = merged["alluredir"] or summary["alluredir"]
+        merged["start"] = min(filter(None, [merged["start"], summary["start"]]))
+        merged["stop"] = max(filter(None, [merged["stop"], summary["stop"]]))
+        merged["tests"].update(summary["tests"])
+        merged["failures"].extend(summary["failures"])
+        worker = os.path.basename(path)
+        for name, data in summary["sections"].items():
+            merged["sections"].setdefault(name, {})[worker] = data
+    if merged["start"] is not None:
+        merged["duration"] = round(merged["stop"] - merged["start"], 3)
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False)
+    os.replace(tmp_path, output)
+    return merged
+
+
+# 导出当前进程的运行汇总实例供conftest使用
+run_summary = RunSummary()